@@ -0,0 +1 @@
+"""Tools measuring the MCP server's performance, which aren't shipped with it."""
@@ -0,0 +1,492 @@
+"""Load test of the MCP server, against the mock courts.
+
+Simulated agents connect to the server, over stdio or TCP, and each issues a mix of tool calls like
+an agent's: researches of every court, some of them paged through, and counts, with the same
+search criteria coming up again and again. The number of simultaneous clients is ramped up step
+by step, each against fresh servers, to find where latency collapses. Every step reports the
+throughput, the latency percentiles, the error rate, the requests that reached the courts and the
+peak memory used by the servers and their browsers.
+
+Over TCP, every client shares a single server, as agents sharing a container would. Over stdio,
+each client spawns a server of its own, as desktop agents do.
+
+Full texts aren't fetched: they're downloaded outside the browser's pages, so they'd reach the
+actual courts.
+
+Run it with ``python -m benchmarks.load``."""
+
+import asyncio
+import contextlib
+import json
+import math
+import os
+import random
+import socket
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from datetime import timedelta
+from pathlib import Path
+from typing import TYPE_CHECKING, Final, Literal
+
+import click
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+
+from benchmarks.mock_courts import serve_mock_courts
+from brlaw_mcp_server.infrastructure.memory import take_snapshot
+from brlaw_mcp_server.presentation.tcp import MESSAGE_SIZE_LIMIT, tcp_streams
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncGenerator, Mapping, Sequence
+
+type _Transport = Literal["stdio", "tcp"]
+
+type _Call = tuple[str, dict[str, object]]
+"""Name of a tool and the arguments it's called with."""
+
+_SERVE_SCRIPT: Final = "from brlaw_mcp_server.presentation.mcp import serve; serve()"
+
+_QUERIES: Final = (
+    "fraude execução",
+    '"dano moral" e consumidor',
+    "adicional de periculosidade",
+    "horas extras jornada",
+    "prescrição tributo",
+    "bem de família penhora",
+    "responsabilidade civil contrato",
+    "repercussão geral",
+    "aposentadoria servidor público",
+    "honorários advocatícios sucumbência",
+    "precedente inexistente",
+)
+"""Search criteria of the simulated agents. Few enough to come up again and again, as agents
+refine and repeat their researches, and one of them has no results."""
+
+_RESEARCH_TOOLS: Final = (
+    "StjLegalPrecedentsRequest",
+    "TstLegalPrecedentsRequest",
+    "StfLegalPrecedentsRequest",
+)
+
+_COUNT_TOOL: Final = "LegalPrecedentsCountRequest"
+
+_COUNT_SHARE: Final = 0.15
+"""Fraction of the tool calls counting the results instead of researching them."""
+
+_PAGES_READ: Final = (1, 1, 1, 2, 3)
+"""How many pages of results a research is paged through, picked at random."""
+
+_SERVER_START_TIMEOUT: Final = 30.0
+"""Seconds a server listening over TCP has to start accepting connections."""
+
+_MEMORY_SAMPLING_INTERVAL: Final = 0.5
+
+_MEBIBYTE: Final = 1024 * 1024
+
+_COLUMNS: Final = (
+    ("clients", "clients", ""),
+    ("calls", "  calls", ""),
+    ("throughput", "calls/s", ".2f"),
+    ("p50", "  p50 s", ".2f"),
+    ("p95", "  p95 s", ".2f"),
+    ("p99", "  p99 s", ".2f"),
+    ("error_rate", " errors", ".1%"),
+    ("court_requests", "court requests", ""),
+    ("server_rss_mib", "server MiB", ".0f"),
+    ("browser_rss_mib", "browser MiB", ".0f"),
+)
+"""Columns of the report's table: the summary's key, the heading and the number's format."""
+
+
+@dataclass
+class _StepReport:
+    """Measurements of a step of the load test."""
+
+    clients: int
+    duration: float = 0.0
+    latencies: list[float] = field(default_factory=list)
+    errors: int = 0
+    court_requests: int = 0
+    peak_server_rss: int = 0
+    peak_browser_rss: int = 0
+
+    def percentile(self, fraction: float) -> float:
+        """Latency, in seconds, below which a fraction of the tool calls were answered."""
+        if not self.latencies:
+            return math.nan
+
+        latencies = sorted(self.latencies)
+        return latencies[min(math.ceil(fraction * len(latencies)), len(latencies)) - 1]
+
+    def summarize(self) -> dict[str, float]:
+        """Summarize the measurements, as reported."""
+        calls = len(self.latencies)
+        return {
+            "clients": self.clients,
+            "calls": calls,
+            "throughput": calls / self.duration if self.duration else math.nan,
+            "p50": self.percentile(0.5),
+            "p95": self.percentile(0.95),
+            "p99": self.percentile(0.99),
+            "error_rate": self.errors / calls if calls else math.nan,
+            "court_requests": self.court_requests,
+            "server_rss_mib": self.peak_server_rss / _MEBIBYTE,
+            "browser_rss_mib": self.peak_browser_rss / _MEBIBYTE,
+        }
+
+
+def _plan_calls(generator: random.Random, calls: int) -> "list[_Call]":
+    """Plan the tool calls of a simulated agent."""
+    planned: list[_Call] = []
+    while len(planned) < calls:
+        query = generator.choice(_QUERIES)
+        if generator.random() < _COUNT_SHARE:
+            planned.append((_COUNT_TOOL, {"summary": query}))
+            continue
+
+        tool = generator.choice(_RESEARCH_TOOLS)
+        planned.extend(
+            (tool, {"summary": query, "page": page})
+            for page in range(1, generator.choice(_PAGES_READ) + 1)
+        )
+
+    return planned[:calls]
+
+
+def _find_free_port() -> int:
+    """Find a local port no one's listening on."""
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port: int = probe.getsockname()[1]  # pyright: ignore[reportAny]
+        return port
+
+
+def _measure_servers() -> tuple[int, int] | None:
+    """Measure the RSS of the servers, the load test's child processes, and of their browsers.
+
+    :return: The RSS of the servers and of their browsers, in bytes, or ``None`` if the platform
+        doesn't expose them."""
+    server_pids: set[int] = set()
+    for children in Path("/proc/self/task").glob("*/children"):
+        with contextlib.suppress(OSError, ValueError):
+            server_pids.update(map(int, children.read_text().split()))
+
+    snapshots = [take_snapshot(pid) for pid in server_pids]
+    if any(snapshot is None for snapshot in snapshots):
+        return None
+
+    return (
+        sum(snapshot.server_rss for snapshot in snapshots if snapshot is not None),
+        sum(snapshot.browser_rss for snapshot in snapshots if snapshot is not None),
+    )
+
+
+async def _sample_memory(report: _StepReport) -> None:
+    """Record the peak memory used by the servers and their browsers, until cancelled."""
+    while True:
+        measurements = await asyncio.to_thread(_measure_servers)
+        if measurements is None:
+            return
+
+        report.peak_server_rss = max(report.peak_server_rss, measurements[0])
+        report.peak_browser_rss = max(report.peak_browser_rss, measurements[1])
+        await asyncio.sleep(_MEMORY_SAMPLING_INTERVAL)
+
+
+@contextlib.asynccontextmanager
+async def _serve_tcp(
+    env: "Mapping[str, str]", work_dir: Path
+) -> "AsyncGenerator[int, None]":
+    """Start a server listening over TCP, stopping it once done.
+
+    :return: The port the server listens on.
+    :raises click.ClickException: If the server exits before listening."""
+    port = _find_free_port()
+    with (work_dir / "server.log").open("w") as log:
+        process = await asyncio.create_subprocess_exec(
+            sys.executable,
+            "-c",
+            _SERVE_SCRIPT,
+            "--tcp",
+            "--host",
+            "127.0.0.1",
+            "--port",
+            str(port),
+            env=env,
+            cwd=work_dir,
+            stdout=log,
+            stderr=log,
+        )
+
+    try:
+        async with asyncio.timeout(_SERVER_START_TIMEOUT):
+            while True:
+                try:
+                    _, writer = await asyncio.open_connection("127.0.0.1", port)
+                except OSError:
+                    if process.returncode is not None:
+                        raise click.ClickException(
+                            f"The server exited with code {process.returncode} before "
+                            f"listening:\n{(work_dir / 'server.log').read_text()}"
+                        ) from None
+
+                    await asyncio.sleep(0.1)
+                    continue
+
+                writer.close()
+                await writer.wait_closed()
+                break
+
+        yield port
+    finally:
+        if process.returncode is None:
+            process.terminate()
+            await process.wait()
+
+
+@contextlib.asynccontextmanager
+async def _connect(
+    transport: _Transport,
+    *,
+    port: int | None,
+    env: "Mapping[str, str]",
+    work_dir: Path,
+    client_index: int,
+) -> "AsyncGenerator[ClientSession, None]":
+    """Connect a simulated agent to a server, over TCP to the shared one or over stdio to one of
+    its own."""
+    if transport == "tcp":
+        assert port is not None  # noqa: S101  # always given with TCP.
+        reader, writer = await asyncio.open_connection(
+            "127.0.0.1", port, limit=MESSAGE_SIZE_LIMIT
+        )
+        try:
+            async with (
+                tcp_streams(reader, writer) as streams,
+                ClientSession(*streams) as session,
+            ):
+                await session.initialize()
+                yield session
+        finally:
+            writer.close()
+        return
+
+    parameters = StdioServerParameters(
+        command=sys.executable,
+        args=["-c", _SERVE_SCRIPT],
+        env=dict(env),
+        cwd=work_dir,
+    )
+    with (work_dir / f"server-{client_index}.log").open("w") as log:
+        async with (
+            stdio_client(parameters, errlog=log) as streams,
+            ClientSession(*streams) as session,
+        ):
+            await session.initialize()
+            yield session
+
+
+async def _run_client(  # noqa: PLR0913  # keyword-only arguments.
+    report: _StepReport,
+    *,
+    transport: _Transport,
+    port: int | None,
+    env: "Mapping[str, str]",
+    work_dir: Path,
+    client_index: int,
+    calls: "Sequence[_Call]",
+    call_timeout: float,
+) -> None:
+    """Issue the tool calls of a simulated agent, one after the other, recording their outcomes."""
+    async with _connect(
+        transport, port=port, env=env, work_dir=work_dir, client_index=client_index
+    ) as session:
+        for name, arguments in calls:
+            started_at = time.perf_counter()
+            try:
+                result = await session.call_tool(
+                    name,
+                    arguments,
+                    read_timeout_seconds=timedelta(seconds=call_timeout),
+                )
+            except Exception:  # noqa: BLE001  # any failure is an error of the call.
+                failed = True
+            else:
+                failed = result.isError
+
+            report.latencies.append(time.perf_counter() - started_at)
+            report.errors += failed
+
+
+async def _run_step(  # noqa: PLR0913  # keyword-only arguments.
+    clients: int,
+    *,
+    transport: _Transport,
+    calls_per_client: int,
+    call_timeout: float,
+    origin: str,
+    seed: int,
+) -> _StepReport:
+    """Run a step of the load test against fresh servers, with a number of simultaneous
+    clients."""
+    report = _StepReport(clients=clients)
+
+    with tempfile.TemporaryDirectory(prefix="brlaw-load-test-") as work_dir_name:
+        work_dir = Path(work_dir_name)
+        env = {
+            **os.environ,
+            "BRLAW_COURT_ORIGIN": origin,
+            "BRLAW_CACHE_DIR": str(work_dir / "cache"),
+        }
+
+        async with contextlib.AsyncExitStack() as stack:
+            port = (
+                await stack.enter_async_context(_serve_tcp(env, work_dir))
+                if transport == "tcp"
+                else None
+            )
+            sampler = asyncio.create_task(_sample_memory(report))
+
+            started_at = time.perf_counter()
+            try:
+                async with asyncio.TaskGroup() as task_group:
+                    for client_index in range(clients):
+                        task_group.create_task(
+                            _run_client(
+                                report,
+                                transport=transport,
+                                port=port,
+                                env=env,
+                                work_dir=work_dir,
+                                client_index=client_index,
+                                calls=_plan_calls(
+                                    random.Random(seed + client_index),  # noqa: S311  # not for security.
+                                    calls_per_client,
+                                ),
+                                call_timeout=call_timeout,
+                            )
+                        )
+            finally:
+                report.duration = time.perf_counter() - started_at
+                sampler.cancel()
+                with contextlib.suppress(asyncio.CancelledError):
+                    await sampler
+
+    return report
+
+
+def _print_report(summary: "Mapping[str, float]") -> None:
+    """Print the summary of a step as a row of the report's table."""
+    click.echo(
+        " ".join(
+            f"{summary[key]:>{len(heading)}{number_format}}"
+            for key, heading, number_format in _COLUMNS
+        )
+    )
+
+
+@click.command()
+@click.option(
+    "--clients",
+    "client_counts",
+    type=click.IntRange(min=1),
+    multiple=True,
+    default=(1, 2, 4, 8),
+    show_default=True,
+    help="Simultaneous clients of each step, in order. Repeat to add steps",
+)
+@click.option(
+    "--transport",
+    type=click.Choice(["stdio", "tcp"]),
+    default="tcp",
+    show_default=True,
+    help="Transport the clients connect over",
+)
+@click.option(
+    "--calls",
+    "calls_per_client",
+    type=click.IntRange(min=1),
+    default=10,
+    show_default=True,
+    help="Tool calls issued by each client",
+)
+@click.option(
+    "--call-timeout",
+    type=click.FloatRange(min=0, min_open=True),
+    default=180.0,
+    show_default=True,
+    help="Seconds a tool call may take before it's counted as an error",
+)
+@click.option(
+    "--latency",
+    type=click.FloatRange(min=0),
+    default=0.2,
+    show_default=True,
+    help="Seconds every response of the mock courts is delayed by",
+)
+@click.option(
+    "--jitter",
+    type=click.FloatRange(min=0),
+    default=0.1,
+    show_default=True,
+    help="Maximum seconds added at random to each latency",
+)
+@click.option(
+    "--failure-rate",
+    type=click.FloatRange(min=0, max=1),
+    default=0.0,
+    show_default=True,
+    help="Fraction of the mock courts' responses that are errors",
+)
+@click.option(
+    "--seed", default=0, show_default=True, help="Seed of the tool calls and latencies"
+)
+@click.option(
+    "--output",
+    type=click.Path(dir_okay=False, writable=True, path_type=Path),
+    help="File the steps' summaries are written to, as JSON",
+)
+def main(  # noqa: PLR0913, PLR0917  # command line options.
+    client_counts: tuple[int, ...],
+    transport: _Transport,
+    calls_per_client: int,
+    call_timeout: float,
+    latency: float,
+    jitter: float,
+    failure_rate: float,
+    seed: int,
+    output: Path | None,
+) -> None:
+    """Load test the MCP server against the mock courts, ramping up the simultaneous clients."""
+    summaries: list[dict[str, float]] = []
+
+    with serve_mock_courts(
+        latency=latency, jitter=jitter, failure_rate=failure_rate, seed=seed
+    ) as mock_courts:
+        click.echo(" ".join(heading for _, heading, _ in _COLUMNS))
+        for clients in client_counts:
+            court_requests = mock_courts.requests
+            report = asyncio.run(
+                _run_step(
+                    clients,
+                    transport=transport,
+                    calls_per_client=calls_per_client,
+                    call_timeout=call_timeout,
+                    origin=mock_courts.origin,
+                    seed=seed,
+                )
+            )
+            report.court_requests = mock_courts.requests - court_requests
+
+            summary = report.summarize()
+            summaries.append(summary)
+            _print_report(summary)
+
+    if output is not None:
+        output.write_text(json.dumps(summaries, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,423 @@
+"""Local stand-in for the courts' websites, to load test the MCP server without reaching them.
+
+The server is pointed at it through ``BRLAW_COURT_ORIGIN``, which has its browser send every
+request meant for a court's host to this server instead, with the host as the first segment of the
+path. Each court's search engine is imitated only as far as its scraper needs: the STJ's server-side
+rendered pages, the TST's application rendering the results behind a spinner and the STF's single
+page application, whose summaries are copied to the clipboard.
+
+Results are generated from the search criteria, so the same research always gets the same results,
+and every response is delayed by a configurable latency to mimic the courts' own.
+
+Run it on its own with ``python -m benchmarks.mock_courts``."""
+
+import contextlib
+import html
+import json
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import TYPE_CHECKING, Final, override
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+import click
+
+if TYPE_CHECKING:
+    from collections.abc import Generator, Mapping
+
+_LOGGER = logging.getLogger(__name__)
+
+_VOCABULARY: Final = (  # noqa: SIM905  # easier to read as text.
+    "recurso especial agravo interno execução fiscal fraude credor devedor penhora bem de família "
+    "dano moral indenização responsabilidade civil contrato consumidor prescrição decadência "
+    "adicional de periculosidade insalubridade horas extras jornada vínculo empregatício "
+    "competência tributo imposto repercussão geral constitucionalidade servidor público "
+    "previdência aposentadoria honorários advocatícios sucumbência tutela antecipada "
+    "ônus da prova cerceamento de defesa nulidade acórdão recorrido súmula provimento negado"
+).split()
+"""Words the summaries are made of, besides the search criteria's own."""
+
+_OPERATORS: Final = frozenset({"e", "ou", "não", "nao", "mesmo", "com", "adj", "prox"})
+
+_NO_RESULTS_MARKER: Final = "inexistente"
+"""Word making any search criteria it's part of match no legal precedent."""
+
+_MAX_RESULTS: Final = 400
+
+_STJ_PAGE_SIZE: Final = 10
+
+_TST_PAGE_SIZE: Final = 20
+
+_STF_PAGE_SIZE: Final = 10
+
+
+def _count_results(court: str, query: str) -> int:
+    """Number of legal precedents of a court matching the search criteria."""
+    if _NO_RESULTS_MARKER in query.lower():
+        return 0
+
+    return random.Random(f"{court}:{query}").randint(1, _MAX_RESULTS)  # noqa: S311  # not for security.
+
+
+def _make_summary(court: str, query: str, index: int) -> str:
+    """Summary of the legal precedent of a court at an index of the results of the search
+    criteria."""
+    generator = random.Random(f"{court}:{query}:{index}")  # noqa: S311  # not for security.
+    query_words = [
+        word
+        for word in query.replace('"', " ").split()
+        if word.lower() not in _OPERATORS and not word.startswith("(")
+    ]
+    words: list[str] = generator.choices(_VOCABULARY, k=generator.randint(30, 90))
+    for word in query_words:
+        for _ in range(generator.randint(0, 3)):
+            words.insert(generator.randrange(len(words) + 1), word)
+
+    return f"{court} {index + 1}. " + " ".join(words).capitalize() + "."
+
+
+def _page_of_results(
+    court: str, query: str, page: int, page_size: int
+) -> tuple[int, list[tuple[int, str]]]:
+    """Get the number of results of the search criteria, and the indexes and summaries of those
+    on a page."""
+    total = _count_results(court, query)
+    start = (page - 1) * page_size
+    return total, [
+        (index, _make_summary(court, query, index))
+        for index in range(start, min(start + page_size, total))
+    ]
+
+
+def _format_number(number: int) -> str:
+    """Format a number the way the courts do, such as ``1.234``."""
+    return f"{number:,}".replace(",", ".")
+
+
+_STJ_FORM: Final = """<!DOCTYPE html>
+<html lang="pt-BR"><head><meta charset="utf-8"><title>SCON</title></head>
+<body>
+<form action="pesquisar.jsp" method="get">
+  <input id="ementa" name="ementa" type="text">
+  <a id="idMostrarPesquisaAvancada" href="#"
+     onclick="document.getElementById('avancada').hidden = false; return false;">Avançada</a>
+  <div id="avancada" hidden>
+    <input id="dtde1" name="dtde1" type="text">
+    <input id="dtde2" name="dtde2" type="text">
+    <input id="orgao" name="orgao" type="text">
+    <input id="relator" name="relator" type="text">
+    <input name="b" type="checkbox" value="ACOR" checked>
+    <input name="b" type="checkbox" value="DTXT">
+    <input name="b" type="checkbox" value="SUMU">
+  </div>
+  <button type="submit">Pesquisar</button>
+</form>
+</body></html>"""
+
+
+def _render_stj_results(params: "Mapping[str, list[str]]") -> str:
+    """Render the STJ's server-side page of results."""
+    query = params.get("ementa", [""])[0]
+    page = int(params.get("pagina", ["1"])[0])
+    total, results = _page_of_results("STJ", query, page, _STJ_PAGE_SIZE)
+
+    if not results:
+        body = '<div class="erroMensagem">Nenhum documento encontrado!</div>'
+    else:
+        body = f"<span>{_format_number(total)} documentos encontrados</span>" + "".join(
+            (
+                f'<div class="documento"><textarea id="textSemformatacao{index}">'
+                f"{html.escape(summary)}</textarea>"
+                f'<a href="GetInteiroTeorDoAcordao?num_registro={index}">Inteiro teor</a></div>'
+            )
+            for index, summary in results
+        )
+        if page * _STJ_PAGE_SIZE < total:
+            next_page_params = urlencode({"ementa": query, "pagina": page + 1})
+            body += (
+                f'<a class="iconeProximaPagina" href="pesquisar.jsp?{next_page_params}">'
+                "Próxima</a>"
+            )
+
+    return (
+        '<!DOCTYPE html><html lang="pt-BR"><head><meta charset="utf-8"><title>SCON</title>'
+        f'</head><body><div id="corpopaginajurisprudencia">{body}</div></body></html>'
+    )
+
+
+_TST_APPLICATION: Final = """<!DOCTYPE html>
+<html lang="pt-BR"><head><meta charset="utf-8"><title>Jurisprudência</title></head>
+<body>
+<div id="dialogo"><span class="jss1" onclick="this.parentElement.remove()">Fechar</span></div>
+<input id="campoTxtEmenta" type="text">
+<input id="campoDataJulgamentoInicial" type="text">
+<input id="campoDataJulgamentoFinal" type="text">
+<input id="campoOrgaoJudicante" type="text">
+<input id="campoMinistro" type="text">
+<input id="tipoAcordaos" type="checkbox" checked><label for="tipoAcordaos">Acórdãos</label>
+<input id="tipoDecisoes" type="checkbox"><label for="tipoDecisoes">Decisões Monocráticas</label>
+<input id="tipoSumulas" type="checkbox"><label for="tipoSumulas">Súmulas</label>
+<div id="resultados"></div>
+<script>
+  const input = document.getElementById("campoTxtEmenta");
+  const results = document.getElementById("resultados");
+  input.addEventListener("keydown", async (event) => {
+    if (event.key !== "Enter") return;
+    results.innerHTML = '<svg id="carregando" width="20" height="20"><circle cx="10" cy="10" r="8"></circle></svg>';
+    const response = await fetch("/api/pesquisa?" + new URLSearchParams({ ementa: input.value }));
+    const data = response.ok ? await response.json() : { total: 0, resultados: [] };
+    results.innerHTML = "";
+    const total = document.createElement("span");
+    total.textContent = data.total.toLocaleString("pt-BR") + " resultados";
+    results.append(total);
+    data.resultados.forEach((summary, index) => {
+      const result = document.createElement("div");
+      result.id = "celulaLeiaMaisAcordao" + index;
+      result.textContent = summary;
+      results.append(result);
+    });
+  });
+</script>
+</body></html>"""
+
+
+_STF_APPLICATION: Final = """<!DOCTYPE html>
+<html lang="pt-BR"><head><meta charset="utf-8"><title>STF</title></head>
+<body>
+<div id="app"></div>
+<script>
+  const app = document.getElementById("app");
+  async function render() {
+    app.innerHTML = "";
+    const params = new URLSearchParams(location.search);
+    if (!params.get("queryString")) return;
+    const response = await fetch("/api/search?" + params);
+    if (!response.ok) return;
+    const data = await response.json();
+    const count = document.createElement("div");
+    count.className = "mat-tooltip-trigger";
+    count.innerHTML = '<span class="ml-5 font-weight-500"></span>';
+    count.firstChild.textContent = "(" + data.total.toLocaleString("pt-BR") + ")";
+    app.append(count);
+    data.resultados.forEach(({ indice, ementa }, index) => {
+      const result = document.createElement("div");
+      result.id = "result-index-" + index;
+      const clipboard = document.createElement("app-clipboard");
+      clipboard.textContent = "Copiar";
+      clipboard.addEventListener("click", () => navigator.clipboard.writeText(ementa));
+      const summary = document.createElement("p");
+      summary.textContent = ementa;
+      const link = document.createElement("a");
+      link.href = "https://portal.stf.jus.br/processos/paginador.asp?indice=" + indice;
+      link.textContent = "Inteiro teor";
+      result.append(clipboard, summary, link);
+      app.append(result);
+    });
+  }
+  addEventListener("popstate", render);
+  render();
+</script>
+</body></html>"""
+
+
+@dataclass(frozen=True)
+class _Response:
+    status: HTTPStatus
+    content_type: str
+    body: str
+
+
+def _respond(host: str, path: str, params: "Mapping[str, list[str]]") -> _Response:  # noqa: PLR0911  # one per route.
+    """Answer a request to a court's host."""
+    page_html = "text/html; charset=utf-8"
+    page_json = "application/json"
+
+    match host, path:
+        case "scon.stj.jus.br", "/SCON/" | "/SCON/index.jsp":
+            return _Response(HTTPStatus.OK, page_html, _STJ_FORM)
+        case "scon.stj.jus.br", "/SCON/pesquisar.jsp":
+            return _Response(HTTPStatus.OK, page_html, _render_stj_results(params))
+        case "jurisprudencia.tst.jus.br", "/":
+            return _Response(HTTPStatus.OK, page_html, _TST_APPLICATION)
+        case "jurisprudencia.tst.jus.br", "/api/pesquisa":
+            total, results = _page_of_results(
+                "TST", params.get("ementa", [""])[0], 1, _TST_PAGE_SIZE
+            )
+            return _Response(
+                HTTPStatus.OK,
+                page_json,
+                json.dumps(
+                    {"total": total, "resultados": [summary for _, summary in results]}
+                ),
+            )
+        case "jurisprudencia.stf.jus.br", "/pages/search":
+            return _Response(HTTPStatus.OK, page_html, _STF_APPLICATION)
+        case "jurisprudencia.stf.jus.br", "/api/search":
+            total, results = _page_of_results(
+                "STF",
+                params.get("queryString", [""])[0],
+                int(params.get("page", ["1"])[0]),
+                int(params.get("pageSize", [str(_STF_PAGE_SIZE)])[0]),
+            )
+            return _Response(
+                HTTPStatus.OK,
+                page_json,
+                json.dumps(
+                    {
+                        "total": total,
+                        "resultados": [
+                            {"indice": index, "ementa": summary}
+                            for index, summary in results
+                        ],
+                    }
+                ),
+            )
+        case _:
+            return _Response(HTTPStatus.NOT_FOUND, "text/plain", "Not found")
+
+
+class MockCourtsServer(ThreadingHTTPServer):
+    """HTTP server of the mock courts, delaying and failing responses as configured."""
+
+    daemon_threads: bool = True
+
+    def __init__(
+        self,
+        address: tuple[str, int],
+        *,
+        latency: float,
+        jitter: float,
+        failure_rate: float,
+        seed: int | None,
+    ) -> None:
+        super().__init__(address, _MockCourtsRequestHandler)
+        self.latency: float = latency
+        self.jitter: float = jitter
+        self.failure_rate: float = failure_rate
+        self.random: random.Random = random.Random(seed)  # noqa: S311  # not for security.
+        self.requests: int = 0
+        """How many requests were answered, including failed ones."""
+        self.lock: threading.Lock = threading.Lock()
+
+    @property
+    def origin(self) -> str:
+        """Origin the mock courts are served from, to be set as ``BRLAW_COURT_ORIGIN``."""
+        host, port = self.server_address[:2]
+        return f"http://{host!s}:{port}"
+
+
+class _MockCourtsRequestHandler(BaseHTTPRequestHandler):
+    server: MockCourtsServer  # pyright: ignore[reportIncompatibleVariableOverride]
+
+    def do_GET(self) -> None:
+        """Answer a request, after the configured latency."""
+        with self.server.lock:
+            self.server.requests += 1
+            delay = self.server.latency + self.server.random.uniform(
+                0, self.server.jitter
+            )
+            fails = self.server.random.random() < self.server.failure_rate
+
+        time.sleep(delay)
+
+        host, _, path = self.path.removeprefix("/").partition("/")
+        url = urlsplit("/" + path)
+        response = (
+            _Response(HTTPStatus.SERVICE_UNAVAILABLE, "text/plain", "Unavailable")
+            if fails
+            else _respond(host, url.path, parse_qs(url.query))
+        )
+
+        body = response.body.encode()
+        self.send_response(response.status)
+        self.send_header("Content-Type", response.content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    @override
+    def log_message(self, format: str, *args: object) -> None:
+        _LOGGER.debug(format, *args)
+
+
+@contextlib.contextmanager
+def serve_mock_courts(  # noqa: PLR0913  # keyword-only arguments.
+    *,
+    host: str = "127.0.0.1",
+    port: int = 0,
+    latency: float = 0.2,
+    jitter: float = 0.1,
+    failure_rate: float = 0.0,
+    seed: int | None = None,
+) -> "Generator[MockCourtsServer, None, None]":
+    """Serve the mock courts in a background thread.
+
+    :param host: Host to bind to.
+    :param port: Port to bind to. If 0, any free port.
+    :param latency: Seconds every response is delayed by.
+    :param jitter: Maximum seconds added at random to the latency of each response.
+    :param failure_rate: Fraction of the requests answered with an error, from 0 to 1.
+    :param seed: Seed of the latencies and failures, for reproducible runs.
+    :return: The running server."""
+    server = MockCourtsServer(
+        (host, port),
+        latency=latency,
+        jitter=jitter,
+        failure_rate=failure_rate,
+        seed=seed,
+    )
+    thread = threading.Thread(
+        target=server.serve_forever, name="mock-courts", daemon=True
+    )
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join()
+
+
+@click.command()
+@click.option("--host", default="127.0.0.1", help="Host to bind to")
+@click.option("--port", default=8080, help="Port to bind to")
+@click.option("--latency", default=0.2, help="Seconds every response is delayed by")
+@click.option(
+    "--jitter", default=0.1, help="Maximum seconds added at random to each latency"
+)
+@click.option(
+    "--failure-rate",
+    default=0.0,
+    help="Fraction of the requests answered with an error",
+)
+@click.option(
+    "--seed", type=int, default=None, help="Seed of the latencies and failures"
+)
+def main(  # noqa: PLR0913, PLR0917  # command line options.
+    host: str,
+    port: int,
+    latency: float,
+    jitter: float,
+    failure_rate: float,
+    seed: int | None,
+) -> None:
+    """Serve the mock courts until interrupted."""
+    with serve_mock_courts(
+        host=host,
+        port=port,
+        latency=latency,
+        jitter=jitter,
+        failure_rate=failure_rate,
+        seed=seed,
+    ) as server:
+        click.echo(f"Mock courts served from {server.origin}")
+        with contextlib.suppress(KeyboardInterrupt):
+            threading.Event().wait()
+
+
+if __name__ == "__main__":
+    main()
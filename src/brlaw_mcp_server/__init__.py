@@ -1,11 +1,20 @@
 """A MCP server for agentic legal research on Brazilian law using official sources."""
 
+# Imported before anything else, so the startup timer's clock starts as early as possible.
+import brlaw_mcp_server.infrastructure.startup  # noqa: F401  # pyright: ignore[reportUnusedImport]
+
+# isort: split
+import atexit
 import logging
+import logging.handlers
+import queue
 import sys
+import threading
+import time
 import traceback
 from pathlib import Path
 from types import TracebackType
-from typing import Any, override
+from typing import Any, Final, cast, override
 
 from pythonjsonlogger.json import JsonFormatter
 
@@ -27,9 +36,9 @@ class _Formatter(JsonFormatter):
 
             log_record["exception"] = {
                 "exc_type": exc_type.__name__ if exc_type else None,
-                "exc_value": str(exc_value),
-                "traceback": traceback.format_exception(
-                    exc_type, exc_value, exc_traceback
+                "exc_value": _bound(str(exc_value)),
+                "traceback": _bound_traceback(
+                    traceback.format_exception(exc_type, exc_value, exc_traceback)
                 ),
             }
 
@@ -37,21 +46,217 @@ class _Formatter(JsonFormatter):
             log_record.pop("exc_text", None)
 
 
+_MAX_FIELD_LENGTH: Final = 2000
+"""Maximum number of characters kept of each string logged, such as pages' contents."""
+
+_MAX_FIELD_DEPTH: Final = 3
+"""Maximum nesting of containers whose strings are also bounded."""
+
+_MAX_TRACEBACK_ENTRIES: Final = 50
+"""Maximum number of entries kept of each traceback logged, the innermost ones."""
+
+_STANDARD_RECORD_ATTRIBUTES: Final = frozenset(logging.makeLogRecord({}).__dict__) | {
+    "message",
+    "asctime",
+}
+
+_SAMPLING_WINDOW: Final = 60.0
+"""Seconds during which repetitions of a warning or error are counted."""
+
+_SAMPLING_BURST: Final = 5
+"""How many repetitions of a warning or error are logged per window before sampling starts."""
+
+_SAMPLING_RATE: Final = 100
+"""Once sampling starts, only one in this many repetitions is logged."""
+
+_SAMPLING_MAX_WINDOWS: Final = 10_000
+"""How many distinct warnings and errors are tracked before the expired windows are pruned."""
+
+_QUEUE_SIZE: Final = 10_000
+
+
+def _bound(value: object, depth: int = 0) -> object:
+    """Truncate the strings of a value, including those nested in containers."""
+    match value:
+        case str() if len(value) > _MAX_FIELD_LENGTH:
+            return (
+                value[:_MAX_FIELD_LENGTH]
+                + f"... [{len(value) - _MAX_FIELD_LENGTH} characters truncated]"
+            )
+        case dict() if depth < _MAX_FIELD_DEPTH:
+            return {
+                key: _bound(item, depth + 1)
+                for key, item in cast("dict[object, object]", value).items()
+            }
+        case list() | tuple() if depth < _MAX_FIELD_DEPTH:
+            return [
+                _bound(item, depth + 1)
+                for item in cast("list[object] | tuple[object, ...]", value)
+            ]
+        case _:
+            return value
+
+
+def _bound_traceback(entries: list[str]) -> list[str]:
+    """Truncate a formatted traceback, keeping its innermost entries."""
+    bounded = [
+        cast("str", _bound(entry)) for entry in entries[-_MAX_TRACEBACK_ENTRIES:]
+    ]
+    if len(entries) > _MAX_TRACEBACK_ENTRIES:
+        bounded.insert(
+            0, f"... [{len(entries) - _MAX_TRACEBACK_ENTRIES} entries truncated]\n"
+        )
+
+    return bounded
+
+
+def _format_message(record: logging.LogRecord) -> str:
+    """Format the message of a record, even if its arguments don't match it.
+
+    Filters run in the caller's thread, so a malformed logging call mustn't raise there."""
+    try:
+        return record.getMessage()
+    except Exception:  # noqa: BLE001  # any error formatting it.
+        return str(record.msg)
+
+
+class _PayloadLimiter(logging.Filter):
+    """Bounds the size of the message, of the extra fields and of the exception and stack texts of
+    every record."""
+
+    @override
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.msg = _bound(_format_message(record))
+        record.args = None
+
+        if record.exc_text:
+            record.exc_text = cast("str", _bound(record.exc_text))
+        if record.stack_info:
+            record.stack_info = cast("str", _bound(record.stack_info))
+
+        for key in record.__dict__.keys() - _STANDARD_RECORD_ATTRIBUTES:
+            record.__dict__[key] = _bound(cast("object", record.__dict__[key]))
+
+        return True
+
+
+class _RepetitionSampler(logging.Filter):
+    """Samples warnings and errors repeated in a short period, such as during an outage.
+
+    The first repetitions in a window are let through, then only a fraction of them. Records let
+    through after others were dropped tell how many were."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._lock: threading.Lock = threading.Lock()
+        self._windows: dict[
+            tuple[str, int, str, str | None], tuple[float, int, int]
+        ] = {}
+        """Start, number of repetitions and number of dropped repetitions of each window."""
+
+    @override
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno < logging.WARNING:
+            return True
+
+        key = (
+            record.name,
+            record.levelno,
+            str(record.msg),
+            record.exc_info[0].__name__
+            if record.exc_info and record.exc_info[0]
+            else None,
+        )
+        now = time.monotonic()
+
+        with self._lock:
+            started_at, repetitions, dropped = self._windows.get(key, (now, 0, 0))
+            if now - started_at > _SAMPLING_WINDOW:
+                started_at, repetitions = now, 0
+
+            repetitions += 1
+            if repetitions > _SAMPLING_BURST and repetitions % _SAMPLING_RATE != 0:
+                self._windows[key] = (started_at, repetitions, dropped + 1)
+                return False
+
+            self._windows[key] = (started_at, repetitions, 0)
+            if len(self._windows) > _SAMPLING_MAX_WINDOWS:
+                self._windows = {
+                    key: window
+                    for key, window in self._windows.items()
+                    if now - window[0] <= _SAMPLING_WINDOW
+                }
+
+        if dropped:
+            record.dropped_repetitions = dropped
+
+        return True
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """Hands records over to a background thread, so writing them never blocks the caller."""
+
+    def __init__(self, queue_: "queue.Queue[logging.LogRecord]") -> None:
+        super().__init__(queue_)
+        self._dropped_records: int = 0
+        self._dropped_records_lock: threading.Lock = threading.Lock()
+
+    @override
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Records never leave the process, so, unlike the base implementation, the exception info
+        # is kept for the formatter to structure it.
+        record.msg = _format_message(record)
+        record.args = None
+
+        with self._dropped_records_lock:
+            if self._dropped_records:
+                record.dropped_records = self._dropped_records
+                self._dropped_records = 0
+
+        return record
+
+    @override
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            # Losing records is preferable to stalling the caller when the writers fall behind.
+            with self._dropped_records_lock:
+                self._dropped_records += 1
+
+
 _formatter = _Formatter("%(asctime)s %(name)s %(levelname)s %(message)s")
 
 # To avoid losing important information, logs with WARNING level and above are also written to a
-# persistent file.
-_file_handler = logging.FileHandler(Path(__file__).parent.parent.parent / "mcp.log")
+# persistent file, rotated so it can't fill up the disk.
+_file_handler = logging.handlers.RotatingFileHandler(
+    Path(__file__).parent.parent.parent / "mcp.log",
+    maxBytes=10 * 1024 * 1024,
+    backupCount=5,
+    delay=True,
+)
 _file_handler.setLevel(logging.WARNING)
 
 _stream_handler = logging.StreamHandler()
 
-_root_logger = logging.getLogger()
-_root_logger.setLevel(logging.INFO)
-
 for handler in [_stream_handler, _file_handler]:
     handler.setFormatter(_formatter)
-    _root_logger.addHandler(handler)
+
+_log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(maxsize=_QUEUE_SIZE)
+
+_queue_handler = _QueueHandler(_log_queue)
+_queue_handler.addFilter(_RepetitionSampler())
+_queue_handler.addFilter(_PayloadLimiter())
+
+_queue_listener = logging.handlers.QueueListener(
+    _log_queue, _stream_handler, _file_handler, respect_handler_level=True
+)
+_queue_listener.start()
+atexit.register(_queue_listener.stop)
+
+_root_logger = logging.getLogger()
+_root_logger.setLevel(logging.INFO)
+_root_logger.addHandler(_queue_handler)
 
 
 def handle_uncaught_exception(
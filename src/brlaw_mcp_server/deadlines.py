@@ -0,0 +1,139 @@
+"""Deadlines of tool calls, split across the stages of their researches.
+
+Everything done on behalf of a tool call, however many attempts and pages of results it takes, is
+bound by the call's deadline. Each stage of a research, from leasing a browser page to extracting
+the results, may use a share of the time left, along with whatever the stages before it didn't
+use. The browser page's own timeouts are capped to the stage's budget, so a slow court fails the
+stage instead of keeping the page busy past the tool call.
+
+This module must stay free of heavy imports, as stages are entered by every layer."""
+
+import asyncio
+import contextlib
+import time
+from contextvars import ContextVar
+from enum import StrEnum
+from typing import TYPE_CHECKING, Final
+
+from brlaw_mcp_server.profiling import span
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncGenerator, Generator
+
+    from patchright.async_api import Page
+
+
+class Stage(StrEnum):
+    """Stages of a research, in the order they happen."""
+
+    LEASE = "lease"
+    """Leasing a browser page, which may launch the browser or create a context."""
+    NAVIGATE = "navigate"
+    """Loading the search engine, submitting the search or going to another page of results."""
+    WAIT = "wait"
+    """Waiting for the search engine to show the results."""
+    EXTRACT = "extract"
+    """Reading the results shown."""
+
+
+class DeadlineExceededError(TimeoutError):
+    """Raised when a stage of a research outlasts its share of the tool call's deadline.
+
+    Whether it's the court failing depends on the stage, and on whether the tool call still had
+    time left, so the court's health is left to tell."""
+
+    def __init__(self, stage: Stage, budget: float) -> None:
+        super().__init__(f"The {stage} stage outlasted its budget of {budget:.1f} s")
+        self.stage: Stage = stage
+
+
+_STAGE_SHARES: Final[dict[Stage, float]] = {
+    Stage.LEASE: 2,
+    Stage.NAVIGATE: 3,
+    Stage.WAIT: 3,
+    Stage.EXTRACT: 2,
+}
+"""Relative shares of the time left each stage may use, against the stages from it onwards."""
+
+_DEFAULT_PAGE_TIMEOUT: Final = 30_000
+"""Milliseconds of Playwright's default timeout, restored on pages once a stage is done, so pages
+returned to the pool don't keep a stage's budget."""
+
+_DEADLINE: Final[ContextVar[float | None]] = ContextVar("deadline", default=None)
+"""Moment, per the monotonic clock, the work in the current context must be done by."""
+
+_EXPIRY_TOLERANCE: Final = 0.01
+"""Seconds before the deadline it's already considered passed, as the event loop fires timers up
+to its clock's resolution early."""
+
+
+@contextlib.contextmanager
+def deadline(seconds: float) -> "Generator[None, None, None]":
+    """Bound the work done in the current context, including the tasks it creates, by a
+    deadline. A deadline already set is only ever shortened.
+
+    :param seconds: Seconds from now the work must be done by."""
+    current = _DEADLINE.get()
+    moment = time.monotonic() + seconds
+    token = _DEADLINE.set(moment if current is None else min(current, moment))
+    try:
+        yield
+    finally:
+        _DEADLINE.reset(token)
+
+
+def time_left() -> float | None:
+    """Seconds left until the current deadline, or ``None`` if there's none."""
+    moment = _DEADLINE.get()
+    return None if moment is None else max(moment - time.monotonic(), 0)
+
+
+def deadline_passed() -> bool:
+    """Whether the current deadline, if there's one, has passed."""
+    left = time_left()
+    return left is not None and left <= _EXPIRY_TOLERANCE
+
+
+@contextlib.asynccontextmanager
+async def stage(
+    current_stage: Stage, page: "Page | None" = None, *, name: str | None = None
+) -> "AsyncGenerator[None, None]":
+    """Bound a stage of a research by its share of the time left until the current deadline, if
+    there's one, and time it for the profile of the tool call.
+
+    :param current_stage: The stage.
+    :param page: The browser page the stage is carried out in, whose timeouts are capped to the
+        stage's budget meanwhile.
+    :param name: The name of the stage in profiles, if more specific than the stage's.
+    :raises DeadlineExceededError: If the stage outlasts its budget."""
+    with span(name or current_stage):
+        left = time_left()
+        if left is None:
+            yield
+            return
+
+        budget = (
+            left
+            * _STAGE_SHARES[current_stage]
+            / sum(
+                share
+                for other_stage, share in _STAGE_SHARES.items()
+                if list(Stage).index(other_stage) >= list(Stage).index(current_stage)
+            )
+        )
+        if page is not None:
+            # Playwright takes a timeout of 0 as no timeout at all.
+            page.set_default_timeout(max(budget * 1000, 1))
+
+        timeout = asyncio.timeout(budget)
+        try:
+            async with timeout:
+                yield
+        except TimeoutError as e:
+            if not timeout.expired():
+                raise
+
+            raise DeadlineExceededError(current_stage, budget) from e
+        finally:
+            if page is not None and not page.is_closed():
+                page.set_default_timeout(_DEFAULT_PAGE_TIMEOUT)
@@ -3,20 +3,254 @@
 This module contains the base classes and utilities used by the legal precedents
 domain models, including validation and common fields."""
 
+import hashlib
+import logging
+import re
 import textwrap
-from typing import TYPE_CHECKING, Self
+import urllib.parse
+from contextlib import asynccontextmanager
+from datetime import date
+from enum import StrEnum
+from typing import TYPE_CHECKING, ClassVar, Final, Self, cast
 
-from pydantic import BaseModel, Field, field_validator
+from pydantic import (
+    BaseModel,
+    ConfigDict,
+    Field,
+    computed_field,
+    field_validator,
+    model_validator,
+)
 
 if TYPE_CHECKING:
-    from collections.abc import Sequence
+    from collections.abc import AsyncGenerator, Sequence
 
-    from patchright.async_api import Page
+    from patchright.async_api import Locator, Page, Route
+
+_LOGGER = logging.getLogger(__name__)
+
+_NUMBER_OF_RESULTS_PATTERN: Final = re.compile(
+    r"\b(\d{1,3}(?:\.\d{3})+|\d+)\s+(?:documentos?|resultados?|registros?)\b",
+    re.IGNORECASE,
+)
+
+
+def parse_number_of_results(text: str) -> int | None:
+    """Parse the number of results out of the text shown by a search engine.
+
+    :param text: The text, such as ``1.234 documentos encontrados``.
+    :return: The number of results, or ``None`` if the text doesn't mention it."""
+    match = _NUMBER_OF_RESULTS_PATTERN.search(text)
+    if match is None:
+        return None
+
+    return int(match.group(1).replace(".", ""))
+
+
+async def resolve_link(anchor_locator: "Locator") -> str | None:
+    """Get the absolute URL of the first anchor matched by a locator.
+
+    :param anchor_locator: The locator of the anchors.
+    :return: The URL, or ``None`` if no anchor was matched or it has no link."""
+    if await anchor_locator.count() == 0:
+        return None
+
+    href = await anchor_locator.first.get_attribute("href")
+    if not href:
+        return None
+
+    return urllib.parse.urljoin(anchor_locator.page.url, href)
+
+
+FINGERPRINTED_RESULTS: Final = 3
+"""How many of the first results shown on a page of results make up its fingerprint."""
+
+_RESULT_HASH_LENGTH: Final = 16
+
+
+class ResultsFingerprint(BaseModel):
+    """Cheaply read fingerprint of a page of results, telling whether it changed since it was
+    scraped without scraping it again."""
+
+    model_config: ClassVar[ConfigDict] = ConfigDict(frozen=True)
+
+    number_of_results: int
+    """Number of results of the research, across all of its pages."""
+
+    first_results: tuple[str, ...]
+    """Hashes of the text of the first results shown on the page."""
+
+
+async def fingerprint_results(
+    results_locator: "Locator", number_of_results: int
+) -> ResultsFingerprint:
+    """Fingerprint the page of results shown.
+
+    :param results_locator: The locator of the elements holding the results shown, which must
+        have been rendered.
+    :param number_of_results: The number of results of the research, as shown.
+    :return: The fingerprint."""
+    first_results: list[str] = []
+    for result_locator in (await results_locator.all())[:FINGERPRINTED_RESULTS]:
+        text = " ".join((await result_locator.text_content() or "").split())
+        first_results.append(
+            hashlib.sha256(text.encode()).hexdigest()[:_RESULT_HASH_LENGTH]
+        )
+
+    return ResultsFingerprint(
+        number_of_results=number_of_results, first_results=tuple(first_results)
+    )
+
+
+_HEAVY_RESOURCE_TYPES: Final = frozenset({"image", "media", "font"})
+"""Types of resources that aren't needed to read a page's text."""
+
+
+@asynccontextmanager
+async def skip_heavy_resources(browser: "Page") -> "AsyncGenerator[None, None]":
+    """Abort the page's requests for resources that aren't needed to read its text.
+
+    :param browser: The page whose requests are intercepted."""
+
+    async def handle(route: "Route") -> None:
+        if route.request.resource_type in _HEAVY_RESOURCE_TYPES:
+            await route.abort()
+        else:
+            await route.fallback()
+
+    await browser.route("**/*", handle)
+    try:
+        yield
+    finally:
+        await browser.unroute("**/*", handle)
+
+
+class Court(StrEnum):
+    """Courts whose legal precedents can be researched."""
+
+    STJ = "STJ"
+    """Superior Tribunal de Justiça."""
+
+    TST = "TST"
+    """Tribunal Superior do Trabalho."""
+
+    STF = "STF"
+    """Supremo Tribunal Federal."""
+
+
+class DocumentType(StrEnum):
+    """Types of documents in which courts publish their legal precedents."""
+
+    JUDGMENT = "acordao"
+    """Acórdão, the decision of a collegiate body."""
+
+    MONOCRATIC_DECISION = "decisao_monocratica"
+    """Decisão monocrática, the decision of a single judge."""
+
+    BINDING_SUMMARY = "sumula"
+    """Súmula, the summary of the court's settled understanding on a matter."""
+
+
+class SearchFilters(BaseModel):
+    """Filtros que restringem a pesquisa, aplicados pelo próprio buscador do tribunal."""
+
+    judgment_date_start: date | None = Field(
+        title="Data de julgamento inicial",
+        description="Retorna apenas as decisões julgadas nesta data ou depois dela.",
+        default=None,
+        examples=["2020-01-01"],
+    )
+    """Earliest judgment date of the legal precedents."""
+
+    judgment_date_end: date | None = Field(
+        title="Data de julgamento final",
+        description="Retorna apenas as decisões julgadas nesta data ou antes dela.",
+        default=None,
+        examples=["2024-12-31"],
+    )
+    """Latest judgment date of the legal precedents."""
+
+    judging_body: str | None = Field(
+        title="Órgão julgador",
+        description="Retorna apenas as decisões proferidas pelo órgão julgador indicado.",
+        default=None,
+        min_length=1,
+        examples=["Primeira Seção", "Segunda Turma", "Tribunal Pleno"],
+    )
+    """Judging body that authored the legal precedents, as named by the court."""
+
+    rapporteur: str | None = Field(
+        title="Relator",
+        description="Retorna apenas as decisões cujo relator seja o ministro indicado.",
+        default=None,
+        min_length=1,
+        examples=["Herman Benjamin", "Cármen Lúcia"],
+    )
+    """Rapporteur of the legal precedents, as named by the court."""
+
+    document_type: DocumentType | None = Field(
+        title="Tipo de documento",
+        description=textwrap.dedent("""
+            Retorna apenas documentos do tipo indicado:
+            - `acordao`: decisões colegiadas (padrão do buscador de cada tribunal);
+            - `decisao_monocratica`: decisões de um único ministro;
+            - `sumula`: súmulas, que resumem o entendimento consolidado do tribunal."""),
+        default=None,
+    )
+    """Type of the documents in which the legal precedents were published."""
+
+    @model_validator(mode="after")
+    def _validate_judgment_date_range(self) -> Self:
+        """Validate that the judgment date range isn't empty."""
+        if (
+            self.judgment_date_start is not None
+            and self.judgment_date_end is not None
+            and self.judgment_date_start > self.judgment_date_end
+        ):
+            raise ValueError(
+                "A data de julgamento inicial deve ser anterior à data de julgamento final"
+            )
+
+        return self
+
+
+_SEARCH_FORM_MARKER: Final = "__brlawSearchFormReady"
+"""Global variable flagging a page left on a pristine search form by ``prepare_search_form``."""
+
+_ID_HASH_LENGTH: Final = 16
+"""Number of hexadecimal digits of the content hash kept in legal precedents' identifiers."""
+
+
+def parse_precedent_id(precedent_id: str) -> tuple[Court, str] | None:
+    """Parse a legal precedent's identifier.
+
+    :param precedent_id: The identifier, such as ``stj-3f1a9c0b7d2e4f61``.
+    :return: The court and the prefix of the content hash identifying the legal precedent, or
+        ``None`` if the identifier is malformed."""
+    court, _, hash_prefix = precedent_id.partition("-")
+    if (
+        court.upper() not in Court.__members__
+        or len(hash_prefix) != _ID_HASH_LENGTH
+        or not all(char in "0123456789abcdef" for char in hash_prefix)
+    ):
+        return None
+
+    return Court(court.upper()), hash_prefix
 
 
 class BaseLegalPrecedent(BaseModel):
     """Base class for legal precedents."""
 
+    court: ClassVar[Court]
+    """The court that authored the legal precedent."""
+
+    website_domain: ClassVar[str]
+    """Internet domain of the court's websites, the only ones full texts are fetched from."""
+
+    pages_are_addressable: ClassVar[bool] = False
+    """Whether any page of results can be reached directly, so that several pages may be
+    researched concurrently in different browser pages."""
+
     summary: str = Field(
         title="Ementa",
         description="A ementa da decisão. É a síntese do acórdão, na qual normalmente se resumem os seus pontos fundamentais.",
@@ -50,12 +284,78 @@ class BaseLegalPrecedent(BaseModel):
     )
     """The summary of the legal precedent."""
 
+    full_text_url: str | None = Field(
+        title="URL do inteiro teor",
+        description="Endereço do inteiro teor da decisão, quando disponibilizado pelo tribunal.",
+        default=None,
+    )
+    """URL of the legal precedent's full text, if the court links to it."""
+
     @field_validator("summary")
     @classmethod
     def _validate_summary(cls, v: str) -> str:
         """Validate the summary of the legal precedent."""
         return v.strip()
 
+    @property
+    def content_hash(self) -> str:
+        """Hash of the legal precedent's court and summary, identifying it across researches.
+
+        Whitespace is normalized beforehand, as courts aren't consistent about it."""
+        normalized_summary = " ".join(self.summary.split())
+        return hashlib.sha256(
+            f"{self.court}\n{normalized_summary}".encode()
+        ).hexdigest()
+
+    @computed_field(
+        title="Identificador",
+        description=textwrap.dedent("""
+            Identificador estável da decisão. Pode ser usado para consultá-la novamente, sem nova
+            pesquisa, no recurso `brlaw://precedents/{id}`."""),
+        examples=["stj-3f1a9c0b7d2e4f61"],
+    )
+    @property
+    def id(self) -> str:
+        """Stable identifier of the legal precedent, made of its court and a prefix of its
+        content hash."""
+        return f"{self.court.lower()}-{self.content_hash[:_ID_HASH_LENGTH]}"
+
+    @classmethod
+    async def _open_search_form(cls, browser: "Page") -> None:  # pyright: ignore[reportUnusedParameter]
+        """Navigate to the Court's search form, leaving it ready to be filled.
+
+        :param browser: The browser to use."""
+        raise NotImplementedError("This method must be implemented by the subclass.")
+
+    @classmethod
+    async def prepare_search_form(cls, browser: "Page") -> None:
+        """Navigate to the Court's search form ahead of a research, so the research doesn't have
+        to. Meant for pages kept warm between researches.
+
+        :param browser: The browser to use."""
+        await cls._open_search_form(browser)
+        await browser.evaluate(f"() => {{ window.{_SEARCH_FORM_MARKER} = true; }}")
+
+    @staticmethod
+    async def _consume_search_form(browser: "Page") -> bool:
+        """Check whether the page was left on a pristine search form by ``prepare_search_form``.
+
+        The form is consumed by the check, so it's never reused with the values of a previous
+        research.
+
+        :param browser: The browser to use.
+        :return: Whether the page is on a pristine search form."""
+        return cast(
+            "bool",
+            await browser.evaluate(
+                f"""() => {{
+                    const isReady = window.{_SEARCH_FORM_MARKER} === true;
+                    delete window.{_SEARCH_FORM_MARKER};
+                    return isReady;
+                }}"""
+            ),
+        )
+
     @classmethod
     async def research(
         cls,
@@ -63,11 +363,144 @@ class BaseLegalPrecedent(BaseModel):
         *,
         summary_search_prompt: str,  # pyright: ignore[reportUnusedParameter]
         desired_page: int = 1,  # pyright: ignore[reportUnusedParameter]
+        filters: SearchFilters | None = None,  # pyright: ignore[reportUnusedParameter]
     ) -> "Sequence[Self]":
         """Scrape legal precedents from the Court's search engine.
 
         :param browser: The browser to use.
         :param summary_search_prompt: The summary to search for.
         :param desired_page: The page of results to scrape.
+        :param filters: Filters to be applied by the Court's search engine.
         :return: A list of legal precedents."""
         raise NotImplementedError("This method must be implemented by the subclass.")
+
+    @classmethod
+    async def research_pages(
+        cls,
+        browser: "Page",
+        *,
+        summary_search_prompt: str,
+        pages: range,
+        filters: SearchFilters | None = None,
+    ) -> "Sequence[Self]":
+        """Scrape several pages of legal precedents from the Court's search engine, one after the
+        other in the same browser page.
+
+        :param browser: The browser to use.
+        :param summary_search_prompt: The summary to search for.
+        :param pages: The pages of results to scrape.
+        :param filters: Filters to be applied by the Court's search engine.
+        :return: The legal precedents of every page, in order."""
+        precedents: list[Self] = []
+        for page in pages:
+            page_precedents = await cls.research(
+                browser,
+                summary_search_prompt=summary_search_prompt,
+                desired_page=page,
+                filters=filters,
+            )
+            if not page_precedents:
+                break
+
+            precedents.extend(page_precedents)
+
+        return precedents
+
+    @classmethod
+    async def fingerprint_shown_results(
+        cls,
+        browser: "Page",  # pyright: ignore[reportUnusedParameter]
+    ) -> ResultsFingerprint | None:
+        """Fingerprint the page of results a research just scraped, to be compared with later
+        probes of the same page.
+
+        :param browser: The browser the research was done in, still showing the results.
+        :return: The fingerprint, or ``None`` if the Court's results can't be probed."""
+        return None
+
+    @classmethod
+    async def probe(
+        cls,
+        browser: "Page",  # pyright: ignore[reportUnusedParameter]
+        *,
+        summary_search_prompt: str,  # pyright: ignore[reportUnusedParameter]
+        desired_page: int = 1,  # pyright: ignore[reportUnusedParameter]
+        filters: SearchFilters | None = None,  # pyright: ignore[reportUnusedParameter]
+    ) -> ResultsFingerprint | None:
+        """Fingerprint a page of results without scraping it, which is much cheaper than
+        researching it again to find out whether it changed.
+
+        :param browser: The browser to use.
+        :param summary_search_prompt: The summary to search for.
+        :param desired_page: The page of results to fingerprint.
+        :param filters: Filters to be applied by the Court's search engine.
+        :return: The fingerprint, or ``None`` if the Court's results can't be probed."""
+        return None
+
+    @classmethod
+    async def count(
+        cls,
+        browser: "Page",  # pyright: ignore[reportUnusedParameter]
+        *,
+        summary_search_prompt: str,  # pyright: ignore[reportUnusedParameter]
+        filters: SearchFilters | None = None,  # pyright: ignore[reportUnusedParameter]
+    ) -> int:
+        """Count the legal precedents found by the Court's search engine, without scraping them.
+
+        :param browser: The browser to use.
+        :param summary_search_prompt: The summary to search for.
+        :param filters: Filters to be applied by the Court's search engine.
+        :return: The number of legal precedents found."""
+        raise NotImplementedError("This method must be implemented by the subclass.")
+
+    @classmethod
+    def is_court_url(cls, url: str) -> bool:
+        """Whether a URL points to one of the Court's websites.
+
+        :param url: The URL to check."""
+        parsed_url = urllib.parse.urlsplit(url)
+        host = parsed_url.hostname or ""
+
+        return parsed_url.scheme in {"http", "https"} and (
+            host == cls.website_domain or host.endswith("." + cls.website_domain)
+        )
+
+    @classmethod
+    async def fetch_full_text(cls, browser: "Page", url: str) -> str | bytes:
+        """Fetch the full text of a legal precedent.
+
+        PDFs are returned as downloaded, so extracting their text, which needs optional
+        dependencies, can't be mistaken for the Court failing.
+
+        :param browser: The browser to use.
+        :param url: The URL of the full text, as scraped along with the legal precedent.
+        :return: The full text, or the PDF document it's published as."""
+        if not cls.is_court_url(url):
+            raise ValueError(f"{url} isn't a {cls.court} URL")
+
+        _LOGGER.info("Fetching full text", extra={"court": cls.court, "url": url})
+
+        response = await browser.request.get(url)
+        if not response.ok:
+            raise RuntimeError(
+                f"The server's response wasn't as expected: {response.status}"
+            )
+
+        if "pdf" in response.headers.get("content-type", ""):
+            return await response.body()
+
+        # Pages of full texts may be rendered by scripts, so they're read from the browser, which
+        # is served the response already downloaded instead of downloading it again.
+        def is_full_text_url(requested_url: str) -> bool:
+            return requested_url == url
+
+        async def fulfill(route: "Route") -> None:
+            await route.fulfill(response=response)
+
+        await browser.route(is_full_text_url, fulfill)
+        try:
+            await browser.goto(url)
+        finally:
+            await browser.unroute(is_full_text_url, fulfill)
+
+        return await browser.locator("body").inner_text()
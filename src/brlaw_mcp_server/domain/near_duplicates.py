@@ -0,0 +1,99 @@
+"""Detection of near-duplicate legal precedents.
+
+The same decision is often reproduced, with a nearly identical summary, by the judgments of the
+appeals against it and by republished versions. Summaries are compared by the Jaccard similarity of
+their word shingles, and candidates for the comparison are found by locality-sensitive hashing of
+their MinHash signatures, so that grouping thousands of summaries doesn't compare every pair."""
+
+import zlib
+from typing import TYPE_CHECKING, Final
+
+from brlaw_mcp_server.utils import split_words
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+    from brlaw_mcp_server.domain.base import BaseLegalPrecedent
+
+_SHINGLE_LENGTH: Final = 3
+"""Number of consecutive words in each shingle."""
+
+_SIGNATURE_LENGTH: Final = 64
+"""Number of minimums in a MinHash signature. Each is taken over a bin of the shingles' hashes,
+so that every shingle is hashed only once."""
+
+_BAND_LENGTH: Final = 4
+"""Number of minimums in each band of a signature. Summaries sharing a whole band are candidates
+to be near duplicates."""
+
+_EMPTY_BIN: Final = 1 << 32
+"""Minimum of a bin without shingles, above any hash."""
+
+
+def _get_shingles(summary: str) -> frozenset[int]:
+    """Hash the word shingles of a summary, ignoring case, accents and punctuation."""
+    words = split_words(summary)
+
+    return frozenset(
+        zlib.crc32(" ".join(words[start : start + _SHINGLE_LENGTH]).encode())
+        for start in range(max(len(words) - _SHINGLE_LENGTH + 1, 1))
+    )
+
+
+def _get_signature(shingles: frozenset[int]) -> list[int]:
+    """Compute the MinHash signature of a set of shingles."""
+    signature = [_EMPTY_BIN] * _SIGNATURE_LENGTH
+    for shingle in shingles:
+        bin_index, value = shingle % _SIGNATURE_LENGTH, shingle // _SIGNATURE_LENGTH
+        signature[bin_index] = min(signature[bin_index], value)
+
+    return signature
+
+
+def group_near_duplicates[T: "BaseLegalPrecedent"](
+    precedents: "Sequence[T]", *, threshold: float
+) -> list[list[T]]:
+    """Group the legal precedents whose summaries are nearly identical.
+
+    :param precedents: The legal precedents.
+    :param threshold: Minimum Jaccard similarity of the summaries' word shingles for two legal
+        precedents to be grouped.
+    :return: The groups, in the order of their first legal precedent, each keeping the order of
+        the given legal precedents."""
+    shingles = [_get_shingles(precedent.summary) for precedent in precedents]
+    parents = list(range(len(precedents)))
+
+    def find_root(index: int) -> int:
+        while parents[index] != index:
+            parents[index] = parents[parents[index]]
+            index = parents[index]
+
+        return index
+
+    buckets: dict[tuple[int, ...], list[int]] = {}
+    for index, signature in enumerate(map(_get_signature, shingles)):
+        for start in range(0, _SIGNATURE_LENGTH, _BAND_LENGTH):
+            band = signature[start : start + _BAND_LENGTH]
+            # Short summaries leave bins empty, which says nothing about their similarity.
+            if all(value == _EMPTY_BIN for value in band):
+                continue
+
+            bucket = buckets.setdefault((start, *band), [])
+            for other_index in bucket:
+                root, other_root = find_root(index), find_root(other_index)
+                if root == other_root:
+                    continue
+
+                intersection = len(shingles[index] & shingles[other_index])
+                union = len(shingles[index]) + len(shingles[other_index]) - intersection
+                if intersection >= threshold * union:
+                    # The earliest legal precedent stays as the root, so it leads the group.
+                    parents[max(root, other_root)] = min(root, other_root)
+
+            bucket.append(index)
+
+    groups: dict[int, list[T]] = {}
+    for index, precedent in enumerate(precedents):
+        groups.setdefault(find_root(index), []).append(precedent)
+
+    return list(groups.values())
@@ -0,0 +1,184 @@
+"""Local ranking of legal precedents by their relevance to a research's criteria.
+
+Courts' search engines order their results by criteria of their own, so the most relevant ones
+may be a few pages away. The legal precedents of several pages are ranked by the Okapi BM25 score
+of their summaries against the search criteria, which are read as the courts' search engines read
+them: operators aren't terms, negated terms aren't looked for, quoted expressions are looked for as
+a whole and wildcards match whole words."""
+
+import math
+import re
+from typing import TYPE_CHECKING, Final, cast
+
+from brlaw_mcp_server.utils import normalize_text, split_words
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+    from brlaw_mcp_server.domain.base import BaseLegalPrecedent
+
+type _WordMatcher = str | re.Pattern[str]
+"""A word to be matched exactly, or a pattern matching whole words."""
+
+type _Term = tuple[_WordMatcher, ...]
+"""Consecutive words to be matched."""
+
+_K1: Final = 1.2
+"""BM25 parameter saturating the frequency of a term in a summary."""
+
+_B: Final = 0.75
+"""BM25 parameter normalizing the frequency of a term by the length of the summary."""
+
+_OPERATORS: Final = frozenset({"e", "ou", "nao", "mesmo", "com"})
+"""Logical operators of the courts' search engines, once normalized."""
+
+_PROXIMITY_OPERATOR_PATTERN: Final = re.compile(r"(?:prox|adj)\d*")
+
+_QUERY_TOKEN_PATTERN: Final = re.compile(r'["“”]([^"“”]*)["“”](~\d+)?|[()]|[^\s()"“”]+')
+"""Pattern of the search criteria's tokens: quoted expressions, optionally followed by a maximum
+distance between their words, parentheses and anything else between spaces."""
+
+_WORD_PIECE_PATTERN: Final = re.compile(r"[\w$?]+")
+
+_WILDCARD_PATTERN: Final = re.compile(r"\$(\d*)|\?")
+
+
+def _to_word_matcher(word: str) -> _WordMatcher:
+    """Build the matcher of a word of the search criteria, which may contain wildcards: `$`
+    replaces any number of characters, or at most the number following it, and `?` replaces a
+    single character."""
+    if _WILDCARD_PATTERN.search(word) is None:
+        return word
+
+    pattern = ""
+    position = 0
+    for wildcard in _WILDCARD_PATTERN.finditer(word):
+        pattern += re.escape(word[position : wildcard.start()])
+        if wildcard.group() == "?":
+            pattern += r"\w"
+        elif wildcard.group(1):
+            pattern += rf"\w{{0,{wildcard.group(1)}}}"
+        else:
+            pattern += r"\w*"
+        position = wildcard.end()
+
+    return re.compile(pattern + re.escape(word[position:]))
+
+
+def _parse_terms(query: str) -> list[_Term]:
+    """Extract the terms to be looked for in the summaries from the search criteria."""
+    terms: list[_Term] = []
+    depth = 0
+    negated_depth: int | None = None
+    negate_next = False
+
+    for token in _QUERY_TOKEN_PATTERN.finditer(normalize_text(query)):
+        expression, distance = token.group(1), token.group(2)
+
+        if token.group() == "(":
+            depth += 1
+            if negate_next and negated_depth is None:
+                negated_depth = depth
+            negate_next = False
+            continue
+
+        if token.group() == ")":
+            if negated_depth == depth:
+                negated_depth = None
+            depth = max(depth - 1, 0)
+            continue
+
+        if expression is None and (
+            token.group() in _OPERATORS
+            or _PROXIMITY_OPERATOR_PATTERN.fullmatch(token.group())
+        ):
+            negate_next = token.group() == "nao"
+            continue
+
+        # Terms excluded from the results aren't in any of them.
+        is_negated = negate_next or negated_depth is not None
+        negate_next = False
+        if is_negated:
+            continue
+
+        words = [
+            _to_word_matcher(word)
+            for word in cast(
+                "list[str]",
+                _WORD_PIECE_PATTERN.findall(
+                    expression if expression is not None else token.group()
+                ),
+            )
+        ]
+        if not words:
+            continue
+
+        # Words of an expression within a maximum distance may come in any order.
+        if distance is not None:
+            terms.extend((word,) for word in words)
+        else:
+            terms.append(tuple(words))
+
+    return terms
+
+
+def _count_occurrences(term: _Term, words: "Sequence[str]") -> int:
+    """Count the occurrences of a term in a summary's words."""
+    return sum(
+        all(
+            word == matcher
+            if isinstance(matcher, str)
+            else matcher.fullmatch(word) is not None
+            for matcher, word in zip(
+                term, words[start : start + len(term)], strict=True
+            )
+        )
+        for start in range(len(words) - len(term) + 1)
+    )
+
+
+def rank_by_relevance[T: "BaseLegalPrecedent"](
+    precedents: "Sequence[T]", search_prompt: str
+) -> list[T]:
+    """Rank legal precedents by the relevance of their summaries to the search criteria.
+
+    :param precedents: The legal precedents.
+    :param search_prompt: The search criteria the legal precedents were researched with,
+        possibly with the courts' operators.
+    :return: The legal precedents, the most relevant first. Those equally relevant keep their
+        order."""
+    terms = _parse_terms(search_prompt)
+    if not terms or not precedents:
+        return list(precedents)
+
+    summaries_words = [split_words(precedent.summary) for precedent in precedents]
+    occurrences = [
+        [_count_occurrences(term, words) for term in terms] for words in summaries_words
+    ]
+    average_length = sum(map(len, summaries_words)) / len(summaries_words) or 1
+
+    inverse_document_frequencies = [
+        math.log(1 + (len(precedents) - frequency + 0.5) / (frequency + 0.5))
+        for frequency in (
+            sum(1 for counts in occurrences if counts[index])
+            for index in range(len(terms))
+        )
+    ]
+
+    scores = [
+        sum(
+            inverse_document_frequency
+            * count
+            * (_K1 + 1)
+            / (count + _K1 * (1 - _B + _B * len(words) / average_length))
+            for inverse_document_frequency, count in zip(
+                inverse_document_frequencies, counts, strict=True
+            )
+        )
+        for words, counts in zip(summaries_words, occurrences, strict=True)
+    ]
+
+    return [
+        precedents[index]
+        for index in sorted(range(len(precedents)), key=lambda index: -scores[index])
+    ]
@@ -1,45 +1,141 @@
 import logging
 import urllib.parse
-from typing import TYPE_CHECKING, Self, cast, override
+from datetime import UTC, date, datetime
+from typing import TYPE_CHECKING, ClassVar, Final, Self, cast, override
 
-from brlaw_mcp_server.domain.base import BaseLegalPrecedent
+from brlaw_mcp_server.deadlines import Stage, stage
+from brlaw_mcp_server.domain.base import (
+    FINGERPRINTED_RESULTS,
+    BaseLegalPrecedent,
+    Court,
+    DocumentType,
+    ResultsFingerprint,
+    SearchFilters,
+    fingerprint_results,
+    resolve_link,
+    skip_heavy_resources,
+)
 
 if TYPE_CHECKING:
+    from typing import Literal
+
     from patchright.async_api import Page
 
 
 _LOGGER = logging.getLogger(__name__)
 
+_BASES: Final[dict[DocumentType, str]] = {
+    DocumentType.JUDGMENT: "acordaos",
+    DocumentType.MONOCRATIC_DECISION: "decisoes",
+    DocumentType.BINDING_SUMMARY: "sumulas",
+}
+"""Search engine's bases holding each type of document."""
+
+_SEARCH_URL: Final = "https://jurisprudencia.stf.jus.br/pages/search"
+
+_PAGE_SIZE: Final = 10
+
+_STALE_RESULTS_ATTRIBUTE: Final = "brlawStale"
+"""Data attribute holding the text elements showing results had before navigating within the
+application, telling them apart from those showing the new results."""
+
+_NAVIGATE_IN_APP_SCRIPT: Final = f"""([url, selectors]) => {{
+    for (const selector of selectors) {{
+        const element = document.querySelector(selector);
+        if (element !== null) element.dataset.{_STALE_RESULTS_ATTRIBUTE} = element.textContent;
+    }}
+    history.pushState(null, "", url);
+    dispatchEvent(new PopStateEvent("popstate", {{ state: null }}));
+}}"""
+"""Script navigating the search engine's single page application through its router, which
+follows the browser's history, instead of reloading it. The results shown beforehand are marked
+as stale."""
+
+_NEW_RESULTS_SHOWN_SCRIPT: Final = f"""([numberOfResultsSelector, resultSelector]) => {{
+    const isNew = (element) =>
+        element !== null && element.dataset.{_STALE_RESULTS_ATTRIBUTE} !== element.textContent;
+    return document.querySelector(numberOfResultsSelector) !== null
+        && (isNew(document.querySelector(numberOfResultsSelector))
+            || isNew(document.querySelector(resultSelector)));
+}}"""
+"""Script checking whether the results shown are no longer those marked as stale, either because
+they were rendered again or because their number or first result changed."""
+
+_IN_APP_NAVIGATION_TIMEOUT: Final = 10_000
+"""Milliseconds to wait for results after navigating within the application, before reloading
+it instead."""
+
+_NUMBER_OF_RESULTS_SELECTOR: Final = (
+    "div.mat-tooltip-trigger > span.ml-5.font-weight-500"
+)
+"""Selector of the element showing the number of results, such as ``(1.234)``."""
+
+_RESULT_SELECTOR: Final = "div[id^=result-index-]"
+"""Selector of the elements holding the results."""
+
 
 class StfLegalPrecedent(BaseLegalPrecedent):
     """A legal precedent from the Supreme Federal Court of Brazil (STF)."""
 
-    @override
+    court: ClassVar[Court] = Court.STF
+    website_domain: ClassVar[str] = "stf.jus.br"
+    pages_are_addressable: ClassVar[bool] = True
+
+    @staticmethod
+    def _get_filter_params(filters: SearchFilters | None) -> dict[str, str]:
+        """Get the search engine's query parameters corresponding to the filters."""
+        if filters is None:
+            return {"base": _BASES[DocumentType.JUDGMENT]}
+
+        params = {"base": _BASES[filters.document_type or DocumentType.JUDGMENT]}
+
+        if filters.judgment_date_start or filters.judgment_date_end:
+            start = filters.judgment_date_start or date(1900, 1, 1)
+            end = filters.judgment_date_end or datetime.now(UTC).date()
+            params["julgamento_data"] = f"{start:%d%m%Y}-{end:%d%m%Y}"
+
+        if filters.judging_body:
+            params["orgao_julgador"] = filters.judging_body
+
+        if filters.rapporteur:
+            params["relator"] = filters.rapporteur
+
+        return params
+
     @classmethod
-    async def research(
-        cls, browser: "Page", *, summary_search_prompt: str, desired_page: int = 1
-    ) -> "list[Self]":
-        url = (
-            "https://jurisprudencia.stf.jus.br/pages/search?"
+    def _get_search_url(
+        cls,
+        summary_search_prompt: str,
+        desired_page: int,
+        filters: SearchFilters | None,
+    ) -> str:
+        """Get the URL of a page of the search engine's results."""
+        return (
+            _SEARCH_URL
+            + "?"
             + urllib.parse.urlencode(
                 {
-                    "base": "acordaos",
+                    **cls._get_filter_params(filters),
                     "pesquisa_inteiro_teor": "false",
                     "sinonimo": "true",
                     "plural": "true",
                     "radicais": "false",
                     "buscaExata": "true",
                     "page": str(desired_page),
-                    "pageSize": "10",
+                    "pageSize": str(_PAGE_SIZE),
                     "queryString": summary_search_prompt,
                 }
             )
         )
 
-        response = await browser.goto(
-            url,
-            wait_until="networkidle",  # Page keeps loading async.
-        )
+    @staticmethod
+    async def _goto(
+        browser: "Page",
+        url: str,
+        wait_until: "Literal['domcontentloaded', 'networkidle']",
+    ) -> None:
+        """Navigate to a page of the search engine, checking the server's response."""
+        response = await browser.goto(url, wait_until=wait_until)
 
         if response is None or response.status >= 300:  # noqa: PLR2004  # constant used only once.
             _LOGGER.error(
@@ -56,8 +152,11 @@ class StfLegalPrecedent(BaseLegalPrecedent):
 
             raise RuntimeError("The server's response wasn't as expected")
 
+    @staticmethod
+    async def _get_number_of_results(browser: "Page") -> int:
+        """Get the number of results shown by the search engine."""
         numbers_of_results_locators = await browser.locator(
-            "div.mat-tooltip-trigger > span.ml-5.font-weight-500"
+            _NUMBER_OF_RESULTS_SELECTOR
         ).all()
 
         if len(numbers_of_results_locators) == 0:
@@ -67,32 +166,159 @@ class StfLegalPrecedent(BaseLegalPrecedent):
         if txt_numbers_of_precedents is None:
             raise RuntimeError("Failed to get the number of results")
 
-        numbers_of_precedents = int(
-            txt_numbers_of_precedents.strip("() ").replace(".", "")
+        return int(txt_numbers_of_precedents.strip("() ").replace(".", ""))
+
+    @override
+    @classmethod
+    async def _open_search_form(cls, browser: "Page") -> None:
+        await cls._goto(browser, _SEARCH_URL, wait_until="networkidle")
+
+    @classmethod
+    async def _load_results(
+        cls,
+        browser: "Page",
+        url: str,
+        wait_until: "Literal['domcontentloaded', 'networkidle']",
+    ) -> None:
+        """Load a page of results, through the already loaded application when possible, and
+        wait for the number of results to be shown."""
+        from patchright.async_api import TimeoutError  # noqa: PLC0415  # the driver is heavy, so it's imported once needed.
+
+        if await cls._consume_search_form(browser):
+            # Routing the loaded application to the results skips bootstrapping it again.
+            async with stage(Stage.NAVIGATE, browser, name="navigate_in_app"):
+                await browser.evaluate(
+                    _NAVIGATE_IN_APP_SCRIPT,
+                    [url, [_NUMBER_OF_RESULTS_SELECTOR, _RESULT_SELECTOR]],
+                )
+                try:
+                    # The search form may still show the results of a previous research, so
+                    # they're only waited for once they've changed.
+                    await browser.wait_for_function(
+                        _NEW_RESULTS_SHOWN_SCRIPT,
+                        arg=[_NUMBER_OF_RESULTS_SELECTOR, _RESULT_SELECTOR],
+                        timeout=_IN_APP_NAVIGATION_TIMEOUT,
+                    )
+                except TimeoutError:
+                    _LOGGER.warning(
+                        "Failed to navigate within the search engine's application, reloading it",
+                        extra={"request_url": url},
+                    )
+                else:
+                    return
+
+        async with stage(Stage.NAVIGATE, browser, name="navigate"):
+            await cls._goto(browser, url, wait_until=wait_until)
+
+        async with stage(Stage.WAIT, browser, name="wait_for_results"):
+            await browser.locator(_NUMBER_OF_RESULTS_SELECTOR).first.wait_for()
+
+    @override
+    @classmethod
+    async def research(
+        cls,
+        browser: "Page",
+        *,
+        summary_search_prompt: str,
+        desired_page: int = 1,
+        filters: SearchFilters | None = None,
+    ) -> "list[Self]":
+        await cls._load_results(
+            browser,
+            cls._get_search_url(summary_search_prompt, desired_page, filters),
+            wait_until="networkidle",  # Page keeps loading async.
         )
 
-        if numbers_of_precedents == 0:
+        numbers_of_precedents = await cls._get_number_of_results(browser)
+
+        results_in_page = min(
+            _PAGE_SIZE, numbers_of_precedents - (desired_page - 1) * _PAGE_SIZE
+        )
+        if results_in_page <= 0:
             return []
 
-        results_locators = await browser.locator("div[id^=result-index-]").all()
-        if len(results_locators) == 0:
-            raise RuntimeError("Failed to find the results when there are results")
+        results_locator = browser.locator(_RESULT_SELECTOR)
+        async with stage(Stage.WAIT, browser, name="wait_for_rendering"):
+            await results_locator.nth(results_in_page - 1).wait_for()
+        results_locators = await results_locator.all()
 
         # Needed ahead to read the copied summaries.
         await browser.context.grant_permissions(["clipboard-read"])
 
         return_value: list[Self] = []
-        for result_locator in results_locators:
-            await result_locator.locator("app-clipboard").click()
-            handle = await browser.evaluate_handle(
-                "() => navigator.clipboard.readText()"
-            )
-            summary = cast("str", await handle.json_value())
+        async with stage(Stage.EXTRACT, browser, name="extract_results"):
+            for result_locator in results_locators:
+                await result_locator.locator("app-clipboard").click()
+                handle = await browser.evaluate_handle(
+                    "() => navigator.clipboard.readText()"
+                )
+                summary = cast("str", await handle.json_value())
 
-            return_value.append(
-                cls(
-                    summary=summary,
+                return_value.append(
+                    cls(
+                        summary=summary,
+                        full_text_url=await resolve_link(
+                            result_locator.locator("a[href*=paginador]")
+                        ),
+                    )
                 )
-            )
 
         return return_value
+
+    @override
+    @classmethod
+    async def fingerprint_shown_results(cls, browser: "Page") -> ResultsFingerprint:
+        return await fingerprint_results(
+            browser.locator(_RESULT_SELECTOR), await cls._get_number_of_results(browser)
+        )
+
+    @override
+    @classmethod
+    async def probe(
+        cls,
+        browser: "Page",
+        *,
+        summary_search_prompt: str,
+        desired_page: int = 1,
+        filters: SearchFilters | None = None,
+    ) -> ResultsFingerprint:
+        async with skip_heavy_resources(browser):
+            # Only the first results are waited for, and none of the summaries are copied.
+            await cls._load_results(
+                browser,
+                cls._get_search_url(summary_search_prompt, desired_page, filters),
+                wait_until="domcontentloaded",
+            )
+
+            number_of_results = await cls._get_number_of_results(browser)
+            fingerprinted_results = min(
+                FINGERPRINTED_RESULTS,
+                number_of_results - (desired_page - 1) * _PAGE_SIZE,
+            )
+            results_locator = browser.locator(_RESULT_SELECTOR)
+            if fingerprinted_results > 0:
+                async with stage(Stage.WAIT, browser, name="wait_for_rendering"):
+                    await results_locator.nth(fingerprinted_results - 1).wait_for()
+
+            async with stage(Stage.EXTRACT, browser, name="fingerprint_results"):
+                return await fingerprint_results(results_locator, number_of_results)
+
+    @override
+    @classmethod
+    async def count(
+        cls,
+        browser: "Page",
+        *,
+        summary_search_prompt: str,
+        filters: SearchFilters | None = None,
+    ) -> int:
+        async with skip_heavy_resources(browser):
+            # Unlike researching, counting doesn't wait for the results to be rendered: the
+            # number of results is shown as soon as the search engine answers.
+            await cls._load_results(
+                browser,
+                cls._get_search_url(summary_search_prompt, 1, filters),
+                wait_until="domcontentloaded",
+            )
+
+            return await cls._get_number_of_results(browser)
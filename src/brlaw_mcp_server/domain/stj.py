@@ -1,25 +1,47 @@
 import logging
-from typing import TYPE_CHECKING, Self, override
+from typing import TYPE_CHECKING, ClassVar, Final, Self, override
 
-from patchright.async_api import TimeoutError
-
-from brlaw_mcp_server.domain.base import BaseLegalPrecedent
+from brlaw_mcp_server.deadlines import Stage, stage
+from brlaw_mcp_server.domain.base import (
+    BaseLegalPrecedent,
+    Court,
+    DocumentType,
+    ResultsFingerprint,
+    SearchFilters,
+    fingerprint_results,
+    parse_number_of_results,
+    resolve_link,
+    skip_heavy_resources,
+)
 
 if TYPE_CHECKING:
     from patchright.async_api import Locator, Page
 
 _LOGGER = logging.getLogger(__name__)
 
+_BASES: Final[dict[DocumentType, str]] = {
+    DocumentType.JUDGMENT: "ACOR",
+    DocumentType.MONOCRATIC_DECISION: "DTXT",
+    DocumentType.BINDING_SUMMARY: "SUMU",
+}
+"""Search engine's bases holding each type of document."""
+
+_RESULT_SELECTOR: Final = "textarea[id^=textSemformatacao]"
+"""Selector of the elements holding the results' raw summaries."""
+
 
 class StjLegalPrecedent(BaseLegalPrecedent):
     """Model for a legal precedent from the Superior Tribunal de Justiça (STJ)."""
 
+    court: ClassVar[Court] = Court.STJ
+    website_domain: ClassVar[str] = "stj.jus.br"
+
     @staticmethod
     async def _get_raw_summary_locators(browser: "Page") -> "list[Locator]":
         """Get the locators of the raw summaries shown on the current page."""
-        raw_summary_locators = await browser.locator(
-            "textarea[id^=textSemformatacao]"
-        ).all()
+        from patchright.async_api import TimeoutError  # noqa: PLC0415  # the driver is heavy, so it's imported once needed.
+
+        raw_summary_locators = await browser.locator(_RESULT_SELECTOR).all()
 
         _LOGGER.debug(
             "Found %d raw summary locators on the current page",
@@ -45,41 +67,213 @@ class StjLegalPrecedent(BaseLegalPrecedent):
 
         return raw_summary_locators
 
+    @staticmethod
+    async def _fill_filters(browser: "Page", filters: SearchFilters) -> None:
+        """Fill the advanced search form's fields corresponding to the filters."""
+        if filters.judgment_date_start is not None:
+            await browser.locator("#dtde1").fill(
+                f"{filters.judgment_date_start:%d/%m/%Y}"
+            )
+
+        if filters.judgment_date_end is not None:
+            await browser.locator("#dtde2").fill(
+                f"{filters.judgment_date_end:%d/%m/%Y}"
+            )
+
+        if filters.judging_body:
+            await browser.locator("#orgao").fill(filters.judging_body)
+
+        if filters.rapporteur:
+            await browser.locator("#relator").fill(filters.rapporteur)
+
+        if filters.document_type is not None:
+            for document_type, base in _BASES.items():
+                await browser.locator(f"input[name=b][value={base}]").set_checked(
+                    document_type is filters.document_type
+                )
+
+    @override
+    @classmethod
+    async def _open_search_form(cls, browser: "Page") -> None:
+        await browser.goto("https://scon.stj.jus.br/SCON/")
+
+        await browser.locator("#idMostrarPesquisaAvancada").click()
+
+    @classmethod
+    async def _search(
+        cls,
+        browser: "Page",
+        *,
+        summary_search_prompt: str,
+        filters: SearchFilters | None,
+    ) -> None:
+        """Submit the advanced search form and wait for the first page of results."""
+        if not await cls._consume_search_form(browser):
+            async with stage(Stage.NAVIGATE, browser, name="open_search_form"):
+                await cls._open_search_form(browser)
+
+        async with stage(Stage.NAVIGATE, browser, name="submit_search"):
+            summary_input_locator = browser.locator("#ementa")
+            await summary_input_locator.fill(summary_search_prompt)
+            if filters is not None:
+                await cls._fill_filters(browser, filters)
+            await summary_input_locator.press("Enter")
+
+        async with stage(Stage.WAIT, browser, name="wait_for_results"):
+            await browser.locator("#corpopaginajurisprudencia").wait_for(
+                state="visible"
+            )
+
     @override
     @classmethod
     async def research(
-        cls, browser: "Page", *, summary_search_prompt: str, desired_page: int = 1
+        cls,
+        browser: "Page",
+        *,
+        summary_search_prompt: str,
+        desired_page: int = 1,
+        filters: SearchFilters | None = None,
     ) -> "list[Self]":
         _LOGGER.info(
             "Starting research for legal precedents authored by the STJ with the summary search prompt %s",
             repr(summary_search_prompt),
         )
 
-        await browser.goto("https://scon.stj.jus.br/SCON/")
+        await cls._search(
+            browser, summary_search_prompt=summary_search_prompt, filters=filters
+        )
 
-        await browser.locator("#idMostrarPesquisaAvancada").click()
+        for _ in range(desired_page - 1):
+            if not await cls._go_to_next_page(browser):
+                return []
 
-        summary_input_locator = browser.locator("#ementa")
-        await summary_input_locator.fill(summary_search_prompt)
-        await summary_input_locator.press("Enter")
+        return await cls._scrape_page(browser)
 
-        await browser.locator("#corpopaginajurisprudencia").wait_for(state="visible")
+    @override
+    @classmethod
+    async def research_pages(
+        cls,
+        browser: "Page",
+        *,
+        summary_search_prompt: str,
+        pages: range,
+        filters: SearchFilters | None = None,
+    ) -> "list[Self]":
+        # Pages can only be reached by walking through the previous ones, so the search is done
+        # once and every page is scraped on the way.
+        await cls._search(
+            browser, summary_search_prompt=summary_search_prompt, filters=filters
+        )
 
-        raw_summary_locators = await cls._get_raw_summary_locators(browser)
+        for _ in range(pages.start - 1):
+            if not await cls._go_to_next_page(browser):
+                return []
+
+        precedents: list[Self] = []
+        for page in pages:
+            if page != pages.start and not await cls._go_to_next_page(browser):
+                break
+
+            page_precedents = await cls._scrape_page(browser)
+            if not page_precedents:
+                break
+
+            precedents.extend(page_precedents)
+
+        return precedents
+
+    @staticmethod
+    async def _go_to_next_page(browser: "Page") -> bool:
+        """Go to the next page of results.
+
+        :return: Whether there was a next page."""
+        next_page_anchor_locators = await browser.locator("a.iconeProximaPagina").all()
+        if not next_page_anchor_locators:
+            return False
 
-        current_page = 1
-        while current_page != desired_page:
-            next_page_anchor_locators = await browser.locator(
-                "a.iconeProximaPagina"
-            ).all()
+        async with stage(Stage.NAVIGATE, browser, name="go_to_next_page"):
             await next_page_anchor_locators[0].click()
             await browser.wait_for_event("load")  # pyright: ignore[reportUnknownMemberType]
-            raw_summary_locators = await cls._get_raw_summary_locators(browser)
 
-            current_page += 1
+        return True
+
+    @classmethod
+    async def _scrape_page(cls, browser: "Page") -> "list[Self]":
+        """Scrape the legal precedents shown on the current page of results."""
+        async with stage(Stage.EXTRACT, browser, name="extract_results"):
+            return [
+                cls(
+                    summary=text,
+                    full_text_url=await resolve_link(
+                        locator.locator(
+                            "xpath=ancestor::div[contains(@class, 'documento')][1]"
+                        ).locator("a[href*=GetInteiroTeorDoAcordao]")
+                    ),
+                )
+                for locator in await cls._get_raw_summary_locators(browser)
+                if (text := await locator.text_content()) is not None
+            ]
+
+    @override
+    @classmethod
+    async def fingerprint_shown_results(cls, browser: "Page") -> ResultsFingerprint:
+        return await fingerprint_results(
+            browser.locator(_RESULT_SELECTOR),
+            parse_number_of_results(
+                await browser.locator("#corpopaginajurisprudencia").inner_text()
+            )
+            or 0,
+        )
+
+    @override
+    @classmethod
+    async def probe(
+        cls,
+        browser: "Page",
+        *,
+        summary_search_prompt: str,
+        desired_page: int = 1,
+        filters: SearchFilters | None = None,
+    ) -> ResultsFingerprint:
+        async with skip_heavy_resources(browser):
+            await cls._search(
+                browser, summary_search_prompt=summary_search_prompt, filters=filters
+            )
+
+            # Past the last page, the last one is fingerprinted, just as after a research.
+            for _ in range(desired_page - 1):
+                if not await cls._go_to_next_page(browser):
+                    break
+
+            async with stage(Stage.EXTRACT, browser, name="fingerprint_results"):
+                return await cls.fingerprint_shown_results(browser)
+
+    @override
+    @classmethod
+    async def count(
+        cls,
+        browser: "Page",
+        *,
+        summary_search_prompt: str,
+        filters: SearchFilters | None = None,
+    ) -> int:
+        _LOGGER.info(
+            "Counting legal precedents authored by the STJ with the summary search prompt %s",
+            repr(summary_search_prompt),
+        )
+
+        async with skip_heavy_resources(browser):
+            await cls._search(
+                browser, summary_search_prompt=summary_search_prompt, filters=filters
+            )
+
+            number_of_results = parse_number_of_results(
+                await browser.locator("#corpopaginajurisprudencia").inner_text()
+            )
+            if number_of_results is not None:
+                return number_of_results
+
+            if not await cls._get_raw_summary_locators(browser):
+                return 0
 
-        return [
-            cls(summary=text)
-            for locator in raw_summary_locators
-            if (text := await locator.text_content()) is not None
-        ]
+        raise RuntimeError("Failed to get the number of results")
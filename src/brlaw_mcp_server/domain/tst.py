@@ -1,21 +1,46 @@
-import contextlib
 import logging
-from typing import TYPE_CHECKING, Self, override
+from typing import TYPE_CHECKING, ClassVar, Final, Self, override
 
-from patchright.async_api import TimeoutError
 from pydantic import field_validator
 
-from brlaw_mcp_server.domain.base import BaseLegalPrecedent
+from brlaw_mcp_server.deadlines import Stage, stage
+from brlaw_mcp_server.domain.base import (
+    BaseLegalPrecedent,
+    Court,
+    DocumentType,
+    ResultsFingerprint,
+    SearchFilters,
+    fingerprint_results,
+    parse_number_of_results,
+    skip_heavy_resources,
+)
 
 if TYPE_CHECKING:
     from patchright.async_api import Page
 
 _LOGGER = logging.getLogger(__name__)
 
+_DOCUMENT_TYPE_LABELS: Final[dict[DocumentType, str]] = {
+    DocumentType.JUDGMENT: "Acórdãos",
+    DocumentType.MONOCRATIC_DECISION: "Decisões Monocráticas",
+    DocumentType.BINDING_SUMMARY: "Súmulas",
+}
+"""Labels of the search form's checkboxes selecting each type of document."""
+
+_RESULT_SELECTOR: Final = "div[id^=celulaLeiaMaisAcordao]"
+"""Selector of the elements holding the results' summaries."""
+
+_DIALOG_DISMISSED_KEY: Final = "brlawWelcomeDialogDismissed"
+"""Local storage key set by this server, not by the search engine, once its welcome dialog was
+dismissed."""
+
 
 class TstLegalPrecedent(BaseLegalPrecedent):
     """Model for a legal precedent from the Tribunal Superior do Trabalho (TST)."""
 
+    court: ClassVar[Court] = Court.TST
+    website_domain: ClassVar[str] = "tst.jus.br"
+
     @field_validator("summary")
     @classmethod
     def _remove_style_elements_from_summary(cls, v: str) -> str:
@@ -36,36 +61,107 @@ class TstLegalPrecedent(BaseLegalPrecedent):
             "Could not find the end of the style element inside the summary"
         )
 
+    @staticmethod
+    async def _fill_filters(browser: "Page", filters: SearchFilters) -> None:
+        """Fill the search form's fields corresponding to the filters."""
+        if filters.judgment_date_start is not None:
+            await browser.locator("#campoDataJulgamentoInicial").fill(
+                f"{filters.judgment_date_start:%d/%m/%Y}"
+            )
+
+        if filters.judgment_date_end is not None:
+            await browser.locator("#campoDataJulgamentoFinal").fill(
+                f"{filters.judgment_date_end:%d/%m/%Y}"
+            )
+
+        if filters.judging_body:
+            await browser.locator("#campoOrgaoJudicante").fill(filters.judging_body)
+
+        if filters.rapporteur:
+            await browser.locator("#campoMinistro").fill(filters.rapporteur)
+
+        if filters.document_type is not None:
+            for document_type, label in _DOCUMENT_TYPE_LABELS.items():
+                await browser.get_by_label(label, exact=True).set_checked(
+                    document_type is filters.document_type
+                )
+
+    @override
+    @classmethod
+    async def _open_search_form(cls, browser: "Page") -> None:
+        from patchright.async_api import TimeoutError  # noqa: PLC0415  # the driver is heavy, so it's imported once needed.
+
+        await browser.goto("https://jurisprudencia.tst.jus.br/")
+
+        close_button = browser.locator("span[class^='jss']").filter(has_text="Fechar")
+
+        # The dialog is only shown on first visits, so it's no longer waited for once dismissed in
+        # a storage state the context was restored from. Should it be shown again, it's still
+        # dismissed if it's already there.
+        if await browser.evaluate(
+            "key => localStorage.getItem(key) !== null", _DIALOG_DISMISSED_KEY
+        ):
+            if await close_button.is_visible():
+                await close_button.click()
+            return
+
+        try:
+            await close_button.click(timeout=1000)
+        except TimeoutError:
+            return
+
+        await browser.evaluate(
+            "key => localStorage.setItem(key, '1')", _DIALOG_DISMISSED_KEY
+        )
+
+    @classmethod
+    async def _search(
+        cls,
+        browser: "Page",
+        *,
+        summary_search_prompt: str,
+        filters: SearchFilters | None,
+    ) -> None:
+        """Submit the search form and wait for the results to be loaded."""
+        if not await cls._consume_search_form(browser):
+            async with stage(Stage.NAVIGATE, browser, name="open_search_form"):
+                await cls._open_search_form(browser)
+
+        async with stage(Stage.NAVIGATE, browser, name="submit_search"):
+            locator_summary_input = browser.locator("#campoTxtEmenta")
+            await locator_summary_input.fill(summary_search_prompt)
+            if filters is not None:
+                await cls._fill_filters(browser, filters)
+            await locator_summary_input.press("Enter")
+
+        async with stage(Stage.WAIT, browser, name="wait_for_results"):
+            await browser.locator("circle").wait_for(state="hidden")
+
     @override
     @classmethod
     async def research(
-        cls, browser: "Page", *, summary_search_prompt: str, desired_page: int = 1
+        cls,
+        browser: "Page",
+        *,
+        summary_search_prompt: str,
+        desired_page: int = 1,
+        filters: SearchFilters | None = None,
     ) -> "list[Self]":
         _LOGGER.info(
             "Starting research for legal precedents authored by the TST with the summary search prompt %s",
             repr(summary_search_prompt),
         )
 
-        await browser.goto("https://jurisprudencia.tst.jus.br/")
-
-        with contextlib.suppress(TimeoutError):
-            await (
-                browser.locator("span[class^='jss']")
-                .filter(has_text="Fechar")
-                .click(timeout=1000)
-            )
-
-        locator_summary_input = browser.locator("#campoTxtEmenta")
-        await locator_summary_input.fill(summary_search_prompt)
-        await locator_summary_input.press("Enter")
-
-        await browser.locator("circle").wait_for(state="hidden", timeout=1000 * 30)
+        await cls._search(
+            browser, summary_search_prompt=summary_search_prompt, filters=filters
+        )
 
-        precedents = [
-            cls(summary=text)
-            for locator in await browser.locator("div[id^=celulaLeiaMaisAcordao]").all()
-            if (text := await locator.text_content()) is not None
-        ]
+        async with stage(Stage.EXTRACT, browser, name="extract_results"):
+            precedents = [
+                cls(summary=text)
+                for locator in await browser.locator(_RESULT_SELECTOR).all()
+                if (text := await locator.text_content()) is not None
+            ]
 
         _LOGGER.info(
             "Found %d legal precedents",
@@ -73,3 +169,79 @@ class TstLegalPrecedent(BaseLegalPrecedent):
         )
 
         return precedents
+
+    @override
+    @classmethod
+    async def research_pages(
+        cls,
+        browser: "Page",
+        *,
+        summary_search_prompt: str,
+        pages: range,
+        filters: SearchFilters | None = None,
+    ) -> "list[Self]":
+        # Only the first page of results is scraped, whatever page is requested, so researching
+        # more than once would only repeat it.
+        return await cls.research(
+            browser,
+            summary_search_prompt=summary_search_prompt,
+            desired_page=pages.start,
+            filters=filters,
+        )
+
+    @override
+    @classmethod
+    async def fingerprint_shown_results(cls, browser: "Page") -> ResultsFingerprint:
+        return await fingerprint_results(
+            browser.locator(_RESULT_SELECTOR),
+            parse_number_of_results(await browser.locator("body").inner_text()) or 0,
+        )
+
+    @override
+    @classmethod
+    async def probe(
+        cls,
+        browser: "Page",
+        *,
+        summary_search_prompt: str,
+        desired_page: int = 1,
+        filters: SearchFilters | None = None,
+    ) -> ResultsFingerprint:
+        # Only the first page of results is scraped, whatever page is requested.
+        async with skip_heavy_resources(browser):
+            await cls._search(
+                browser, summary_search_prompt=summary_search_prompt, filters=filters
+            )
+
+            async with stage(Stage.EXTRACT, browser, name="fingerprint_results"):
+                return await cls.fingerprint_shown_results(browser)
+
+    @override
+    @classmethod
+    async def count(
+        cls,
+        browser: "Page",
+        *,
+        summary_search_prompt: str,
+        filters: SearchFilters | None = None,
+    ) -> int:
+        _LOGGER.info(
+            "Counting legal precedents authored by the TST with the summary search prompt %s",
+            repr(summary_search_prompt),
+        )
+
+        async with skip_heavy_resources(browser):
+            await cls._search(
+                browser, summary_search_prompt=summary_search_prompt, filters=filters
+            )
+
+            number_of_results = parse_number_of_results(
+                await browser.locator("body").inner_text()
+            )
+            if number_of_results is not None:
+                return number_of_results
+
+            if await browser.locator(_RESULT_SELECTOR).count() == 0:
+                return 0
+
+        raise RuntimeError("Failed to get the number of results")
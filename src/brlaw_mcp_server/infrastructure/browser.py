@@ -0,0 +1,459 @@
+"""Management of the browser shared by every research.
+
+Launching Chromium is by far the slowest step of a research, so a single browser is launched once
+and every research leases a page in it. Each court has its own context, which is recycled after
+serving a number of researches or when memory runs short, as long-lived contexts grow without
+bound.
+
+Opening a court's search form takes several round trips, so each context also keeps a small pool of
+idle pages already sitting on it. A page is reset back to the search form in the background once
+its lease is released, so the next research only has to fill the form in.
+
+Contexts start from the court's persisted storage state, when there's one, so they skip the
+first-visit overhead. The state is saved again periodically, and discarded if a context started
+from it fails before serving any research, as the court may have rejected it.
+
+For load tests, the courts' websites may be served from another origin, such as a mock court, to
+which the contexts' requests are redirected."""
+
+import asyncio
+import contextlib
+import contextvars
+import logging
+import math
+import re
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Final
+from urllib.parse import urlsplit
+
+from brlaw_mcp_server.profiling import span
+from brlaw_mcp_server.utils import USER_AGENT
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncGenerator, Awaitable, Callable, Mapping
+
+    from patchright.async_api import Browser, BrowserContext, Page, Playwright, Route
+
+    from brlaw_mcp_server.domain.base import Court
+    from brlaw_mcp_server.infrastructure.memory import MemoryGovernor, MemorySnapshot
+    from brlaw_mcp_server.infrastructure.storage_state import StorageStateStore
+
+_LOGGER = logging.getLogger(__name__)
+
+_PAGE_PREPARATION_TIMEOUT: Final = 30.0
+"""Seconds a page has to get back to the search form before being discarded instead of pooled."""
+
+_COURT_URL_PATTERN: Final = re.compile(r"^https?://[^/]+\.jus\.br(?:[:/?]|$)")
+"""Pattern of the URLs of the courts' websites."""
+
+
+@dataclass
+class _CourtContext:
+    """A browser context dedicated to a court."""
+
+    context: "BrowserContext"
+    uses: int = 0
+    active_leases: int = 0
+    retired: bool = False
+    """Whether the context must be closed as soon as its last lease is released."""
+    idle_pages: "list[Page]" = field(default_factory=list)
+    """Pages sitting on the court's search form, ready to be leased."""
+    preparing_pages: int = 0
+    """How many pages are being taken back to the search form to join the idle ones."""
+    restored_state: bool = False
+    """Whether the context started from the court's persisted storage state."""
+    successes: int = 0
+    """How many leases and page preparations succeeded in the context."""
+    state_saved_at: float = -math.inf
+    """Moment, per the monotonic clock, the context's storage state was last saved."""
+
+
+class BrowserManager:
+    """Owns the shared browser, launching it on demand and leasing its pages."""
+
+    def __init__(  # noqa: PLR0913  # keyword-only arguments.
+        self,
+        *,
+        headless: bool = True,
+        context_max_uses: int,
+        memory_governor: "MemoryGovernor",
+        page_pool_size: int = 0,
+        page_preparers: "Mapping[Court, Callable[[Page], Awaitable[None]]] | None" = None,
+        storage_states: "StorageStateStore | None" = None,
+        court_origin: str | None = None,
+    ) -> None:
+        """:param headless: Whether to run the browser in headless mode.
+        :param context_max_uses: How many leases a context serves before being recycled.
+        :param memory_governor: Governor of the memory used by the server and the browser.
+        :param page_pool_size: How many idle pages each court's context keeps ready.
+        :param page_preparers: Functions taking a page of each court to its search form. Pages of
+            courts without one aren't pooled.
+        :param storage_states: Store of the courts' storage states. If ``None``, every context
+            starts clean.
+        :param court_origin: Origin the courts' websites are served from, such as a mock court's.
+            If ``None``, they're served from their own."""
+        self._headless: bool = headless
+        self._context_max_uses: int = context_max_uses
+        self._memory_governor: MemoryGovernor = memory_governor
+        self._page_pool_size: int = page_pool_size
+        self._page_preparers: Mapping[Court, Callable[[Page], Awaitable[None]]] = (
+            page_preparers or {}
+        )
+        self._preparation_tasks: set[asyncio.Task[None]] = set()
+        self._release_tasks: set[asyncio.Task[None]] = set()
+        self._storage_states: StorageStateStore | None = storage_states
+        self._court_origin: str | None = (
+            court_origin.rstrip("/") if court_origin is not None else None
+        )
+        self._lock: asyncio.Lock = asyncio.Lock()
+        self._playwright: Playwright | None = None
+        self._browser: Browser | None = None
+        self._contexts: dict[Court, _CourtContext] = {}
+
+    async def start(self) -> "Browser":
+        """Launch the browser, unless it's already running.
+
+        :return: The running browser."""
+        async with self._lock:
+            if self._browser is None or not self._browser.is_connected():
+                # Deferred, as the driver is heavy and not needed to answer the MCP handshake.
+                from patchright.async_api import async_playwright  # noqa: PLC0415
+
+                with span("launch_browser"):
+                    if self._playwright is None:
+                        self._playwright = await async_playwright().start()
+
+                    _LOGGER.info("Launching browser")
+                    self._browser = await self._playwright.chromium.launch(
+                        headless=self._headless
+                    )
+                # Contexts of a crashed browser are unusable.
+                self._contexts.clear()
+
+            return self._browser
+
+    async def _get_context(self, court: "Court") -> _CourtContext:
+        """Get the court's current context, creating it if needed."""
+        browser = await self.start()
+
+        async with self._lock:
+            court_context = self._contexts.get(court)
+            if court_context is None or court_context.retired:
+                with span("new_context"):
+                    court_context = await self._new_context(browser, court)
+                self._contexts[court] = court_context
+
+            return court_context
+
+    async def _redirect_to_court_origin(self, route: "Route") -> None:
+        """Send a request to a court's website to the origin it's served from instead."""
+        url = urlsplit(route.request.url)
+        try:
+            response = await route.fetch(
+                url=f"{self._court_origin}/{url.netloc}{url.path}"
+                + (f"?{url.query}" if url.query else "")
+            )
+        except Exception:
+            _LOGGER.debug(
+                "Failed to redirect request", extra={"url": url.geturl()}, exc_info=True
+            )
+            await route.abort()
+            return
+
+        await route.fulfill(response=response)
+
+    async def _new_context(self, browser: "Browser", court: "Court") -> _CourtContext:
+        """Create a context for the court, redirecting its requests to the courts' origin if
+        it's set."""
+        court_context = await self._new_court_context(browser, court)
+        if self._court_origin is not None:
+            # Requests of the pages' own API clients, such as those fetching full texts, aren't
+            # routed, so they still reach the courts.
+            await court_context.context.route(
+                _COURT_URL_PATTERN, self._redirect_to_court_origin
+            )
+
+        return court_context
+
+    async def _new_court_context(
+        self, browser: "Browser", court: "Court"
+    ) -> _CourtContext:
+        """Create a context for the court, starting from its storage state if there's one."""
+        storage_state = (
+            await asyncio.to_thread(self._storage_states.load, court)
+            if self._storage_states is not None
+            else None
+        )
+
+        if storage_state is not None:
+            try:
+                return _CourtContext(
+                    context=await browser.new_context(
+                        extra_http_headers={"User-Agent": USER_AGENT},
+                        storage_state=storage_state,
+                    ),
+                    restored_state=True,
+                    state_saved_at=time.monotonic(),
+                )
+            except Exception:
+                _LOGGER.warning(
+                    "Failed to restore storage state",
+                    extra={"court": court},
+                    exc_info=True,
+                )
+                await self._discard_storage_state(court)
+
+        return _CourtContext(
+            context=await browser.new_context(
+                extra_http_headers={"User-Agent": USER_AGENT}
+            )
+        )
+
+    async def _save_storage_state(
+        self, court: "Court", court_context: _CourtContext
+    ) -> None:
+        """Save the storage state of a context as the court's."""
+        if self._storage_states is None:
+            return
+
+        try:
+            storage_state = await court_context.context.storage_state()
+            await asyncio.to_thread(self._storage_states.save, court, storage_state)
+        except Exception:
+            _LOGGER.warning(
+                "Failed to save storage state", extra={"court": court}, exc_info=True
+            )
+        else:
+            court_context.state_saved_at = time.monotonic()
+
+    async def _discard_storage_state(self, court: "Court") -> None:
+        """Discard the court's storage state, so the next contexts start clean."""
+        if self._storage_states is not None:
+            await asyncio.to_thread(self._storage_states.discard, court)
+
+    async def _record_outcome(
+        self, court: "Court", court_context: _CourtContext, *, succeeded: bool
+    ) -> None:
+        """Keep the court's storage state up to date with the outcome of a context's work.
+
+        The context must still be held by a lease."""
+        if succeeded:
+            court_context.successes += 1
+            if (
+                self._storage_states is not None
+                and time.monotonic() - court_context.state_saved_at
+                >= self._storage_states.refresh_interval
+            ):
+                await self._save_storage_state(court, court_context)
+        elif court_context.restored_state and court_context.successes == 0:
+            _LOGGER.warning(
+                "Discarding storage state after its first use failed",
+                extra={"court": court},
+            )
+            await self._discard_storage_state(court)
+            court_context.retired = True
+
+    async def _retire(self, court: "Court", court_context: _CourtContext) -> None:
+        """Stop leasing a context, closing it once it's no longer in use."""
+        court_context.retired = True
+        if self._contexts.get(court) is court_context:
+            del self._contexts[court]
+
+        if court_context.active_leases == 0:
+            _LOGGER.info(
+                "Recycling browser context",
+                extra={"court": court, "uses": court_context.uses},
+            )
+            if court_context.successes:
+                await self._save_storage_state(court, court_context)
+            await court_context.context.close()
+
+    async def _reclaim_memory(self) -> None:
+        """Recycle every context, so the memory held by them is released."""
+        for court, court_context in list(self._contexts.items()):
+            await self._retire(court, court_context)
+
+        self._memory_governor.log_report()
+
+    def _has_pool_room(self, court: "Court", court_context: _CourtContext) -> bool:
+        """Whether another page may join the idle pages of a court's context."""
+        return (
+            court in self._page_preparers
+            and not court_context.retired
+            and len(court_context.idle_pages) + court_context.preparing_pages
+            < self._page_pool_size
+        )
+
+    async def _prepare_page(
+        self, court: "Court", court_context: _CourtContext, page: "Page | None"
+    ) -> None:
+        """Take a page to the court's search form and add it to the idle pages, opening a new one
+        if none is given.
+
+        The page must be held by a lease, which is released once it's done."""
+        try:
+            if page is None:
+                page = await court_context.context.new_page()
+
+            async with asyncio.timeout(_PAGE_PREPARATION_TIMEOUT):
+                await self._page_preparers[court](page)
+        except Exception:
+            _LOGGER.warning(
+                "Failed to prepare page", extra={"court": court}, exc_info=True
+            )
+            if page is not None:
+                with contextlib.suppress(Exception):
+                    await page.close()
+            await self._record_outcome(court, court_context, succeeded=False)
+        else:
+            await self._record_outcome(court, court_context, succeeded=True)
+            if court_context.retired:
+                await page.close()
+            else:
+                court_context.idle_pages.append(page)
+        finally:
+            court_context.preparing_pages -= 1
+            court_context.active_leases -= 1
+            if court_context.retired:
+                await self._retire(court, court_context)
+
+    def _prepare_page_in_background(
+        self, court: "Court", court_context: _CourtContext, page: "Page | None"
+    ) -> None:
+        """Prepare a page without waiting for it, holding a lease of its context meanwhile."""
+        court_context.active_leases += 1
+        court_context.preparing_pages += 1
+
+        task = asyncio.create_task(self._prepare_page(court, court_context, page))
+        self._preparation_tasks.add(task)
+        task.add_done_callback(self._preparation_tasks.discard)
+
+    async def fill_page_pool(self, court: "Court") -> None:
+        """Start preparing pages of the court until its pool is full, ahead of its first lease.
+
+        :param court: The court whose pages are prepared."""
+        court_context = await self._get_context(court)
+        while self._has_pool_room(court, court_context):
+            self._prepare_page_in_background(court, court_context, None)
+
+    @staticmethod
+    def _take_idle_page(court_context: _CourtContext) -> "Page | None":
+        """Take one of the idle pages of a context, if any is still open."""
+        while court_context.idle_pages:
+            page = court_context.idle_pages.pop()
+            if not page.is_closed():
+                return page
+
+        return None
+
+    async def _release(
+        self,
+        court: "Court",
+        court_context: _CourtContext,
+        page: "Page | None",
+        *,
+        before: "MemorySnapshot | None",
+        succeeded: bool | None,
+    ) -> None:
+        """Release a lease of a court's context, pooling or closing its page."""
+        if succeeded is not None:
+            await self._record_outcome(court, court_context, succeeded=succeeded)
+
+        court_context.active_leases -= 1
+        court_context.uses += 1
+
+        after = await asyncio.to_thread(self._memory_governor.snapshot)
+        self._memory_governor.record_lease(court, before, after)
+
+        if (
+            court_context.uses >= self._context_max_uses
+            or self._memory_governor.is_over_recycle_threshold(after)
+        ):
+            court_context.retired = True
+
+        # Pages left halfway through a failed research are in an unknown state. Those of
+        # cancelled researches are taken back to the search form like the others, which resets
+        # them.
+        if (
+            page is not None
+            and succeeded is not False
+            and self._has_pool_room(court, court_context)
+        ):
+            self._prepare_page_in_background(court, court_context, page)
+        elif page is not None:
+            with contextlib.suppress(Exception):
+                await page.close()
+
+        if court_context.retired:
+            await self._retire(court, court_context)
+
+    @asynccontextmanager
+    async def lease(self, court: "Court") -> "AsyncGenerator[Page, None]":
+        """Lease a page of the court's context.
+
+        The page may already be on the court's search form, if it was taken from the pool.
+
+        :param court: The court to be researched in the page.
+        :raises MemoryBudgetExceededError: If memory is too short to take more work."""
+        before = await asyncio.to_thread(self._memory_governor.snapshot)
+        if self._memory_governor.is_over_recycle_threshold(before):
+            await self._reclaim_memory()
+            before = await asyncio.to_thread(self._memory_governor.snapshot)
+
+        self._memory_governor.check_lease(before)
+
+        court_context = await self._get_context(court)
+        court_context.active_leases += 1
+        page: Page | None = None
+        # Left unset if the research is cancelled, which says nothing about the context.
+        succeeded: bool | None = None
+        try:
+            page = self._take_idle_page(court_context)
+            if page is None:
+                with span("new_page"):
+                    page = await court_context.context.new_page()
+
+            yield page
+            succeeded = True
+        except Exception:
+            succeeded = False
+            raise
+        finally:
+            # Released in a task of its own, which the cancellation of the research can't
+            # interrupt halfway, so the page is never leaked. Its context is a fresh one, as the
+            # tool call's deadline and profile don't apply to getting the page ready again.
+            release = asyncio.create_task(
+                self._release(
+                    court, court_context, page, before=before, succeeded=succeeded
+                ),
+                context=contextvars.Context(),
+            )
+            self._release_tasks.add(release)
+            release.add_done_callback(self._release_tasks.discard)
+            await asyncio.shield(release)
+
+    async def close(self) -> None:
+        """Close the browser and its driver."""
+        self._memory_governor.log_report()
+
+        # Releases may still be pooling pages, so they're done before the pool is torn down.
+        await asyncio.gather(*self._release_tasks, return_exceptions=True)
+        for task in list(self._preparation_tasks):
+            task.cancel()
+        await asyncio.gather(*self._preparation_tasks, return_exceptions=True)
+
+        async with self._lock:
+            for court, court_context in self._contexts.items():
+                if court_context.successes:
+                    await self._save_storage_state(court, court_context)
+            self._contexts.clear()
+
+            if self._browser is not None:
+                await self._browser.close()
+                self._browser = None
+
+            if self._playwright is not None:
+                await self._playwright.stop()
+                self._playwright = None
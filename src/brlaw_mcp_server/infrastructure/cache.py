@@ -0,0 +1,119 @@
+"""In-memory cache of research results."""
+
+import asyncio
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable, Hashable
+
+
+@dataclass(frozen=True)
+class CacheEntry[T]:
+    """A cached value."""
+
+    value: T
+    stored_at: float
+    """Moment the value was stored, according to the cache's monotonic clock."""
+    fetched_at: datetime
+    """Wall-clock moment the value was stored, meant to be shown to users."""
+    is_fresh: bool
+    """Whether the value is recent enough to be served without contacting its source."""
+
+
+class ResultCache[T]:
+    """LRU cache whose entries become stale after a while, but are kept for longer.
+
+    Stale entries aren't meant to be served in normal operation. They are a fallback for when the
+    source of the value is unavailable."""
+
+    def __init__(
+        self,
+        *,
+        ttl: float,
+        stale_ttl: float,
+        max_entries: int,
+        clock: "Callable[[], float]" = time.monotonic,
+    ) -> None:
+        """:param ttl: Seconds an entry is considered fresh.
+        :param stale_ttl: Seconds an entry is kept at all.
+        :param max_entries: Maximum number of entries. The least recently used ones are evicted.
+        :param clock: Monotonic clock used to measure time."""
+        self._ttl: float = ttl
+        self._stale_ttl: float = max(ttl, stale_ttl)
+        self._max_entries: int = max_entries
+        self._clock: Callable[[], float] = clock
+        self._entries: OrderedDict[Hashable, tuple[T, float, datetime]] = OrderedDict()
+
+    def get(self, key: "Hashable") -> CacheEntry[T] | None:
+        """Get an entry, fresh or stale.
+
+        :param key: The key of the entry.
+        :return: The entry, or ``None`` if there's none or it expired completely."""
+        if (item := self._entries.get(key)) is None:
+            return None
+
+        value, stored_at, fetched_at = item
+        age = self._clock() - stored_at
+        if age > self._stale_ttl:
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+
+        return CacheEntry(
+            value=value,
+            stored_at=stored_at,
+            fetched_at=fetched_at,
+            is_fresh=age <= self._ttl,
+        )
+
+    def put(self, key: "Hashable", value: T) -> None:
+        """Store a value, replacing any previous entry with the same key.
+
+        :param key: The key of the entry.
+        :param value: The value to store."""
+        self._entries[key] = (value, self._clock(), datetime.now(UTC))
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+
+class SingleFlight[K: "Hashable", T]:
+    """De-duplicates concurrent calls sharing a key: while a call is in flight, callers with the
+    same key wait for its result instead of making their own."""
+
+    def __init__(self) -> None:
+        self._calls: dict[K, asyncio.Future[T]] = {}
+        self._waiters: dict[K, int] = {}
+
+    async def run(self, key: K, func: "Callable[[], Awaitable[T]]") -> T:
+        """Call a function, unless a call with the same key is already in flight.
+
+        The call is cancelled if every caller waiting for it is.
+
+        :param key: The key identifying the call.
+        :param func: The function to call.
+        :return: The result of the call in flight."""
+        call = self._calls.get(key)
+        if call is None:
+            call = asyncio.ensure_future(func())
+            self._calls[key] = call
+            call.add_done_callback(lambda _: self._calls.pop(key, None))
+
+        self._waiters[key] = self._waiters.get(key, 0) + 1
+        try:
+            # Shielded, so a caller giving up doesn't cancel the call for the others.
+            return await asyncio.shield(call)
+        except asyncio.CancelledError:
+            if self._waiters[key] == 1:
+                call.cancel()
+            raise
+        finally:
+            self._waiters[key] -= 1
+            if not self._waiters[key]:
+                del self._waiters[key]
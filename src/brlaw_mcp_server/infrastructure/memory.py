@@ -0,0 +1,203 @@
+"""Governance of the memory used by the server and its browser.
+
+Chromium processes grow without bound when kept alive for long, the courts' single page
+applications being particularly heavy. The governor measures the resident set size (RSS) of the
+server and of every process it spawned, telling the browser manager when to recycle contexts and
+when to refuse new work altogether."""
+
+import logging
+import os
+import sys
+from collections import defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Final
+
+from brlaw_mcp_server.infrastructure.resilience import ServerOverloadedError
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from brlaw_mcp_server.domain.base import Court
+
+_LOGGER = logging.getLogger(__name__)
+
+_PROC: Final = Path("/proc")
+
+_MEBIBYTE: Final = 1024 * 1024
+
+_RECYCLE_RATIO: Final = 0.8
+"""Fraction of the budget above which browser contexts are recycled as soon as possible."""
+
+_REFUSE_RATIO: Final = 0.95
+"""Fraction of the budget above which new browser leases are refused."""
+
+
+class MemoryBudgetExceededError(ServerOverloadedError):
+    """Raised when the server is too close to its memory budget to take more work."""
+
+
+@dataclass(frozen=True)
+class MemorySnapshot:
+    """Resident set size of the server and of its descendant processes, in bytes."""
+
+    server_rss: int
+    browser_rss: int
+    """RSS of every process spawned by the server, which are the browser and its driver."""
+
+    @property
+    def total_rss(self) -> int:
+        """RSS of the server and of its descendant processes, in bytes."""
+        return self.server_rss + self.browser_rss
+
+
+def _read_rss(pid: int) -> int:
+    """Read the RSS of a process from procfs, in bytes. Returns 0 if the process is gone."""
+    try:
+        for line in (_PROC / str(pid) / "status").read_text().splitlines():
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
+
+    return 0
+
+
+def _descendants(pid: int) -> set[int]:
+    """Find every descendant of a process by walking procfs."""
+    children: defaultdict[int, list[int]] = defaultdict(list)
+    for entry in _PROC.iterdir():
+        if not entry.name.isdigit():
+            continue
+
+        try:
+            # The command name is parenthesized and may contain spaces, so the parent PID is
+            # looked up after its closing parenthesis.
+            stat = (entry / "stat").read_text()
+            parent_pid = int(stat[stat.rindex(")") + 2 :].split()[1])
+        except (OSError, ValueError):
+            continue
+
+        children[parent_pid].append(int(entry.name))
+
+    descendants: set[int] = set()
+    pending = [pid]
+    while pending:
+        for child in children[pending.pop()]:
+            if child not in descendants:
+                descendants.add(child)
+                pending.append(child)
+
+    return descendants
+
+
+def take_snapshot(pid: int | None = None) -> MemorySnapshot | None:
+    """Measure the RSS of a process and of its descendants.
+
+    :param pid: The process to measure. Defaults to the current one.
+    :return: The measurements, or ``None`` if the platform doesn't expose them."""
+    if not sys.platform.startswith("linux"):
+        return None
+
+    pid = pid or os.getpid()
+
+    return MemorySnapshot(
+        server_rss=_read_rss(pid),
+        browser_rss=sum(_read_rss(descendant) for descendant in _descendants(pid)),
+    )
+
+
+@dataclass
+class _CourtMemoryStats:
+    leases: int = 0
+    peak_total_rss: int = 0
+    total_rss_growth: int = 0
+    """Sum of the RSS growth observed across leases, in bytes. May be negative."""
+
+
+class MemoryGovernor:
+    """Decides, from the server's memory usage, when to recycle and when to refuse work."""
+
+    def __init__(
+        self,
+        *,
+        budget_mb: int | None,
+        snapshot_taker: "Callable[[], MemorySnapshot | None]" = take_snapshot,
+    ) -> None:
+        """:param budget_mb: Memory budget of the server and its browser, in mebibytes. If
+            ``None``, memory is only measured.
+        :param snapshot_taker: Function that measures the memory usage."""
+        self._budget: int | None = budget_mb * _MEBIBYTE if budget_mb else None
+        self._snapshot_taker: Callable[[], MemorySnapshot | None] = snapshot_taker
+        self._stats: defaultdict[Court, _CourtMemoryStats] = defaultdict(
+            _CourtMemoryStats
+        )
+
+    def snapshot(self) -> MemorySnapshot | None:
+        """Measure the current memory usage."""
+        return self._snapshot_taker()
+
+    def is_over_recycle_threshold(self, snapshot: MemorySnapshot | None) -> bool:
+        """Whether the memory usage is high enough for browser contexts to be recycled."""
+        return (
+            self._budget is not None
+            and snapshot is not None
+            and snapshot.total_rss >= self._budget * _RECYCLE_RATIO
+        )
+
+    def check_lease(self, snapshot: MemorySnapshot | None) -> None:
+        """Check whether a new browser lease may be granted.
+
+        :raises MemoryBudgetExceededError: If the memory usage is too close to the budget."""
+        if (
+            self._budget is not None
+            and snapshot is not None
+            and snapshot.total_rss >= self._budget * _REFUSE_RATIO
+        ):
+            usage_mb = snapshot.total_rss // _MEBIBYTE
+            budget_mb = self._budget // _MEBIBYTE
+            raise MemoryBudgetExceededError(
+                f"Memory usage of {usage_mb} MiB is too close to the budget of {budget_mb} MiB"
+            )
+
+    def record_lease(
+        self,
+        court: "Court",
+        before: MemorySnapshot | None,
+        after: MemorySnapshot | None,
+    ) -> None:
+        """Attribute the memory usage observed around a browser lease to its court's workload."""
+        if before is None or after is None:
+            return
+
+        stats = self._stats[court]
+        stats.leases += 1
+        stats.peak_total_rss = max(stats.peak_total_rss, after.total_rss)
+        stats.total_rss_growth += after.total_rss - before.total_rss
+
+        _LOGGER.debug(
+            "Memory usage after browser lease",
+            extra={
+                "court": court,
+                "server_rss_mb": after.server_rss // _MEBIBYTE,
+                "browser_rss_mb": after.browser_rss // _MEBIBYTE,
+            },
+        )
+
+    def report(self) -> dict[str, dict[str, float]]:
+        """Memory usage attributed to each court's workload, in mebibytes."""
+        return {
+            court: {
+                "leases": stats.leases,
+                "peak_total_rss_mb": round(stats.peak_total_rss / _MEBIBYTE, 1),
+                "mean_rss_growth_mb": round(
+                    stats.total_rss_growth / stats.leases / _MEBIBYTE, 1
+                ),
+            }
+            for court, stats in self._stats.items()
+            if stats.leases
+        }
+
+    def log_report(self) -> None:
+        """Log the memory usage attributed to each court's workload."""
+        _LOGGER.info("Memory usage per court", extra={"memory": self.report()})
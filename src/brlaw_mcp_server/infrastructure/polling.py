@@ -0,0 +1,133 @@
+"""Background polling of the saved queries for new legal precedents.
+
+Re-running every page of a standing query to find out what's new is wasteful: courts list their
+most recent precedents first, so only the first pages are fetched, and paging stops as soon as a
+precedent already found by the query shows up."""
+
+import asyncio
+import contextlib
+import logging
+from datetime import UTC, datetime, timedelta
+from typing import TYPE_CHECKING, Final
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable, Sequence
+
+    from brlaw_mcp_server.domain.base import BaseLegalPrecedent
+    from brlaw_mcp_server.infrastructure.store import PrecedentStore, SavedQuery
+
+_LOGGER = logging.getLogger(__name__)
+
+_MAX_CHECK_PERIOD: Final = 60.0
+"""Maximum seconds between two checks for saved queries due to be polled."""
+
+
+class SavedQueryPoller:
+    """Periodically looks for new legal precedents matching the saved queries."""
+
+    def __init__(
+        self,
+        *,
+        store: "PrecedentStore",
+        research: "Callable[[SavedQuery, int], Awaitable[Sequence[BaseLegalPrecedent]]]",
+        interval: float,
+        max_pages: int,
+    ) -> None:
+        """:param store: The store holding the saved queries and their results.
+        :param research: Function researching a page of a saved query's results.
+        :param interval: Seconds between two polls of the same saved query.
+        :param max_pages: Maximum number of result pages fetched per poll."""
+        self._store: PrecedentStore = store
+        self._research: Callable[
+            [SavedQuery, int], Awaitable[Sequence[BaseLegalPrecedent]]
+        ] = research
+        self._interval: timedelta = timedelta(seconds=interval)
+        self._max_pages: int = max_pages
+        self._wake_up: asyncio.Event = asyncio.Event()
+        self._task: asyncio.Task[None] | None = None
+
+    async def poll(self, query: "SavedQuery") -> int:
+        """Look for new legal precedents matching a saved query.
+
+        The first poll of a query only records its current results, which aren't new to whoever
+        saved it.
+
+        :param query: The saved query.
+        :return: How many new legal precedents were found."""
+        is_baseline = query.last_polled_at is None
+        new_precedents = 0
+
+        for page in range(1, self._max_pages + 1):
+            precedents = await self._research(query, page)
+            if not precedents:
+                break
+
+            known_precedents = self._store.record_hits(
+                query.name, precedents, delivered=is_baseline
+            )
+            new_precedents += len(precedents) - known_precedents
+            if known_precedents:
+                break
+
+        self._store.mark_polled(query.name)
+
+        _LOGGER.info(
+            "Polled saved query",
+            extra={
+                "query_name": query.name,
+                "new_precedents": 0 if is_baseline else new_precedents,
+                "is_baseline": is_baseline,
+            },
+        )
+
+        return 0 if is_baseline else new_precedents
+
+    async def poll_due(self) -> None:
+        """Poll every saved query that wasn't polled for a whole interval."""
+        now = datetime.now(UTC)
+        for query in self._store.list_queries():
+            if (
+                query.last_polled_at is not None
+                and now - query.last_polled_at < self._interval
+            ):
+                continue
+
+            try:
+                await self.poll(query)
+            except Exception:
+                _LOGGER.warning(
+                    "Failed to poll saved query",
+                    extra={"query_name": query.name},
+                    exc_info=True,
+                )
+
+    def wake_up(self) -> None:
+        """Check for saved queries due to be polled right away, such as a newly saved one."""
+        self._wake_up.set()
+
+    async def _run(self) -> None:
+        """Poll the saved queries as they become due, until cancelled."""
+        check_period = min(self._interval.total_seconds(), _MAX_CHECK_PERIOD)
+        while True:
+            self._wake_up.clear()
+            try:
+                await self.poll_due()
+            except Exception:
+                _LOGGER.warning("Failed to poll saved queries", exc_info=True)
+
+            with contextlib.suppress(TimeoutError):
+                async with asyncio.timeout(check_period):
+                    await self._wake_up.wait()
+
+    def start(self) -> None:
+        """Start polling in the background, unless it's already being done."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop polling in the background."""
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
@@ -0,0 +1,293 @@
+"""Protection against slow or unavailable courts.
+
+Courts' websites are known for going down without notice. Waiting for a browser timeout on every
+tool call while a court is down only ties up resources, so each court gets its own health tracker
+with a circuit breaker that fails fast until the court is probed healthy again."""
+
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass, field
+from enum import StrEnum
+from typing import TYPE_CHECKING
+
+from brlaw_mcp_server.deadlines import DeadlineExceededError, Stage, deadline_passed
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable
+
+    from brlaw_mcp_server.domain.base import Court
+
+_LOGGER = logging.getLogger(__name__)
+
+_LATENCY_SMOOTHING_FACTOR = 0.2
+
+
+class CourtUnavailableError(RuntimeError):
+    """Raised when a court is known to be unhealthy and won't be contacted."""
+
+    def __init__(self, court: "Court") -> None:
+        super().__init__(f"The {court} service is currently unavailable")
+        self.court: Court = court
+
+
+class ServerOverloadedError(RuntimeError):
+    """Raised when the server itself, rather than a court, can't take more work.
+
+    These errors say nothing about the court's health, so they don't count as its failures."""
+
+
+class CircuitState(StrEnum):
+    """States of a circuit breaker."""
+
+    CLOSED = "closed"
+    """Requests flow normally."""
+
+    OPEN = "open"
+    """Requests are refused without contacting the service."""
+
+    HALF_OPEN = "half_open"
+    """A single probe request is allowed to check whether the service recovered."""
+
+
+class CircuitBreaker:
+    """Circuit breaker that opens after consecutive failures.
+
+    Once open, it refuses every request until ``reset_timeout`` seconds have passed. Then a single
+    probe request is let through: if it succeeds the breaker closes, otherwise it opens again."""
+
+    def __init__(
+        self,
+        *,
+        failure_threshold: int,
+        reset_timeout: float,
+        clock: "Callable[[], float]" = time.monotonic,
+    ) -> None:
+        """:param failure_threshold: Consecutive failures needed to open the breaker.
+        :param reset_timeout: Seconds to wait before probing the service again.
+        :param clock: Monotonic clock used to measure time."""
+        self._failure_threshold: int = failure_threshold
+        self._reset_timeout: float = reset_timeout
+        self._clock: Callable[[], float] = clock
+
+        self._state: CircuitState = CircuitState.CLOSED
+        self._consecutive_failures: int = 0
+        self._opened_at: float = 0.0
+        self._probe_in_flight: bool = False
+
+    @property
+    def state(self) -> CircuitState:
+        """The current state of the breaker."""
+        if (
+            self._state is CircuitState.OPEN
+            and self._clock() - self._opened_at >= self._reset_timeout
+        ):
+            self._state = CircuitState.HALF_OPEN
+            self._probe_in_flight = False
+
+        return self._state
+
+    def allow_request(self) -> bool:
+        """Whether a request may be sent to the service right now.
+
+        In the half-open state, only the first caller is allowed through."""
+        match self.state:
+            case CircuitState.CLOSED:
+                return True
+            case CircuitState.OPEN:
+                return False
+            case CircuitState.HALF_OPEN:
+                if self._probe_in_flight:
+                    return False
+
+                self._probe_in_flight = True
+                return True
+
+    def release_probe(self) -> None:
+        """Allow another probe request, as the last one didn't reach the service."""
+        self._probe_in_flight = False
+
+    def record_success(self) -> None:
+        """Record a successful request."""
+        self._state = CircuitState.CLOSED
+        self._consecutive_failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        """Record a failed request."""
+        self._consecutive_failures += 1
+        self._probe_in_flight = False
+
+        if (
+            self._state is CircuitState.HALF_OPEN
+            or self._consecutive_failures >= self._failure_threshold
+        ):
+            self._state = CircuitState.OPEN
+            self._opened_at = self._clock()
+
+
+def _is_court_failure(error: Exception) -> bool:
+    """Whether an error calling a court says anything about the court's health."""
+    match error:
+        case ServerOverloadedError():
+            return False
+        case DeadlineExceededError():
+            # Leasing a page is the server's own doing, and a tool call out of time cuts short
+            # whatever it was waiting for. Otherwise, the court took too long.
+            return error.stage is not Stage.LEASE and not deadline_passed()
+        case _:
+            return True
+
+
+@dataclass
+class CourtHealth:
+    """Health of a single court."""
+
+    court: "Court"
+    breaker: CircuitBreaker
+    successes: int = 0
+    failures: int = 0
+    latency_ewma: float | None = None
+    """Exponentially weighted moving average of successful requests' latency, in seconds."""
+    last_error: str | None = None
+
+    async def call[T](self, func: "Callable[[], Awaitable[T]]") -> T:
+        """Call the court through the circuit breaker.
+
+        :param func: The function that contacts the court.
+        :raises CourtUnavailableError: If the breaker doesn't allow contacting the court."""
+        if not self.breaker.allow_request():
+            raise CourtUnavailableError(self.court)
+
+        start = time.monotonic()
+        try:
+            result = await func()
+        except Exception as e:
+            if not _is_court_failure(e):
+                self.breaker.release_probe()
+                raise
+
+            self.failures += 1
+            self.last_error = repr(e)
+            self.breaker.record_failure()
+
+            if self.breaker.state is CircuitState.OPEN:
+                _LOGGER.warning(
+                    "Court marked as unavailable",
+                    extra={"court": self.court, "last_error": self.last_error},
+                )
+
+            raise
+        except BaseException:
+            # Cancelled, by a deadline or the client, before the court answered.
+            self.breaker.release_probe()
+            raise
+
+        latency = time.monotonic() - start
+        self.successes += 1
+        self.latency_ewma = (
+            latency
+            if self.latency_ewma is None
+            else _LATENCY_SMOOTHING_FACTOR * latency
+            + (1 - _LATENCY_SMOOTHING_FACTOR) * self.latency_ewma
+        )
+        self.breaker.record_success()
+
+        return result
+
+
+@dataclass
+class CourtHealthTracker:
+    """Tracks the health of every court."""
+
+    failure_threshold: int
+    reset_timeout: float
+    _healths: "dict[Court, CourtHealth]" = field(default_factory=dict)
+
+    def __getitem__(self, court: "Court") -> CourtHealth:
+        if court not in self._healths:
+            self._healths[court] = CourtHealth(
+                court=court,
+                breaker=CircuitBreaker(
+                    failure_threshold=self.failure_threshold,
+                    reset_timeout=self.reset_timeout,
+                ),
+            )
+
+        return self._healths[court]
+
+
+async def retry_with_jitter[T](
+    func: "Callable[[], Awaitable[T]]",
+    *,
+    attempts: int,
+    base_delay: float,
+    max_delay: float,
+    give_up_on: tuple[type[Exception], ...] = (
+        CourtUnavailableError,
+        ServerOverloadedError,
+        DeadlineExceededError,
+    ),
+) -> T:
+    """Call a function, retrying on failure with exponential backoff and full jitter.
+
+    :param func: The function to call.
+    :param attempts: Maximum number of calls.
+    :param base_delay: Base of the exponential backoff, in seconds.
+    :param max_delay: Upper bound of the backoff, in seconds.
+    :param give_up_on: Exceptions that aren't worth retrying.
+    :return: The result of the first successful call."""
+    for attempt in range(attempts):
+        try:
+            return await func()
+        except give_up_on:
+            raise
+        except Exception:
+            if attempt == attempts - 1:
+                raise
+
+            delay = random.uniform(0, min(max_delay, base_delay * 2.0**attempt))  # noqa: S311  # not cryptographic.
+            _LOGGER.info(
+                "Attempt failed, retrying",
+                extra={"attempt": attempt + 1, "delay": delay},
+                exc_info=True,
+            )
+            await asyncio.sleep(delay)
+
+    raise AssertionError("unreachable")
+
+
+async def hedged[T](func: "Callable[[], Awaitable[T]]", *, delay: float | None) -> T:
+    """Call a function, firing a duplicate call if the first one is slower than ``delay``.
+
+    The first call to succeed wins and the other one is cancelled. The call only fails if both do.
+
+    :param func: The function to call. It must be safe to call it concurrently.
+    :param delay: Seconds to wait before hedging. If ``None``, the function is called only once.
+    :return: The result of the first successful call."""
+    if delay is None:
+        return await func()
+
+    tasks = {asyncio.ensure_future(func())}
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=delay)
+        if not done:
+            _LOGGER.info("Hedging slow request", extra={"hedge_delay": delay})
+            tasks.add(asyncio.ensure_future(func()))
+
+        pending = tasks
+        while True:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+
+            if not pending:
+                # Every call failed, so the error of any of them is representative.
+                return done.pop().result()
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,76 @@
+"""Persistent cache of the JSON schemas of pydantic models.
+
+Generating the schemas of the tools' input models is pure overhead once they've been generated
+for a given version of the source code, so they are stored on disk and reused between runs."""
+
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, cast
+
+from pydantic.version import VERSION as PYDANTIC_VERSION
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+    from pydantic import BaseModel
+
+_LOGGER = logging.getLogger(__name__)
+
+_PACKAGE_ROOT = Path(__file__).parent.parent
+
+
+def _source_fingerprint() -> str:
+    """Fingerprint of the package's source code and of the pydantic version generating schemas."""
+    digest = hashlib.sha256(PYDANTIC_VERSION.encode())
+    for path in sorted(_PACKAGE_ROOT.rglob("*.py")):
+        digest.update(path.relative_to(_PACKAGE_ROOT).as_posix().encode())
+        digest.update(path.read_bytes())
+
+    return digest.hexdigest()[:16]
+
+
+def load_json_schemas(
+    models: "Sequence[type[BaseModel]]",
+    cache_dir: Path,
+) -> dict[str, dict[str, Any]]:  # pyright: ignore[reportExplicitAny]
+    """Get the JSON schemas of the models, from the cache if possible.
+
+    :param models: The models whose schemas are wanted.
+    :param cache_dir: The directory where the schemas are cached.
+    :return: The schemas, keyed by the models' names."""
+    cache_path = cache_dir / f"schemas-{_source_fingerprint()}.json"
+
+    try:
+        schemas = cast(
+            "dict[str, dict[str, Any]]",  # pyright: ignore[reportExplicitAny]
+            json.loads(cache_path.read_text()),
+        )
+    except (OSError, ValueError):
+        schemas = {}
+
+    if all(model.__name__ in schemas for model in models):
+        return schemas
+
+    _LOGGER.info("Generating JSON schemas", extra={"cache_path": str(cache_path)})
+    schemas = {model.__name__: model.model_json_schema() for model in models}
+
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        temporary_path = cache_path.with_suffix(f".{os.getpid()}.tmp")
+        temporary_path.write_text(json.dumps(schemas))
+        temporary_path.replace(cache_path)
+
+        for outdated_path in cache_dir.glob("schemas-*.json"):
+            if outdated_path != cache_path:
+                outdated_path.unlink(missing_ok=True)
+    except OSError:
+        _LOGGER.warning(
+            "Failed to cache JSON schemas",
+            extra={"cache_path": str(cache_path)},
+            exc_info=True,
+        )
+
+    return schemas
@@ -0,0 +1,237 @@
+"""Local similarity search over the legal precedents kept in the store.
+
+Summaries are represented by their TF-IDF vectors, held as a sparse matrix in coordinate form: one
+entry per distinct word of each summary. New precedents are appended to the matrix as they're
+stored, while the inverse document frequencies are applied lazily, since they change with every
+new summary. Scoring a query is a handful of vectorized operations over the matrix's entries."""
+
+import itertools
+import logging
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Final, cast
+
+import numpy as np
+
+from brlaw_mcp_server.domain.base import Court
+from brlaw_mcp_server.utils import split_words
+
+if TYPE_CHECKING:
+    from collections.abc import Collection
+
+    from brlaw_mcp_server.infrastructure.store import PrecedentStore
+
+_LOGGER = logging.getLogger(__name__)
+
+_COURTS: Final = list(Court)
+"""Courts in the order of their codes in the matrix."""
+
+_SYNC_BATCH_SIZE: Final = 5_000
+"""Number of legal precedents read from the store at once when updating the matrix."""
+
+_NORMS_REFRESH_GROWTH: Final = 1.1
+"""Factor by which the number of documents must grow for the norms of every row to be recomputed
+with the current inverse document frequencies."""
+
+
+@dataclass(frozen=True)
+class SimilarPrecedent:
+    """A legal precedent similar to a query."""
+
+    content_hash: str
+    court: Court
+    similarity: float
+    """Cosine similarity between the legal precedent's summary and the query, from 0 to 1."""
+
+
+class SimilarityIndex:
+    """TF-IDF index of the summaries of the legal precedents kept in a store."""
+
+    def __init__(self, store: "PrecedentStore") -> None:
+        """:param store: The store whose legal precedents are indexed."""
+        self._store: PrecedentStore = store
+        self._lock: threading.Lock = threading.Lock()
+        self._last_rowid: int = 0
+
+        self._vocabulary: dict[str, int] = {}
+        self._content_hashes: list[str] = []
+        self._positions: dict[str, int] = {}
+
+        # Entries of the matrix, by row (the document) and column (the word), holding the
+        # logarithmically scaled frequency of the word in the document.
+        self._rows: np.ndarray = np.empty(0, dtype=np.int32)
+        self._columns: np.ndarray = np.empty(0, dtype=np.int32)
+        self._frequencies: np.ndarray = np.empty(0, dtype=np.float32)
+
+        self._courts: np.ndarray = np.empty(0, dtype=np.int8)
+        self._document_frequencies: np.ndarray = np.empty(0, dtype=np.int64)
+        self._norms: np.ndarray = np.empty(0, dtype=np.float32)
+        self._norms_basis: int = 0
+        """Number of documents when the norms of every row were last computed."""
+
+    def _get_inverse_document_frequencies(self) -> np.ndarray:
+        """Compute the smoothed inverse document frequency of every word."""
+        return (
+            np.log(
+                (1 + len(self._content_hashes)) / (1 + self._document_frequencies)
+            ).astype(np.float32)
+            + 1
+        )
+
+    def _compute_norms(self, first_row: int, first_entry: int) -> np.ndarray:
+        """Compute the norms of the TF-IDF vectors of the rows from the given one onwards."""
+        weights = (
+            self._frequencies[first_entry:]
+            * self._get_inverse_document_frequencies()[self._columns[first_entry:]]
+        )
+        return np.sqrt(
+            np.bincount(
+                self._rows[first_entry:] - first_row,
+                weights=np.square(weights),
+                minlength=len(self._content_hashes) - first_row,
+            )
+        ).astype(np.float32)
+
+    def _sync(self) -> None:
+        """Add the legal precedents stored since the last update to the matrix."""
+        first_row, first_entry = len(self._content_hashes), len(self._rows)
+        vocabulary = self._vocabulary
+        rows: list[int] = []
+        columns: list[int] = []
+        counts: list[int] = []
+        courts: list[int] = []
+
+        while precedents := self._store.list_precedents_after(
+            self._last_rowid, _SYNC_BATCH_SIZE
+        ):
+            for rowid, precedent in precedents:
+                row = len(self._content_hashes)
+                self._content_hashes.append(precedent.content_hash)
+                self._positions[precedent.content_hash] = row
+
+                word_counts = Counter(split_words(precedent.summary))
+                rows.extend(itertools.repeat(row, len(word_counts)))
+                columns.extend(
+                    [
+                        vocabulary.setdefault(word, len(vocabulary))
+                        for word in word_counts
+                    ]
+                )
+                counts.extend(word_counts.values())
+                courts.append(_COURTS.index(precedent.court))
+
+                self._last_rowid = rowid
+
+        if not courts:
+            return
+
+        new_columns = np.asarray(columns, dtype=np.int32)
+        self._document_frequencies = np.bincount(
+            new_columns, minlength=len(vocabulary)
+        ) + np.pad(
+            self._document_frequencies,
+            (0, len(vocabulary) - len(self._document_frequencies)),
+        )
+        self._rows = np.concatenate([self._rows, np.asarray(rows, dtype=np.int32)])
+        self._columns = np.concatenate([self._columns, new_columns])
+        self._frequencies = np.concatenate(
+            [self._frequencies, 1 + np.log(np.asarray(counts, dtype=np.float32))]
+        )
+        self._courts = np.concatenate([self._courts, np.asarray(courts, dtype=np.int8)])
+
+        # Inverse document frequencies barely change as documents are added, so the norms of the
+        # rows already in the matrix are only recomputed once it has grown enough.
+        if len(self._content_hashes) >= self._norms_basis * _NORMS_REFRESH_GROWTH:
+            self._norms = self._compute_norms(0, 0)
+            self._norms_basis = len(self._content_hashes)
+        else:
+            self._norms = np.concatenate(
+                [self._norms, self._compute_norms(first_row, first_entry)]
+            )
+
+        _LOGGER.info(
+            "Updated similarity index",
+            extra={
+                "documents": len(self._content_hashes),
+                "words": len(vocabulary),
+            },
+        )
+
+    def update(self) -> None:
+        """Add the legal precedents stored since the last update to the index, ahead of the next
+        search."""
+        with self._lock:
+            self._sync()
+
+    def search(
+        self,
+        text: str,
+        *,
+        courts: "Collection[Court]",
+        limit: int,
+        exclude: str | None = None,
+    ) -> list[SimilarPrecedent]:
+        """Find the stored legal precedents whose summaries are the most similar to a text.
+
+        :param text: The text, usually the summary of another legal precedent.
+        :param courts: The courts whose legal precedents may be returned.
+        :param limit: Maximum number of legal precedents to be returned.
+        :param exclude: Content hash of a legal precedent not to be returned, such as the one
+            whose summary is the text.
+        :return: The legal precedents, the most similar first. Those sharing no word with the
+            text aren't returned."""
+        with self._lock:
+            self._sync()
+            if not self._content_hashes:
+                return []
+
+            inverse_document_frequencies = self._get_inverse_document_frequencies()
+
+            query_counts = {
+                column: count
+                for word, count in Counter(split_words(text)).items()
+                if (column := self._vocabulary.get(word)) is not None
+            }
+            query = np.zeros(len(self._vocabulary), dtype=np.float32)
+            query_columns = np.fromiter(query_counts.keys(), dtype=np.int32)
+            query[query_columns] = (
+                1 + np.log(np.fromiter(query_counts.values(), dtype=np.float32))
+            ) * inverse_document_frequencies[query_columns]
+
+            query_norm = float(np.linalg.norm(query))
+            if query_norm == 0:
+                return []
+
+            # The inverse document frequencies weigh both the query and the documents.
+            scores = np.bincount(
+                self._rows,
+                weights=self._frequencies
+                * (query * inverse_document_frequencies)[self._columns],
+                minlength=len(self._content_hashes),
+            ) / (np.maximum(self._norms, np.finfo(np.float32).tiny) * query_norm)
+
+            scores[
+                ~np.isin(self._courts, [_COURTS.index(court) for court in courts])
+            ] = 0
+            if exclude is not None and exclude in self._positions:
+                scores[self._positions[exclude]] = 0
+
+            limit = min(limit, len(scores))
+            top_rows = np.argpartition(-scores, limit - 1)[:limit]
+            top_rows = top_rows[np.argsort(-scores[top_rows], kind="stable")]
+
+            top_scores = cast("list[float]", scores[top_rows].tolist())
+            top_courts = cast("list[int]", self._courts[top_rows].tolist())
+
+            return [
+                SimilarPrecedent(
+                    content_hash=self._content_hashes[row],
+                    court=_COURTS[court],
+                    similarity=min(score, 1.0),
+                )
+                for row, court, score in zip(
+                    map(int, top_rows), top_courts, top_scores, strict=True
+                )
+                if score > 0
+            ]
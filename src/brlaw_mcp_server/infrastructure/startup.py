@@ -0,0 +1,52 @@
+"""Timing of the server's startup.
+
+This module must stay free of heavy imports: it's imported first thing by the package, so its
+clock starts as early as possible."""
+
+import logging
+import time
+from typing import TYPE_CHECKING, Final
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class StartupTimer:
+    """Records how long each startup milestone took to be reached."""
+
+    def __init__(self, clock: "Callable[[], float]" = time.perf_counter) -> None:
+        """:param clock: Clock used to measure time."""
+        self._clock: Callable[[], float] = clock
+        self._started_at: float = clock()
+        self._milestones: dict[str, float] = {}
+
+    def mark(self, milestone: str) -> None:
+        """Record that a milestone was reached. Only the first time it's reached is recorded.
+
+        :param milestone: The name of the milestone."""
+        if milestone not in self._milestones:
+            self._milestones[milestone] = self._clock() - self._started_at
+            _LOGGER.debug(
+                "Startup milestone reached",
+                extra={
+                    "milestone": milestone,
+                    "elapsed_ms": round(self._milestones[milestone] * 1000, 1),
+                },
+            )
+
+    def report(self) -> dict[str, float]:
+        """Milliseconds elapsed until each milestone, in the order they were reached."""
+        return {
+            milestone: round(elapsed * 1000, 1)
+            for milestone, elapsed in self._milestones.items()
+        }
+
+    def log_report(self) -> None:
+        """Log the milliseconds elapsed until each milestone."""
+        _LOGGER.info("Startup timing report", extra={"startup_ms": self.report()})
+
+
+STARTUP_TIMER: Final = StartupTimer()
+"""Timer of the current process' startup."""
@@ -0,0 +1,76 @@
+"""Persistence of the browser storage state of each court.
+
+A fresh browser context goes through each court's first-visit overhead: session cookies being
+issued, consent dialogs being shown. The cookies and local storage of the courts' contexts are
+kept in the cache directory, so new contexts, even of later server processes, start from them."""
+
+import json
+import logging
+import os
+import time
+from typing import TYPE_CHECKING, cast
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from patchright.async_api import StorageState
+
+    from brlaw_mcp_server.domain.base import Court
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class StorageStateStore:
+    """Directory of storage states, one per court, that expire after a while."""
+
+    def __init__(
+        self, directory: "Path", *, max_age: float, refresh_interval: float
+    ) -> None:
+        """:param directory: Directory of the storage states. It's created when first written to.
+        :param max_age: Seconds after being saved a storage state is no longer used, as the
+            sessions held by it have likely expired.
+        :param refresh_interval: Seconds between two saves of the storage state of a context."""
+        self._directory: Path = directory
+        self._max_age: float = max_age
+        self.refresh_interval: float = refresh_interval
+
+    def _path(self, court: "Court") -> "Path":
+        return self._directory / f"{court.lower()}.json"
+
+    def load(self, court: "Court") -> "StorageState | None":
+        """Load the storage state of a court.
+
+        :param court: The court.
+        :return: The storage state, or ``None`` if there's none or it's expired or unreadable."""
+        path = self._path(court)
+        try:
+            if time.time() - path.stat().st_mtime > self._max_age:
+                return None
+
+            return cast("StorageState", json.loads(path.read_text()))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError):
+            _LOGGER.warning(
+                "Failed to load storage state", extra={"court": court}, exc_info=True
+            )
+            return None
+
+    def save(self, court: "Court", state: "StorageState") -> None:
+        """Save the storage state of a court, replacing the previous one.
+
+        :param court: The court.
+        :param state: The storage state."""
+        path = self._path(court)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Written aside and then moved, so other processes never read a partial state.
+        temporary_path = path.with_suffix(f".{os.getpid()}.tmp")
+        temporary_path.write_text(json.dumps(state))
+        temporary_path.replace(path)
+
+    def discard(self, court: "Court") -> None:
+        """Discard the storage state of a court, such as when the court rejected it.
+
+        :param court: The court."""
+        self._path(court).unlink(missing_ok=True)
@@ -0,0 +1,409 @@
+"""Local store of the legal precedents seen by the server and of the saved queries.
+
+The store is a SQLite database kept in the cache directory, so it survives restarts and may be
+shared by every server process of the machine. Its operations are small and local, so they're
+run synchronously."""
+
+import logging
+import sqlite3
+import threading
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from typing import TYPE_CHECKING, Final, cast
+
+from brlaw_mcp_server.domain.base import Court, SearchFilters
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+    from pathlib import Path
+
+    from brlaw_mcp_server.domain.base import BaseLegalPrecedent
+
+_LOGGER = logging.getLogger(__name__)
+
+_SCHEMA: Final = """
+CREATE TABLE IF NOT EXISTS precedents (
+    content_hash TEXT PRIMARY KEY,
+    court TEXT NOT NULL,
+    summary TEXT NOT NULL,
+    full_text_url TEXT,
+    first_seen_at TEXT NOT NULL,
+    last_seen_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS full_texts (
+    url TEXT PRIMARY KEY,
+    text TEXT NOT NULL,
+    fetched_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS saved_queries (
+    name TEXT PRIMARY KEY,
+    court TEXT NOT NULL,
+    summary TEXT NOT NULL,
+    filters TEXT,
+    created_at TEXT NOT NULL,
+    last_polled_at TEXT
+);
+
+CREATE TABLE IF NOT EXISTS saved_query_hits (
+    query_name TEXT NOT NULL REFERENCES saved_queries (name) ON DELETE CASCADE,
+    content_hash TEXT NOT NULL REFERENCES precedents (content_hash),
+    first_seen_at TEXT NOT NULL,
+    delivered INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (query_name, content_hash)
+);
+"""
+
+_INDEXES: Final = """
+CREATE INDEX IF NOT EXISTS precedents_last_seen_at ON precedents (last_seen_at);
+"""
+"""Indexes of the schema, created once the tables are up to date."""
+
+
+@dataclass(frozen=True)
+class StoredPrecedent:
+    """A legal precedent kept in the store."""
+
+    content_hash: str
+    court: Court
+    summary: str
+    full_text_url: str | None
+    first_seen_at: datetime
+    last_seen_at: datetime
+
+
+@dataclass(frozen=True)
+class SavedQuery:
+    """A research whose new results are periodically looked for."""
+
+    name: str
+    court: Court
+    summary: str
+    filters: SearchFilters | None
+    created_at: datetime
+    last_polled_at: datetime | None
+    """Moment the query was last polled, or ``None`` if it has never been."""
+
+
+class PrecedentStore:
+    """SQLite-backed store of legal precedents and saved queries."""
+
+    def __init__(self, path: "Path") -> None:
+        """:param path: Path of the database file. It's created, along with its directory, when
+        first used."""
+        self._path: Path = path
+        self._lock: threading.Lock = threading.Lock()
+        self._connection: sqlite3.Connection | None = None
+
+    def _connect(self) -> sqlite3.Connection:
+        """Get the connection to the database, opening it and creating its schema if needed."""
+        if self._connection is None:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(
+                self._path, timeout=10, check_same_thread=False
+            )
+            connection.row_factory = sqlite3.Row
+            connection.execute("PRAGMA journal_mode = WAL")
+            connection.execute("PRAGMA foreign_keys = ON")
+            connection.executescript(_SCHEMA)
+            self._migrate(connection)
+            connection.executescript(_INDEXES)
+            self._connection = connection
+
+        return self._connection
+
+    @staticmethod
+    def _migrate(connection: sqlite3.Connection) -> None:
+        """Add the columns missing from tables created by earlier versions of the store."""
+        # Taking the write lock up front keeps other processes from migrating at the same time.
+        with connection:
+            connection.execute("BEGIN IMMEDIATE")
+            columns = {
+                cast("str", row["name"])
+                for row in connection.execute("PRAGMA table_info(precedents)")  # pyright: ignore[reportAny]
+            }
+            if "last_seen_at" not in columns:
+                connection.execute(
+                    "ALTER TABLE precedents ADD COLUMN last_seen_at TEXT"
+                )
+                connection.execute("UPDATE precedents SET last_seen_at = first_seen_at")
+
+    def close(self) -> None:
+        """Close the connection to the database, if it's open."""
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    @staticmethod
+    def _insert_precedents(
+        connection: sqlite3.Connection,
+        precedents: "Iterable[BaseLegalPrecedent]",
+        now: str,
+    ) -> None:
+        """Insert the legal precedents that aren't stored yet, and record that those already
+        stored were seen again, along with their full text URLs if they were missing."""
+        connection.executemany(
+            """
+            INSERT INTO precedents (
+                content_hash, court, summary, full_text_url, first_seen_at, last_seen_at
+            )
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (content_hash) DO UPDATE SET
+                last_seen_at = excluded.last_seen_at,
+                full_text_url = COALESCE(full_text_url, excluded.full_text_url)
+            """,
+            [
+                (
+                    precedent.content_hash,
+                    precedent.court,
+                    precedent.summary,
+                    precedent.full_text_url,
+                    now,
+                    now,
+                )
+                for precedent in precedents
+            ],
+        )
+
+    @staticmethod
+    def _to_precedent(row: sqlite3.Row) -> StoredPrecedent:
+        """Build a stored legal precedent from its row."""
+        return StoredPrecedent(
+            content_hash=row["content_hash"],  # pyright: ignore[reportAny]
+            court=Court(row["court"]),
+            summary=row["summary"],  # pyright: ignore[reportAny]
+            full_text_url=row["full_text_url"],  # pyright: ignore[reportAny]
+            first_seen_at=datetime.fromisoformat(row["first_seen_at"]),  # pyright: ignore[reportAny]
+            last_seen_at=datetime.fromisoformat(row["last_seen_at"]),  # pyright: ignore[reportAny]
+        )
+
+    def record_precedents(self, precedents: "Iterable[BaseLegalPrecedent]") -> None:
+        """Store the legal precedents that aren't stored yet, and record that the others were
+        seen again.
+
+        :param precedents: The legal precedents."""
+        with self._lock, self._connect() as connection:
+            self._insert_precedents(
+                connection, precedents, datetime.now(UTC).isoformat()
+            )
+
+    def find_precedent(self, court: Court, hash_prefix: str) -> StoredPrecedent | None:
+        """Find a legal precedent by a prefix of its content hash.
+
+        :param court: The court that authored the legal precedent.
+        :param hash_prefix: The prefix of the legal precedent's content hash.
+        :return: The legal precedent, or ``None`` if none matches."""
+        with self._lock:
+            # Hexadecimal digits sort before "g", so the range covers every hash with the prefix
+            # while still using the primary key's index.
+            row = cast(
+                "sqlite3.Row | None",
+                self._connect()
+                .execute(
+                    """
+                    SELECT * FROM precedents
+                    WHERE content_hash >= ? AND content_hash < ? AND court = ?
+                    """,
+                    (hash_prefix, hash_prefix + "g", court),
+                )
+                .fetchone(),
+            )
+            return self._to_precedent(row) if row is not None else None
+
+    def list_precedents(self, limit: int) -> list[StoredPrecedent]:
+        """List the most recently seen legal precedents.
+
+        :param limit: Maximum number of legal precedents to list.
+        :return: The legal precedents, the most recently seen first."""
+        with self._lock:
+            rows = (
+                self._connect()
+                .execute(
+                    "SELECT * FROM precedents ORDER BY last_seen_at DESC LIMIT ?",
+                    (limit,),
+                )
+                .fetchall()
+            )
+            return [self._to_precedent(row) for row in rows]  # pyright: ignore[reportAny]
+
+    def list_precedents_after(
+        self, rowid: int, limit: int
+    ) -> list[tuple[int, StoredPrecedent]]:
+        """List the legal precedents stored after another, in the order they were stored.
+
+        :param rowid: The row ID of the other legal precedent, or 0 to list from the first.
+        :param limit: Maximum number of legal precedents to list.
+        :return: The legal precedents along with their row IDs."""
+        with self._lock:
+            rows = cast(
+                "list[sqlite3.Row]",
+                self._connect()
+                .execute(
+                    "SELECT rowid, * FROM precedents WHERE rowid > ? ORDER BY rowid LIMIT ?",
+                    (rowid, limit),
+                )
+                .fetchall(),
+            )
+            return [
+                (cast("int", row["rowid"]), self._to_precedent(row)) for row in rows
+            ]
+
+    def save_query(
+        self,
+        *,
+        name: str,
+        court: Court,
+        summary: str,
+        filters: SearchFilters | None,
+    ) -> None:
+        """Save a query, replacing any other with the same name along with its results.
+
+        :param name: The name identifying the query.
+        :param court: The court to be researched.
+        :param summary: The summary to search for.
+        :param filters: Filters to be applied by the court's search engine."""
+        with self._lock, self._connect() as connection:
+            connection.execute("DELETE FROM saved_queries WHERE name = ?", (name,))
+            connection.execute(
+                "INSERT INTO saved_queries VALUES (?, ?, ?, ?, ?, NULL)",
+                (
+                    name,
+                    court,
+                    summary,
+                    filters.model_dump_json() if filters is not None else None,
+                    datetime.now(UTC).isoformat(),
+                ),
+            )
+
+    def delete_query(self, name: str) -> bool:
+        """Delete a saved query along with its results.
+
+        :param name: The name of the query.
+        :return: Whether there was a query with that name."""
+        with self._lock, self._connect() as connection:
+            cursor = connection.execute(
+                "DELETE FROM saved_queries WHERE name = ?", (name,)
+            )
+            return cursor.rowcount > 0
+
+    def get_query(self, name: str) -> SavedQuery | None:
+        """Get a saved query by its name.
+
+        :param name: The name of the query.
+        :return: The query, or ``None`` if there's none with that name."""
+        return next(
+            (query for query in self.list_queries() if query.name == name), None
+        )
+
+    def list_queries(self) -> list[SavedQuery]:
+        """List every saved query, the least recently polled first."""
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT * FROM saved_queries ORDER BY last_polled_at NULLS FIRST, name"
+            )
+            return [
+                SavedQuery(
+                    name=row["name"],  # pyright: ignore[reportAny]
+                    court=Court(row["court"]),
+                    summary=row["summary"],  # pyright: ignore[reportAny]
+                    filters=SearchFilters.model_validate_json(row["filters"])  # pyright: ignore[reportAny]
+                    if row["filters"] is not None
+                    else None,
+                    created_at=datetime.fromisoformat(row["created_at"]),  # pyright: ignore[reportAny]
+                    last_polled_at=datetime.fromisoformat(row["last_polled_at"])  # pyright: ignore[reportAny]
+                    if row["last_polled_at"] is not None
+                    else None,
+                )
+                for row in rows.fetchall()  # pyright: ignore[reportAny]
+            ]
+
+    def record_hits(
+        self,
+        query_name: str,
+        precedents: "Iterable[BaseLegalPrecedent]",
+        *,
+        delivered: bool = False,
+    ) -> int:
+        """Record the legal precedents found by a saved query.
+
+        :param query_name: The name of the query.
+        :param precedents: The legal precedents found.
+        :param delivered: Whether the precedents are to be considered already delivered, so they
+            aren't reported as new.
+        :return: How many of the precedents had already been found by the query."""
+        precedents = list(precedents)
+        now = datetime.now(UTC).isoformat()
+
+        with self._lock, self._connect() as connection:
+            self._insert_precedents(connection, precedents, now)
+
+            known = 0
+            for precedent in precedents:
+                cursor = connection.execute(
+                    "INSERT OR IGNORE INTO saved_query_hits VALUES (?, ?, ?, ?)",
+                    (query_name, precedent.content_hash, now, int(delivered)),
+                )
+                known += cursor.rowcount == 0
+
+            return known
+
+    def mark_polled(self, query_name: str) -> None:
+        """Record that a saved query was just polled.
+
+        :param query_name: The name of the query."""
+        with self._lock, self._connect() as connection:
+            connection.execute(
+                "UPDATE saved_queries SET last_polled_at = ? WHERE name = ?",
+                (datetime.now(UTC).isoformat(), query_name),
+            )
+
+    def take_new_precedents(self, query_name: str) -> list[StoredPrecedent]:
+        """Get the legal precedents found by a saved query that weren't delivered yet, marking
+        them as delivered.
+
+        :param query_name: The name of the query.
+        :return: The new legal precedents, in the order they were found."""
+        with self._lock, self._connect() as connection:
+            rows = connection.execute(
+                """
+                SELECT precedents.*
+                FROM saved_query_hits JOIN precedents USING (content_hash)
+                WHERE query_name = ? AND NOT delivered
+                ORDER BY saved_query_hits.rowid
+                """,
+                (query_name,),
+            ).fetchall()
+            # Only the selected hits are marked, as another process may have recorded more since.
+            connection.executemany(
+                "UPDATE saved_query_hits SET delivered = 1 WHERE query_name = ? AND content_hash = ?",
+                [(query_name, row["content_hash"]) for row in rows],  # pyright: ignore[reportAny]
+            )
+
+            return [self._to_precedent(row) for row in rows]  # pyright: ignore[reportAny]
+
+    def get_full_text(self, url: str) -> str | None:
+        """Get a stored full text.
+
+        :param url: The URL the full text was fetched from.
+        :return: The full text, or ``None`` if it isn't stored."""
+        with self._lock:
+            row = cast(
+                "sqlite3.Row | None",
+                self._connect()
+                .execute("SELECT text FROM full_texts WHERE url = ?", (url,))
+                .fetchone(),
+            )
+            return cast("str", row["text"]) if row is not None else None
+
+    def put_full_text(self, url: str, text: str) -> None:
+        """Store a full text, replacing any other fetched from the same URL.
+
+        :param url: The URL the full text was fetched from.
+        :param text: The full text."""
+        with self._lock, self._connect() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO full_texts VALUES (?, ?, ?)",
+                (url, text, datetime.now(UTC).isoformat()),
+            )
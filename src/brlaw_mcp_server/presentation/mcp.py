@@ -1,23 +1,156 @@
 import asyncio
+import contextlib
+import functools
+import json
 import logging
 import socket
 import textwrap
-from typing import Any, Final
+import threading
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Final
 
 import click
 from mcp.server import Server
+from mcp.server.lowlevel.helper_types import ReadResourceContents
 from mcp.server.stdio import stdio_server
-from mcp.types import TextContent, Tool
-from pydantic import BaseModel, Field
-
-from brlaw_mcp_server.domain.base import BaseLegalPrecedent
+from mcp.types import (
+    InitializedNotification,
+    Resource,
+    ResourceTemplate,
+    TextContent,
+    Tool,
+)
+from pydantic import AnyUrl, BaseModel, Field
+
+from brlaw_mcp_server.deadlines import Stage, deadline, stage, time_left
+from brlaw_mcp_server.domain.base import (
+    BaseLegalPrecedent,
+    Court,
+    ResultsFingerprint,
+    SearchFilters,
+    parse_precedent_id,
+)
+from brlaw_mcp_server.domain.near_duplicates import group_near_duplicates
+from brlaw_mcp_server.domain.ranking import rank_by_relevance
 from brlaw_mcp_server.domain.stf import StfLegalPrecedent
 from brlaw_mcp_server.domain.stj import StjLegalPrecedent
 from brlaw_mcp_server.domain.tst import TstLegalPrecedent
-from brlaw_mcp_server.utils import browser_factory
+from brlaw_mcp_server.infrastructure.browser import BrowserManager
+from brlaw_mcp_server.infrastructure.cache import ResultCache, SingleFlight
+from brlaw_mcp_server.infrastructure.memory import MemoryGovernor
+from brlaw_mcp_server.infrastructure.polling import SavedQueryPoller
+from brlaw_mcp_server.infrastructure.resilience import (
+    CourtHealthTracker,
+    hedged,
+    retry_with_jitter,
+)
+from brlaw_mcp_server.infrastructure.schema_cache import load_json_schemas
+from brlaw_mcp_server.infrastructure.startup import STARTUP_TIMER
+from brlaw_mcp_server.infrastructure.storage_state import StorageStateStore
+from brlaw_mcp_server.infrastructure.store import PrecedentStore, StoredPrecedent
+from brlaw_mcp_server.presentation.tcp import MESSAGE_SIZE_LIMIT, tcp_streams
+from brlaw_mcp_server.profiling import CallProfiler, span
+from brlaw_mcp_server.settings import get_settings
+from brlaw_mcp_server.utils import pdf_to_text
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable, Sequence
+
+    from mcp.server.models import InitializationOptions
+    from patchright.async_api import Page
+
+    from brlaw_mcp_server.infrastructure.cache import CacheEntry
+    from brlaw_mcp_server.infrastructure.similarity import SimilarityIndex
+
+    type _ToolHandler = Callable[[Any], Awaitable[list[TextContent]]]  # pyright: ignore[reportExplicitAny]
 
 _LOGGER = logging.getLogger(__name__)
 
+_SETTINGS: Final = get_settings()
+
+_COURT_HEALTH: Final = CourtHealthTracker(
+    failure_threshold=_SETTINGS.circuit_breaker_failure_threshold,
+    reset_timeout=_SETTINGS.circuit_breaker_reset_timeout,
+)
+
+
+@dataclass(frozen=True)
+class _CachedResults:
+    """Legal precedents of a research, as cached."""
+
+    precedents: "Sequence[BaseLegalPrecedent]"
+    fingerprint: ResultsFingerprint | None
+    """Fingerprint of the page of results the legal precedents were scraped from, which
+    revalidates them once they're no longer fresh. ``None`` if it can't be probed."""
+
+
+_RESULT_CACHE: Final[ResultCache[_CachedResults]] = ResultCache(
+    ttl=_SETTINGS.cache_ttl,
+    stale_ttl=_SETTINGS.cache_stale_ttl,
+    max_entries=_SETTINGS.cache_max_entries,
+)
+
+_DOMAIN_MODELS: Final[dict[Court, type[BaseLegalPrecedent]]] = {
+    domain_model.court: domain_model
+    for domain_model in (StjLegalPrecedent, TstLegalPrecedent, StfLegalPrecedent)
+}
+
+
+_BROWSER: Final = BrowserManager(
+    headless=True,
+    context_max_uses=_SETTINGS.context_max_uses,
+    memory_governor=MemoryGovernor(budget_mb=_SETTINGS.memory_budget_mb),
+    page_pool_size=_SETTINGS.page_pool_size,
+    page_preparers={
+        court: domain_model.prepare_search_form
+        for court, domain_model in _DOMAIN_MODELS.items()
+    },
+    storage_states=StorageStateStore(
+        _SETTINGS.cache_dir / "storage_states",
+        max_age=_SETTINGS.storage_state_max_age,
+        refresh_interval=_SETTINGS.storage_state_refresh_interval,
+    )
+    if _SETTINGS.storage_state_max_age
+    else None,
+    court_origin=_SETTINGS.court_origin,
+)
+
+_STORE: Final = PrecedentStore(_SETTINGS.cache_dir / "precedents.sqlite3")
+
+_FULL_TEXT_FETCHES: Final[SingleFlight[str, str]] = SingleFlight()
+"""Full texts being fetched, keyed by their URLs."""
+
+_SIMILARITY_INDEX_LOCK: Final = threading.Lock()
+
+
+@functools.cache
+def _create_similarity_index() -> "SimilarityIndex":
+    # Deferred, as numpy is slow to import and not needed to answer the MCP handshake.
+    from brlaw_mcp_server.infrastructure.similarity import (  # noqa: PLC0415
+        SimilarityIndex,
+    )
+
+    return SimilarityIndex(_STORE)
+
+
+def _get_similarity_index() -> "SimilarityIndex":
+    """Get the index of the stored legal precedents, creating it on first use."""
+    with _SIMILARITY_INDEX_LOCK:
+        return _create_similarity_index()
+
+
+_PROFILER: Final = CallProfiler(
+    _SETTINGS.profile_dir or _SETTINGS.cache_dir / "profiles",
+    enabled=_SETTINGS.profile,
+    sampling_interval=_SETTINGS.profile_sampling_interval,
+)
+
+_PRECEDENT_URI_PREFIX: Final = "brlaw://precedents/"
+"""Prefix of the URIs of the legal precedents exposed as resources."""
+
+_BACKGROUND_TASKS: Final[set[asyncio.Task[None]]] = set()
+"""Background tasks, referenced here so they aren't garbage collected before finishing."""
+
 
 class BaseLegalPrecedentsRequest(BaseModel):
     """Common model for all legal precedents requests."""
@@ -38,6 +171,41 @@ class BaseLegalPrecedentsRequest(BaseModel):
         default=1,
     )
 
+    filters: SearchFilters | None = Field(
+        title="Filtros",
+        description=textwrap.dedent("""
+            Filtros aplicados pelo próprio buscador do tribunal, como período de julgamento,
+            órgão julgador, relator e tipo de documento.
+
+            Prefira filtrar a pesquisa a percorrer muitas páginas de resultados em busca dos
+            precedentes de um órgão julgador ou período específico."""),
+        default=None,
+    )
+
+    rerank_pages: int = Field(
+        title="Páginas reordenadas",
+        description=textwrap.dedent("""
+            Quantidade de páginas de resultados, a partir da página requisitada, cujos precedentes
+            são reunidos e reordenados pela relevância de suas ementas aos critérios da pesquisa.
+
+            O buscador do tribunal nem sempre ordena os resultados por relevância, de modo que os
+            precedentes mais pertinentes podem estar nas páginas seguintes. Com mais de uma página,
+            são retornados somente os precedentes mais relevantes dentre os de todas elas."""),
+        ge=1,
+        le=5,
+        default=1,
+    )
+
+    rerank_limit: int = Field(
+        title="Quantidade reordenada",
+        description=textwrap.dedent("""
+            Quantidade máxima de precedentes retornados quando mais de uma página é reordenada, do
+            mais relevante ao menos."""),
+        ge=1,
+        le=50,
+        default=10,
+    )
+
 
 class StjLegalPrecedentsRequest(BaseLegalPrecedentsRequest):
     """Requisição dos precedentes judiciais do Superior Tribunal de Justiça (STJ) que satisfaçam os critérios passados.
@@ -340,37 +508,776 @@ class StfLegalPrecedentsRequest(BaseLegalPrecedentsRequest):
     )
 
 
-_TOOLS_AND_MODELS: Final[
-    list[
-        tuple[
-            Tool,
-            type[BaseLegalPrecedent],
-            type[StjLegalPrecedentsRequest]
-            | type[TstLegalPrecedentsRequest]
-            | type[StfLegalPrecedentsRequest],
+class LegalPrecedentsCountRequest(BaseModel):
+    """Contagem dos precedentes judiciais que satisfaçam os critérios passados, por tribunal.
+
+    A contagem é muito mais rápida que a pesquisa, pois não obtém as ementas das decisões. É útil
+    para refinar os critérios de busca antes de requisitar os resultados propriamente ditos: uma
+    contagem muito alta indica critérios amplos demais; uma contagem nula, critérios restritivos
+    demais."""
+
+    summary: str = Field(
+        title="Ementa",
+        description=textwrap.dedent("""
+        Critérios que serão buscados na ementa das decisões desejadas.
+
+        Aceita os mesmos operadores textuais da ferramenta de pesquisa de cada tribunal. Como os
+        operadores variam entre os tribunais, prefira palavras simples e expressões entre aspas ao
+        contar os resultados de mais de um tribunal ao mesmo tempo."""),
+        min_length=1,
+        examples=["fraude execução", "“adicional de periculosidade”"],
+    )
+
+    courts: list[Court] = Field(
+        title="Tribunais",
+        description="Tribunais cujos resultados serão contados. Por padrão, todos.",
+        default_factory=lambda: list(Court),
+        min_length=1,
+    )
+
+    filters: SearchFilters | None = Field(
+        title="Filtros",
+        description="Filtros aplicados pelo próprio buscador de cada tribunal.",
+        default=None,
+    )
+
+
+class SavedQueryRequest(BaseModel):
+    """Salva uma pesquisa para acompanhar os novos precedentes judiciais que a satisfaçam.
+
+    A pesquisa salva é refeita periodicamente, em segundo plano, e os precedentes encontrados que
+    ainda não eram conhecidos ficam disponíveis na ferramenta `SavedQueryNewPrecedentsRequest`.
+    Os precedentes encontrados na primeira verificação, logo após a pesquisa ser salva, são
+    considerados já conhecidos.
+
+    É útil para acompanhar temas de interesse contínuo, como os afetados ao rito dos recursos
+    repetitivos. Salvar uma pesquisa com o nome de outra já salva a substitui."""
+
+    name: str = Field(
+        title="Nome",
+        description="Nome que identifica a pesquisa salva.",
+        min_length=1,
+        max_length=100,
+        examples=["Tema 1.234 - redirecionamento da execução fiscal"],
+    )
+
+    court: Court = Field(
+        title="Tribunal",
+        description="Tribunal cujos precedentes serão pesquisados.",
+    )
+
+    summary: str = Field(
+        title="Ementa",
+        description=textwrap.dedent("""
+        Critérios que serão buscados na ementa das decisões desejadas.
+
+        Aceita os mesmos operadores textuais da ferramenta de pesquisa do tribunal escolhido."""),
+        min_length=1,
+        examples=["redirecionamento execução fiscal dissolução irregular"],
+    )
+
+    filters: SearchFilters | None = Field(
+        title="Filtros",
+        description="Filtros aplicados pelo próprio buscador do tribunal.",
+        default=None,
+    )
+
+
+class SavedQueryNewPrecedentsRequest(BaseModel):
+    """Obtém os novos precedentes judiciais encontrados por uma pesquisa salva.
+
+    Retorna apenas os precedentes encontrados desde a última vez em que esta ferramenta foi usada
+    para a mesma pesquisa salva. Cada precedente é retornado uma única vez."""
+
+    name: str = Field(
+        title="Nome",
+        description="Nome da pesquisa salva.",
+        min_length=1,
+    )
+
+
+class SavedQueryDeletionRequest(BaseModel):
+    """Exclui uma pesquisa salva, deixando de acompanhar os novos precedentes que a satisfaçam."""
+
+    name: str = Field(
+        title="Nome",
+        description="Nome da pesquisa salva.",
+        min_length=1,
+    )
+
+
+class FullTextRequest(BaseModel):
+    """Obtém o inteiro teor de uma decisão retornada por uma pesquisa anterior.
+
+    O inteiro teor contém o relatório, os votos e o dispositivo da decisão, sendo muito mais longo
+    que a ementa. Requisite-o apenas quando a ementa não for suficiente. Textos longos são
+    divididos em partes, que devem ser requisitadas uma a uma, conforme a necessidade."""
+
+    url: str = Field(
+        title="URL do inteiro teor",
+        description="O campo `full_text_url` da decisão, conforme retornado pela pesquisa.",
+        min_length=1,
+    )
+
+    part: int = Field(
+        title="Parte",
+        description="A parte do inteiro teor a ser retornada. A parte 1 é a primeira.",
+        ge=1,
+        default=1,
+    )
+
+
+class SimilarPrecedentsRequest(BaseModel):
+    """Busca, entre os precedentes judiciais já retornados por pesquisas anteriores, os de ementa
+    mais parecida com a de um deles.
+
+    A busca é feita localmente, sem consultar os tribunais, e por isso é praticamente instantânea.
+    Como abrange apenas os precedentes já vistos pelo servidor, não substitui uma nova pesquisa
+    quando se deseja cobrir toda a jurisprudência sobre o tema."""
+
+    id: str = Field(
+        title="ID do precedente",
+        description="O campo `id` do precedente, conforme retornado por uma pesquisa.",
+        min_length=1,
+    )
+
+    courts: list[Court] = Field(
+        title="Tribunais",
+        description="Tribunais cujos precedentes podem ser retornados. Por padrão, todos.",
+        default_factory=lambda: list(Court),
+        min_length=1,
+    )
+
+    limit: int = Field(
+        title="Quantidade",
+        description="Quantidade máxima de precedentes retornados, do mais parecido ao menos.",
+        ge=1,
+        le=50,
+        default=10,
+    )
+
+
+type _ResearchRequest = (
+    StjLegalPrecedentsRequest | TstLegalPrecedentsRequest | StfLegalPrecedentsRequest
+)
+
+
+async def _call_court[T](
+    court: Court,
+    func: "Callable[[Page], Awaitable[T]]",
+    *,
+    timeout: float | None = None,
+    attempts: int | None = None,
+) -> T:
+    """Call a court's search engine in a leased page, through the court's circuit breaker,
+    retrying and hedging. Each attempt is bounded by the configured timeout, and every attempt by
+    the tool call's deadline.
+
+    :param court: The court to be called.
+    :param func: The function calling the court's search engine in the leased page.
+    :param timeout: Seconds each attempt is bounded by, instead of the configured timeout, for
+        functions doing more than a single research.
+    :param attempts: Maximum number of attempts, instead of the configured one, for calls with a
+        cheaper fallback than retrying.
+    :return: The function's result."""
+
+    async def attempt() -> T:
+        with span(f"attempt:{court}"):
+            async with (
+                asyncio.timeout(timeout or _SETTINGS.research_timeout),
+                contextlib.AsyncExitStack() as stack,
+            ):
+                async with stage(Stage.LEASE):
+                    browser_page = await stack.enter_async_context(
+                        _BROWSER.lease(court)
+                    )
+
+                return await func(browser_page)
+
+    health = _COURT_HEALTH[court]
+
+    # Attempts cut short by the deadline are cancelled, which doesn't count against the court's
+    # health, while a stage outlasting its share of it fails the call without retrying.
+    async with asyncio.timeout(time_left()):
+        return await retry_with_jitter(
+            lambda: health.call(lambda: hedged(attempt, delay=_SETTINGS.hedge_delay)),
+            attempts=attempts or _SETTINGS.research_attempts,
+            base_delay=_SETTINGS.retry_base_delay,
+            max_delay=_SETTINGS.retry_max_delay,
+        )
+
+
+async def _research_page(
+    court: Court,
+    *,
+    summary: str,
+    page: int,
+    filters: SearchFilters | None,
+) -> "tuple[Sequence[BaseLegalPrecedent], ResultsFingerprint | None]":
+    """Research a page of legal precedents in a court, storing them.
+
+    :return: The legal precedents, along with the fingerprint of their page of results, if it
+        can be probed."""
+    domain_model = _DOMAIN_MODELS[court]
+
+    async def research(
+        browser_page: "Page",
+    ) -> "tuple[Sequence[BaseLegalPrecedent], ResultsFingerprint | None]":
+        precedents = await domain_model.research(
+            browser_page,
+            summary_search_prompt=summary,
+            desired_page=page,
+            filters=filters,
+        )
+
+        # Results that can't be fingerprinted are still served, only never revalidated.
+        try:
+            async with stage(Stage.EXTRACT, browser_page, name="fingerprint_results"):
+                fingerprint = await domain_model.fingerprint_shown_results(browser_page)
+        except Exception:
+            _LOGGER.warning(
+                "Failed to fingerprint results", extra={"court": court}, exc_info=True
+            )
+            fingerprint = None
+
+        return precedents, fingerprint
+
+    with span(f"research:{court}"):
+        precedents, fingerprint = await _call_court(court, research)
+    # Kept, so they can be read as resources without researching them again.
+    _STORE.record_precedents(precedents)
+
+    return precedents, fingerprint
+
+
+async def _research(
+    court: Court,
+    *,
+    summary: str,
+    page: int,
+    filters: SearchFilters | None,
+) -> "Sequence[BaseLegalPrecedent]":
+    """Research a page of legal precedents in a court, storing them."""
+    precedents, _ = await _research_page(
+        court, summary=summary, page=page, filters=filters
+    )
+
+    return precedents
+
+
+async def _probe(
+    court: Court,
+    *,
+    summary: str,
+    page: int,
+    filters: SearchFilters | None,
+) -> ResultsFingerprint | None:
+    """Fingerprint a page of legal precedents in a court, without scraping it.
+
+    The court is called only once, as stale results are served in place of failed probes."""
+    domain_model = _DOMAIN_MODELS[court]
+
+    with span(f"probe:{court}"):
+        return await _call_court(
+            court,
+            lambda browser_page: domain_model.probe(
+                browser_page,
+                summary_search_prompt=summary,
+                desired_page=page,
+                filters=filters,
+            ),
+            attempts=1,
+        )
+
+
+async def _revalidate(
+    domain_model: type[BaseLegalPrecedent],
+    request: _ResearchRequest,
+    cached: _CachedResults,
+) -> bool:
+    """Check whether cached results that are no longer fresh are still those the court would
+    return, by comparing their fingerprint with a probe's.
+
+    :return: Whether the cached results are still valid.
+    :raises Exception: If the court failed to answer the probe."""
+    if cached.fingerprint is None:
+        return False
+
+    fingerprint = await _probe(
+        domain_model.court,
+        summary=request.summary,
+        page=request.page,
+        filters=request.filters,
+    )
+
+    return fingerprint == cached.fingerprint
+
+
+def _render_stale_results(
+    court: Court, cached: "CacheEntry[_CachedResults]", error: Exception
+) -> list[TextContent]:
+    """Render cached results in place of those a court failed to return, warning they may be
+    outdated.
+
+    :param error: The error the court failed with."""
+    _LOGGER.warning(
+        "Serving stale cached results",
+        extra={"court": court, "fetched_at": cached.fetched_at.isoformat()},
+        exc_info=error,
+    )
+    return [
+        TextContent(
+            type="text",
+            text=(
+                f"ATENÇÃO: o {court} está indisponível no momento. Os resultados"
+                f" a seguir foram obtidos em {cached.fetched_at:%d/%m/%Y %H:%M} (UTC) e podem"
+                " estar desatualizados."
+            ),
+        ),
+        *_render_precedents(cached.value.precedents),
+    ]
+
+
+async def _research_pages(
+    court: Court,
+    *,
+    summary: str,
+    pages: range,
+    filters: SearchFilters | None,
+) -> "Sequence[BaseLegalPrecedent]":
+    """Research several pages of legal precedents in a court, storing them.
+
+    Pages that can be reached directly are researched concurrently, while the others are walked
+    through in a single browser page."""
+    domain_model = _DOMAIN_MODELS[court]
+
+    if domain_model.pages_are_addressable:
+        pages_precedents = await asyncio.gather(
+            *(
+                _research(court, summary=summary, page=page, filters=filters)
+                for page in pages
+            )
+        )
+        return [
+            precedent
+            for page_precedents in pages_precedents
+            for precedent in page_precedents
         ]
+
+    with span(f"research:{court}"):
+        precedents = await _call_court(
+            court,
+            lambda browser_page: domain_model.research_pages(
+                browser_page,
+                summary_search_prompt=summary,
+                pages=pages,
+                filters=filters,
+            ),
+            timeout=_SETTINGS.research_timeout * len(pages),
+        )
+    _STORE.record_precedents(precedents)
+
+    return precedents
+
+
+def _rerank(
+    precedents: "Sequence[BaseLegalPrecedent]", *, summary: str, limit: int
+) -> list["BaseLegalPrecedent"]:
+    """Keep the legal precedents of several pages most relevant to the search criteria.
+
+    Pages may overlap as the court's results change between them, so legal precedents are only
+    ranked once."""
+    with span("rerank"):
+        unique_precedents: dict[str, BaseLegalPrecedent] = {}
+        for precedent in precedents:
+            unique_precedents.setdefault(precedent.content_hash, precedent)
+
+        return rank_by_relevance(list(unique_precedents.values()), summary)[:limit]
+
+
+_POLLER: Final = SavedQueryPoller(
+    store=_STORE,
+    research=lambda query, page: _research(
+        query.court, summary=query.summary, page=page, filters=query.filters
+    ),
+    interval=_SETTINGS.saved_query_poll_interval,
+    max_pages=_SETTINGS.saved_query_max_pages,
+)
+
+
+def _render_precedents(
+    precedents: "Sequence[BaseLegalPrecedent]",
+) -> list[TextContent]:
+    """Render the legal precedents as the content of a tool call's result.
+
+    Near duplicates are collapsed into their first legal precedent, which lists them by ID."""
+    if not precedents:
+        return [TextContent(type="text", text="Nenhum resultado encontrado")]
+
+    with span("group_near_duplicates"):
+        groups = group_near_duplicates(
+            precedents, threshold=_SETTINGS.near_duplicate_threshold
+        )
+
+    contents: list[TextContent] = []
+    with span("serialize_results"):
+        for first_precedent, *near_duplicates in groups:
+            content = first_precedent.model_dump(mode="json")
+            if near_duplicates:
+                content["near_duplicates"] = {
+                    "count": len(near_duplicates),
+                    "ids": [precedent.id for precedent in near_duplicates],
+                }
+            contents.append(
+                TextContent(type="text", text=json.dumps(content, ensure_ascii=False))
+            )
+
+    return contents
+
+
+async def _research_precedents(
+    domain_model: type[BaseLegalPrecedent],
+    request: _ResearchRequest,
+) -> list[TextContent]:
+    """Research legal precedents in a court, serving cached results when possible.
+
+    Cached results that are no longer fresh are revalidated by probing the court, which is much
+    cheaper than researching them again, and only researched again if they changed."""
+    cache_key = (type(request).__name__, request.model_dump_json())
+    cached = _RESULT_CACHE.get(cache_key)
+    if cached is not None and cached.is_fresh:
+        _LOGGER.info("Serving cached results", extra={"court": domain_model.court})
+        return _render_precedents(cached.value.precedents)
+
+    if cached is not None:
+        try:
+            is_valid = await _revalidate(domain_model, request, cached.value)
+        except Exception as e:  # noqa: BLE001  # logged along with the stale results.
+            # A court failing the cheap probe would most likely fail the research too.
+            return _render_stale_results(domain_model.court, cached, e)
+
+        if is_valid:
+            _LOGGER.info(
+                "Serving revalidated results", extra={"court": domain_model.court}
+            )
+            _RESULT_CACHE.put(cache_key, cached.value)
+            return _render_precedents(cached.value.precedents)
+
+    fingerprint: ResultsFingerprint | None = None
+    try:
+        if request.rerank_pages > 1:
+            precedents = _rerank(
+                await _research_pages(
+                    domain_model.court,
+                    summary=request.summary,
+                    pages=range(request.page, request.page + request.rerank_pages),
+                    filters=request.filters,
+                ),
+                summary=request.summary,
+                limit=request.rerank_limit,
+            )
+        else:
+            precedents, fingerprint = await _research_page(
+                domain_model.court,
+                summary=request.summary,
+                page=request.page,
+                filters=request.filters,
+            )
+    except Exception as e:
+        if cached is None:
+            raise
+
+        return _render_stale_results(domain_model.court, cached, e)
+
+    _RESULT_CACHE.put(cache_key, _CachedResults(precedents, fingerprint))
+
+    return _render_precedents(precedents)
+
+
+async def _count_precedents(request: LegalPrecedentsCountRequest) -> list[TextContent]:
+    """Count legal precedents in the requested courts concurrently.
+
+    A court failing doesn't fail the others' counts, it's reported alongside them instead."""
+    courts = [court for court in Court if court in request.courts]
+
+    async def count(court: Court) -> int:
+        domain_model = _DOMAIN_MODELS[court]
+        return await _call_court(
+            court,
+            lambda browser_page: domain_model.count(
+                browser_page,
+                summary_search_prompt=request.summary,
+                filters=request.filters,
+            ),
+        )
+
+    results = await asyncio.gather(
+        *(count(court) for court in courts), return_exceptions=True
+    )
+
+    counts: dict[str, int | None] = {}
+    unavailable_courts: list[str] = []
+    for court, result in zip(courts, results, strict=True):
+        if isinstance(result, BaseException):
+            _LOGGER.warning(
+                "Failed to count legal precedents",
+                extra={"court": court},
+                exc_info=result,
+            )
+            counts[court] = None
+            unavailable_courts.append(court)
+        else:
+            counts[court] = result
+
+    contents = [TextContent(type="text", text=json.dumps(counts))]
+    if unavailable_courts:
+        contents.append(
+            TextContent(
+                type="text",
+                text=(
+                    "ATENÇÃO: não foi possível contar os resultados dos seguintes tribunais no"
+                    f" momento: {', '.join(unavailable_courts)}."
+                ),
+            )
+        )
+
+    return contents
+
+
+def _to_domain_precedent(stored_precedent: StoredPrecedent) -> BaseLegalPrecedent:
+    """Rebuild a legal precedent from its stored version."""
+    return _DOMAIN_MODELS[stored_precedent.court](
+        summary=stored_precedent.summary,
+        full_text_url=stored_precedent.full_text_url,
+    )
+
+
+async def _save_query(request: SavedQueryRequest) -> list[TextContent]:
+    """Save a query, polling it for the first time right away."""
+    _STORE.save_query(
+        name=request.name,
+        court=request.court,
+        summary=request.summary,
+        filters=request.filters,
+    )
+    _POLLER.wake_up()
+
+    return [
+        TextContent(
+            type="text",
+            text=(
+                f"Pesquisa {request.name!r} salva. Os precedentes encontrados a partir de agora"
+                " poderão ser obtidos com a ferramenta SavedQueryNewPrecedentsRequest."
+            ),
+        )
     ]
-] = [
-    (
-        Tool(
-            name=request_model.__name__,
-            description=request_model.__doc__,
-            inputSchema=request_model.model_json_schema(),
+
+
+async def _get_new_precedents(
+    request: SavedQueryNewPrecedentsRequest,
+) -> list[TextContent]:
+    """Get the legal precedents found by a saved query that weren't delivered yet."""
+    query = _STORE.get_query(request.name)
+    if query is None:
+        raise ValueError(f"Nenhuma pesquisa salva com o nome {request.name!r}")
+
+    if query.last_polled_at is None:
+        return [
+            TextContent(
+                type="text",
+                text="A pesquisa salva ainda não foi verificada. Tente novamente mais tarde.",
+            )
+        ]
+
+    stored_precedents = _STORE.take_new_precedents(query.name)
+    header = TextContent(
+        type="text",
+        text=(
+            f"Pesquisa verificada pela última vez em {query.last_polled_at:%d/%m/%Y %H:%M}"
+            f" (UTC). {len(stored_precedents)} precedente(s) novo(s)."
+        ),
+    )
+    if not stored_precedents:
+        return [header]
+
+    return [
+        header,
+        *_render_precedents(
+            [
+                _to_domain_precedent(stored_precedent)
+                for stored_precedent in stored_precedents
+            ]
+        ),
+    ]
+
+
+async def _delete_query(request: SavedQueryDeletionRequest) -> list[TextContent]:
+    """Delete a saved query."""
+    if not _STORE.delete_query(request.name):
+        raise ValueError(f"Nenhuma pesquisa salva com o nome {request.name!r}")
+
+    return [TextContent(type="text", text=f"Pesquisa {request.name!r} excluída.")]
+
+
+def _split_into_parts(text: str, max_length: int) -> list[str]:
+    """Split a text into parts no longer than the given length, at line breaks when possible."""
+    parts: list[str] = []
+    while len(text) > max_length:
+        cut = text.rfind("\n", 0, max_length)
+        if cut <= 0:
+            cut = max_length
+
+        parts.append(text[:cut])
+        text = text[cut:].lstrip("\n")
+
+    parts.append(text)
+
+    return parts
+
+
+async def _fetch_full_text(domain_model: type[BaseLegalPrecedent], url: str) -> str:
+    """Fetch a full text from its court, storing it for later requests."""
+    full_text = await _call_court(
+        domain_model.court,
+        lambda browser_page: domain_model.fetch_full_text(browser_page, url),
+    )
+    # Extracted outside the call to the court, whose health a missing optional dependency says
+    # nothing about.
+    text = (
+        await asyncio.to_thread(pdf_to_text, full_text)
+        if isinstance(full_text, bytes)
+        else full_text
+    )
+    _STORE.put_full_text(url, text)
+
+    return text
+
+
+async def _get_full_text(request: FullTextRequest) -> list[TextContent]:
+    """Get a part of a full text, fetching it only if it isn't stored yet."""
+    domain_model = next(
+        (
+            domain_model
+            for domain_model in _DOMAIN_MODELS.values()
+            if domain_model.is_court_url(request.url)
         ),
-        domain_model,
-        request_model,
+        None,
     )
-    for request_model, domain_model in [
-        (StjLegalPrecedentsRequest, StjLegalPrecedent),
-        (TstLegalPrecedentsRequest, TstLegalPrecedent),
-        (StfLegalPrecedentsRequest, StfLegalPrecedent),
+    if domain_model is None:
+        raise ValueError(
+            "O endereço informado não pertence a nenhum dos tribunais disponíveis"
+        )
+
+    text = _STORE.get_full_text(request.url)
+    if text is None:
+        text = await _FULL_TEXT_FETCHES.run(
+            request.url, lambda: _fetch_full_text(domain_model, request.url)
+        )
+
+    if not text.strip():
+        return [
+            TextContent(
+                type="text",
+                text="O inteiro teor não contém texto que possa ser extraído.",
+            )
+        ]
+
+    parts = _split_into_parts(text, _SETTINGS.full_text_part_length)
+    if request.part > len(parts):
+        raise ValueError(f"O inteiro teor tem apenas {len(parts)} parte(s)")
+
+    return [
+        TextContent(type="text", text=f"Parte {request.part} de {len(parts)}."),
+        TextContent(type="text", text=parts[request.part - 1]),
     ]
+
+
+async def _find_similar_precedents(
+    request: SimilarPrecedentsRequest,
+) -> list[TextContent]:
+    """Find the stored legal precedents most similar to another, without contacting the
+    courts."""
+    parsed_id = parse_precedent_id(request.id)
+    stored_precedent = _STORE.find_precedent(*parsed_id) if parsed_id else None
+    if stored_precedent is None:
+        raise ValueError(f"Precedente {request.id} não encontrado")
+
+    similar_precedents = await asyncio.to_thread(
+        lambda: _get_similarity_index().search(
+            stored_precedent.summary,
+            courts=request.courts,
+            limit=request.limit,
+            exclude=stored_precedent.content_hash,
+        )
+    )
+
+    return _render_precedents(
+        [
+            _to_domain_precedent(found_precedent)
+            for similar_precedent in similar_precedents
+            if (
+                found_precedent := _STORE.find_precedent(
+                    similar_precedent.court, similar_precedent.content_hash
+                )
+            )
+            is not None
+        ]
+    )
+
+
+_TOOLS: Final[list[tuple[type[BaseModel], "_ToolHandler"]]] = [
+    (
+        StjLegalPrecedentsRequest,
+        functools.partial(_research_precedents, StjLegalPrecedent),
+    ),
+    (
+        TstLegalPrecedentsRequest,
+        functools.partial(_research_precedents, TstLegalPrecedent),
+    ),
+    (
+        StfLegalPrecedentsRequest,
+        functools.partial(_research_precedents, StfLegalPrecedent),
+    ),
+    (LegalPrecedentsCountRequest, _count_precedents),
+    (SavedQueryRequest, _save_query),
+    (SavedQueryNewPrecedentsRequest, _get_new_precedents),
+    (SavedQueryDeletionRequest, _delete_query),
+    (FullTextRequest, _get_full_text),
+    (SimilarPrecedentsRequest, _find_similar_precedents),
 ]
+"""Request model of each tool, along with the handler of its calls."""
+
+
+@functools.cache
+def _get_tools() -> dict[str, tuple[Tool, type[BaseModel], "_ToolHandler"]]:
+    """Get the tools along with their request models and handlers, keyed by the tools' names.
+
+    The tools' input schemas are costly to generate, so they're read from a persistent cache."""
+    schemas = load_json_schemas(
+        [request_model for request_model, _ in _TOOLS],
+        _SETTINGS.cache_dir,
+    )
+
+    return {
+        request_model.__name__: (
+            Tool(
+                name=request_model.__name__,
+                description=request_model.__doc__,
+                inputSchema=schemas[request_model.__name__],
+            ),
+            request_model,
+            handler,
+        )
+        for request_model, handler in _TOOLS
+    }
 
 
 async def list_tools() -> list["Tool"]:
     """List all tools available in the MCP server."""
-    return [i[0] for i in _TOOLS_AND_MODELS]
+    tools = [tool for tool, _, _ in _get_tools().values()]
+    STARTUP_TIMER.mark("tools_listed")
+
+    return tools
 
 
 async def call_tool(
@@ -383,115 +1290,215 @@ async def call_tool(
         extra={"arguments": arguments, "tool_name": name},
     )
 
-    for tool, domain_model, request_model in _TOOLS_AND_MODELS:
-        if tool.name == name:
-            request = request_model(**arguments)  # pyright: ignore[reportAny]
-            method = domain_model.research
-            break
-    else:
+    if name not in _get_tools():
         raise ValueError(f"Tool {name} not found")
 
-    async with (
-        browser_factory(headless=True) as browser,
-        await browser.new_page() as page,
-    ):
+    _, request_model, handler = _get_tools()[name]
+
+    async with _PROFILER.profile(f"call_tool:{name}"):
+        with deadline(_SETTINGS.tool_call_deadline):
+            with span("validate_request"):
+                request = request_model(**arguments)
+
+            try:
+                contents = await handler(request)
+            except Exception:
+                _LOGGER.exception("Error calling tool", extra={"tool_name": name})
+                raise
+
+    STARTUP_TIMER.mark("first_tool_call_answered")
+
+    return contents
+
+
+async def list_resources() -> list[Resource]:
+    """List the legal precedents most recently seen by the server as resources."""
+    return [
+        Resource(
+            uri=AnyUrl(_PRECEDENT_URI_PREFIX + precedent.id),
+            name=precedent.id,
+            description=textwrap.shorten(precedent.summary, width=200, placeholder="…"),
+            mimeType="application/json",
+        )
+        for precedent in map(
+            _to_domain_precedent,
+            _STORE.list_precedents(_SETTINGS.resource_list_limit),
+        )
+    ]
+
+
+async def list_resource_templates() -> list[ResourceTemplate]:
+    """List the templates of the resources' URIs."""
+    return [
+        ResourceTemplate(
+            uriTemplate=_PRECEDENT_URI_PREFIX + "{id}",
+            name="precedent",
+            description=(
+                "Precedente judicial já retornado por uma pesquisa, identificado pelo seu campo"
+                " `id`. É lido sem nova consulta ao tribunal."
+            ),
+            mimeType="application/json",
+        )
+    ]
+
+
+async def read_resource(uri: AnyUrl) -> list[ReadResourceContents]:
+    """Read a legal precedent previously seen by the server, without contacting its court."""
+    parsed_id = (
+        parse_precedent_id(str(uri).removeprefix(_PRECEDENT_URI_PREFIX))
+        if str(uri).startswith(_PRECEDENT_URI_PREFIX)
+        else None
+    )
+    stored_precedent = _STORE.find_precedent(*parsed_id) if parsed_id else None
+    if stored_precedent is None:
+        raise ValueError(f"Recurso {uri} não encontrado")
+
+    return [
+        ReadResourceContents(
+            content=_to_domain_precedent(stored_precedent).model_dump_json(),
+            mime_type="application/json",
+        )
+    ]
+
+
+async def _warm_up_browser() -> None:
+    """Launch the browser and start filling the courts' page pools ahead of the first tool
+    call."""
+    try:
+        await _BROWSER.start()
+    except Exception:
+        _LOGGER.warning("Failed to warm up the browser", exc_info=True)
+        return
+
+    STARTUP_TIMER.mark("browser_warmed_up")
+    STARTUP_TIMER.log_report()
+
+    for court in _DOMAIN_MODELS:
         try:
-            precedents = await method(
-                page,
-                summary_search_prompt=request.summary,
-                desired_page=request.page,
-            )
+            await _BROWSER.fill_page_pool(court)
         except Exception:
-            _LOGGER.exception("Error calling tool", extra={"tool_name": name})
-            raise
+            _LOGGER.warning(
+                "Failed to fill page pool", extra={"court": court}, exc_info=True
+            )
 
-    return (
-        [
-            TextContent(type="text", text=precedent.model_dump_json())
-            for precedent in precedents
-        ]
-        if precedents
-        else [TextContent(type="text", text="Nenhum resultado encontrado")]
-    )
 
+async def _warm_up_similarity_index() -> None:
+    """Index the stored legal precedents ahead of the first similarity search."""
+    try:
+        await asyncio.to_thread(lambda: _get_similarity_index().update())
+    except Exception:
+        _LOGGER.warning("Failed to warm up the similarity index", exc_info=True)
 
-async def _serve_stdio() -> None:
-    """Serve MCP over stdio (default behavior)."""
+
+async def _on_initialized(_: InitializedNotification) -> None:
+    """Warm up the browser and the similarity index, and start polling the saved queries in the
+    background as soon as the MCP handshake is completed."""
+    STARTUP_TIMER.mark("handshake_completed")
+
+    for warm_up in (_warm_up_browser, _warm_up_similarity_index):
+        task = asyncio.create_task(warm_up())
+        _BACKGROUND_TASKS.add(task)
+        task.add_done_callback(_BACKGROUND_TASKS.discard)
+
+    _POLLER.start()
+
+
+async def _shut_down() -> None:
+    """Stop the background work and release the resources held by the server."""
+    await _POLLER.stop()
+    await _BROWSER.close()
+    _STORE.close()
+
+
+def _create_server() -> Server:
+    """Create the MCP server with all of its handlers registered."""
     server = Server("brlaw_mcp_server")
 
     server.list_tools()(list_tools)
     server.call_tool()(call_tool)
+    server.list_resources()(list_resources)
+    server.list_resource_templates()(list_resource_templates)
+    server.read_resource()(read_resource)
+    server.notification_handlers[InitializedNotification] = _on_initialized
 
+    return server
+
+
+async def _serve_stdio() -> None:
+    """Serve MCP over stdio (default behavior)."""
+    server = _create_server()
     options = server.create_initialization_options()
 
-    async with stdio_server() as (read_stream, write_stream):
-        await server.run(read_stream, write_stream, options, raise_exceptions=True)
+    try:
+        async with stdio_server() as (read_stream, write_stream):
+            STARTUP_TIMER.mark("server_started")
+            await server.run(read_stream, write_stream, options, raise_exceptions=True)
+    finally:
+        await _shut_down()
 
 
 async def _serve_tcp(host: str, port: int) -> None:
     """Serve MCP over TCP network connection."""
-    server = Server("brlaw_mcp_server")
-
-    server.list_tools()(list_tools)
-    server.call_tool()(call_tool)
-
+    server = _create_server()
     options = server.create_initialization_options()
 
-    # Create TCP server
     tcp_server = await asyncio.start_server(
-        lambda reader, writer: _handle_client(server, options, reader, writer),
+        functools.partial(_handle_client, server, options),
         host,
-        port
+        port,
+        limit=MESSAGE_SIZE_LIMIT,
     )
 
     _LOGGER.info(f"MCP server listening on {host}:{port}")
+    STARTUP_TIMER.mark("server_started")
 
     try:
         async with tcp_server:
             await tcp_server.serve_forever()
     except KeyboardInterrupt:
         _LOGGER.info("Shutting down MCP server...")
+    finally:
+        await _shut_down()
 
 
-async def _handle_client(server: Server, options: dict, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+async def _handle_client(
+    server: Server,
+    options: "InitializationOptions",
+    reader: asyncio.StreamReader,
+    writer: asyncio.StreamWriter,
+) -> None:
     """Handle a single TCP client connection."""
-    client_addr = writer.get_extra_info('peername')
-    _LOGGER.info(f"Client connected from {client_addr}")
+    client_addr: object = writer.get_extra_info("peername")  # pyright: ignore[reportAny]
+    _LOGGER.info("Client connected", extra={"client": client_addr})
 
     try:
-        # Create a simple transport that bridges TCP to MCP
-        class TCPTransport:
-            def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
-                self.reader = reader
-                self.writer = writer
-
-            async def read(self) -> bytes:
-                data = await self.reader.readline()
-                return data
-
-            async def write(self, data: bytes) -> None:
-                self.writer.write(data)
-                await self.writer.drain()
-
-        transport = TCPTransport(reader, writer)
-
-        # Run the MCP server with this transport
-        await server.run(transport, transport, options, raise_exceptions=True)
-
-    except Exception as e:
-        _LOGGER.exception(f"Error handling client {client_addr}: {e}")
+        async with tcp_streams(reader, writer) as (read_stream, write_stream):
+            await server.run(read_stream, write_stream, options, raise_exceptions=True)
+    except Exception:
+        _LOGGER.exception("Error handling client", extra={"client": client_addr})
     finally:
         writer.close()
-        await writer.wait_closed()
-        _LOGGER.info(f"Client {client_addr} disconnected")
+        with contextlib.suppress(ConnectionError):
+            await writer.wait_closed()
+        _LOGGER.info("Client disconnected", extra={"client": client_addr})
 
 
 @click.command()
-@click.option('--tcp', is_flag=True, help='Run server over TCP instead of stdio')
-@click.option('--host', default='0.0.0.0', help='Host to bind to (TCP mode only)')
-@click.option('--port', default=8000, help='Port to bind to (TCP mode only)')
-def serve(tcp: bool, host: str, port: int) -> None:
+@click.option("--tcp", is_flag=True, help="Run server over TCP instead of stdio")
+@click.option("--host", default="0.0.0.0", help="Host to bind to (TCP mode only)")
+@click.option("--port", default=8000, help="Port to bind to (TCP mode only)")
+@click.option(
+    "--profile",
+    is_flag=True,
+    help="Profile each tool call, as if BRLAW_PROFILE were set",
+)
+def serve(tcp: bool, host: str, port: int, profile: bool) -> None:
     """Starts the MCP server."""
+    STARTUP_TIMER.mark("cli_invoked")
+
+    if profile:
+        _PROFILER.enabled = True
+
     if tcp:
         _LOGGER.info(f"Starting MCP server in TCP mode on {host}:{port}")
         asyncio.run(_serve_tcp(host, port))
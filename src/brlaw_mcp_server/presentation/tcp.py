@@ -0,0 +1,81 @@
+"""Transport of MCP messages over TCP connections.
+
+Messages are exchanged as newline-delimited JSON, just like over stdio, so the same framing serves
+both ends of a connection: the server serving a client and a client, such as the load tests,
+talking to the server."""
+
+import contextlib
+import logging
+from typing import TYPE_CHECKING, Final
+
+import anyio
+from mcp.shared.message import SessionMessage
+from mcp.types import JSONRPCMessage
+from pydantic import ValidationError
+
+if TYPE_CHECKING:
+    import asyncio
+    from collections.abc import AsyncGenerator
+
+    from anyio.streams.memory import MemoryObjectReceiveStream, MemoryObjectSendStream
+
+_LOGGER = logging.getLogger(__name__)
+
+MESSAGE_SIZE_LIMIT: Final = 16 * 1024 * 1024
+"""Maximum size of a message, in bytes. Connections must be opened with it as the limit of their
+stream readers, whose default is too small for tool results such as full texts."""
+
+
+@contextlib.asynccontextmanager
+async def tcp_streams(
+    reader: "asyncio.StreamReader", writer: "asyncio.StreamWriter"
+) -> "AsyncGenerator[tuple[MemoryObjectReceiveStream[SessionMessage | Exception], MemoryObjectSendStream[SessionMessage]], None]":
+    """Exchange MCP messages over a TCP connection.
+
+    :param reader: The connection's reader, opened with :data:`MESSAGE_SIZE_LIMIT` as its limit.
+    :param writer: The connection's writer. It's left open.
+    :return: The streams of the messages received and to be sent, as expected by MCP sessions.
+        Messages that can't be parsed are received as the exceptions raised parsing them."""
+    read_stream_writer, read_stream = anyio.create_memory_object_stream[
+        SessionMessage | Exception
+    ](0)
+    write_stream, write_stream_reader = anyio.create_memory_object_stream[
+        SessionMessage
+    ](0)
+
+    async def receive_messages() -> None:
+        async with read_stream_writer:
+            try:
+                while line := await reader.readline():
+                    try:
+                        message = JSONRPCMessage.model_validate_json(line)
+                    except ValidationError as e:
+                        await read_stream_writer.send(e)
+                        continue
+
+                    await read_stream_writer.send(SessionMessage(message))
+            except (anyio.ClosedResourceError, ConnectionError):
+                _LOGGER.debug("Stopped receiving messages", exc_info=True)
+
+    async def send_messages() -> None:
+        async with write_stream_reader:
+            try:
+                async for session_message in write_stream_reader:
+                    writer.write(
+                        session_message.message.model_dump_json(
+                            by_alias=True, exclude_none=True
+                        ).encode()
+                        + b"\n"
+                    )
+                    await writer.drain()
+            except (anyio.ClosedResourceError, ConnectionError):
+                _LOGGER.debug("Stopped sending messages", exc_info=True)
+
+    async with anyio.create_task_group() as task_group:
+        task_group.start_soon(receive_messages)
+        task_group.start_soon(send_messages)
+        try:
+            yield read_stream, write_stream
+        finally:
+            # The peer may keep the connection open after the session is over.
+            task_group.cancel_scope.cancel()
@@ -0,0 +1,216 @@
+"""Opt-in profiling of tool calls.
+
+Each profiled tool call is broken down into spans, timing its stages from leasing a browser page
+to serializing the results, while the thread running it is sampled to catch where CPU time goes,
+such as in the validation of the scraped legal precedents. Both are written per call in the folded
+stacks format read by flame graph tools, such as ``flamegraph.pl``, ``inferno`` and speedscope:
+spans weighted by microseconds and samples by count.
+
+This module must stay free of heavy imports, as spans are opened by every layer."""
+
+import asyncio
+import contextlib
+import itertools
+import logging
+import sys
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Final
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncGenerator, Generator
+    from types import FrameType
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass(eq=False)
+class _Span:
+    """A timed stage of a profiled tool call."""
+
+    name: str
+    started_at: float
+    duration: float = 0.0
+    children: "list[_Span]" = field(default_factory=list)
+
+    def fold(self, parent_path: str, weights: "Counter[str]") -> None:
+        """Add the microseconds spent in the span, but not in its children, to the weights of
+        the spans' paths."""
+        path = f"{parent_path};{self.name}" if parent_path else self.name
+        # Children running concurrently, such as the pages of a research, may add up to more
+        # than their parent.
+        weights[path] += max(
+            round(
+                (self.duration - sum(child.duration for child in self.children))
+                * 1_000_000
+            ),
+            0,
+        )
+        for child in self.children:
+            child.fold(path, weights)
+
+
+_CURRENT_SPAN: Final[ContextVar[_Span | None]] = ContextVar(
+    "current_span", default=None
+)
+"""Innermost span open in the current context, if a tool call is being profiled."""
+
+
+@contextlib.contextmanager
+def span(name: str) -> "Generator[None, None, None]":
+    """Time a stage of the tool call being profiled. It does nothing if there's none.
+
+    :param name: The name of the stage, free of semicolons."""
+    parent = _CURRENT_SPAN.get()
+    if parent is None:
+        yield
+        return
+
+    child = _Span(name, time.perf_counter())
+    parent.children.append(child)
+    token = _CURRENT_SPAN.set(child)
+    try:
+        yield
+    finally:
+        child.duration = time.perf_counter() - child.started_at
+        _CURRENT_SPAN.reset(token)
+
+
+@dataclass(eq=False)
+class _Recording:
+    """The spans and samples of a tool call being profiled."""
+
+    root: _Span
+    thread_id: int
+    """Identifier of the thread running the tool call, the one sampled."""
+    samples: "Counter[str]" = field(default_factory=Counter)
+
+
+def _fold_stack(frame: "FrameType | None") -> str:
+    """Fold a thread's stack, from its outermost frame to the given one."""
+    names: list[str] = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(
+            f"{code.co_qualname} ({Path(code.co_filename).name}:{code.co_firstlineno})"
+        )
+        frame = frame.f_back
+
+    return ";".join(reversed(names))
+
+
+class CallProfiler:
+    """Profiles tool calls, writing a profile of each to a directory."""
+
+    def __init__(
+        self, directory: Path, *, enabled: bool, sampling_interval: float
+    ) -> None:
+        """:param directory: Directory the profiles are written to. It's created when first
+            written to.
+        :param enabled: Whether tool calls are profiled. Otherwise, profiling costs nothing.
+        :param sampling_interval: Seconds between two samples of the stacks of the threads
+            running profiled tool calls. If 0, only spans are recorded."""
+        self.enabled: bool = enabled
+        self._directory: Path = directory
+        self._sampling_interval: float = sampling_interval
+        self._lock: threading.Lock = threading.Lock()
+        self._recordings: set[_Recording] = set()
+        self._sampler: threading.Thread | None = None
+        self._call_numbers: itertools.count[int] = itertools.count(1)
+
+    def _start_sampling(self, recording: _Recording) -> None:
+        """Sample the thread of a tool call until its recording is done, starting the sampler
+        if it isn't running."""
+        with self._lock:
+            self._recordings.add(recording)
+            if self._sampler is None:
+                self._sampler = threading.Thread(
+                    target=self._sample, name="profiler-sampler", daemon=True
+                )
+                self._sampler.start()
+
+    def _sample(self) -> None:
+        """Sample the stacks of the threads running profiled tool calls, until there are none."""
+        while True:
+            time.sleep(self._sampling_interval)
+
+            with self._lock:
+                if not self._recordings:
+                    self._sampler = None
+                    return
+
+                frames = sys._current_frames()  # pyright: ignore[reportPrivateUsage]
+                # Concurrent tool calls on the same event loop share its samples.
+                for recording in self._recordings:
+                    frame = frames.get(recording.thread_id)
+                    if frame is not None:
+                        recording.samples[_fold_stack(frame)] += 1
+
+    def _write(self, recording: _Recording) -> None:
+        """Write the spans and samples of a tool call's recording as folded stacks."""
+        stem = (
+            f"{datetime.now(UTC):%Y%m%dT%H%M%S}-{next(self._call_numbers)}"
+            f"-{recording.root.name.replace(':', '-')}"
+        )
+        span_weights: Counter[str] = Counter()
+        recording.root.fold("", span_weights)
+
+        try:
+            self._directory.mkdir(parents=True, exist_ok=True)
+            (self._directory / f"{stem}.spans.folded").write_text(
+                "".join(f"{path} {weight}\n" for path, weight in span_weights.items())
+            )
+            if recording.samples:
+                (self._directory / f"{stem}.samples.folded").write_text(
+                    "".join(
+                        f"{stack} {count}\n"
+                        for stack, count in recording.samples.items()
+                    )
+                )
+        except OSError:
+            _LOGGER.warning(
+                "Failed to write profile", extra={"profile": stem}, exc_info=True
+            )
+            return
+
+        _LOGGER.info(
+            "Profiled tool call",
+            extra={
+                "profile": stem,
+                "duration_ms": round(recording.root.duration * 1000, 1),
+                "samples": recording.samples.total(),
+            },
+        )
+
+    @contextlib.asynccontextmanager
+    async def profile(self, name: str) -> "AsyncGenerator[None, None]":
+        """Profile a tool call, if profiling is enabled.
+
+        Its profile is written once it's done, whether it succeeded or not, off the event loop.
+
+        :param name: The name of the tool call, free of semicolons."""
+        if not self.enabled:
+            yield
+            return
+
+        recording = _Recording(
+            root=_Span(name, time.perf_counter()), thread_id=threading.get_ident()
+        )
+        token = _CURRENT_SPAN.set(recording.root)
+        if self._sampling_interval > 0:
+            self._start_sampling(recording)
+
+        try:
+            yield
+        finally:
+            recording.root.duration = time.perf_counter() - recording.root.started_at
+            _CURRENT_SPAN.reset(token)
+            with self._lock:
+                self._recordings.discard(recording)
+
+            await asyncio.to_thread(self._write, recording)
@@ -0,0 +1,137 @@
+"""Runtime settings of the MCP server.
+
+Every setting can be overridden through an environment variable named after it, upper-cased and
+prefixed with ``BRLAW_``. For instance, ``BRLAW_CIRCUIT_BREAKER_FAILURE_THRESHOLD=3``."""
+
+import functools
+import os
+from pathlib import Path
+from typing import ClassVar, Final, Self
+
+from pydantic import BaseModel, ConfigDict, Field
+
+_ENV_PREFIX: Final = "BRLAW_"
+
+
+def _default_cache_dir() -> Path:
+    return (
+        Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache")
+        / "brlaw_mcp_server"
+    )
+
+
+class Settings(BaseModel):
+    """Settings of the MCP server."""
+
+    model_config: ClassVar[ConfigDict] = ConfigDict(frozen=True)
+
+    cache_dir: Path = Field(default_factory=_default_cache_dir)
+    """Directory where data worth keeping between runs is stored."""
+
+    research_timeout: float = Field(default=45.0, gt=0)
+    """Seconds a single research attempt may take before it's considered failed."""
+
+    tool_call_deadline: float = Field(default=120.0, gt=0)
+    """Seconds a tool call may take overall, across every attempt and page of results it needs.
+    Each stage of a research may use a share of the time left."""
+
+    research_attempts: int = Field(default=3, ge=1)
+    """How many times a research is attempted before giving up."""
+
+    retry_base_delay: float = Field(default=0.5, ge=0)
+    """Base of the exponential backoff between research attempts, in seconds."""
+
+    retry_max_delay: float = Field(default=5.0, ge=0)
+    """Upper bound of the backoff between research attempts, in seconds."""
+
+    hedge_delay: float | None = Field(default=None, gt=0)
+    """Seconds after which a duplicate research is fired if the first one hasn't finished yet.
+
+    Hedging is disabled when unset, as every hedged request doubles the load on the court."""
+
+    circuit_breaker_failure_threshold: int = Field(default=5, ge=1)
+    """Consecutive failures after which a court is considered unhealthy."""
+
+    circuit_breaker_reset_timeout: float = Field(default=60.0, gt=0)
+    """Seconds an unhealthy court is left alone before it's probed again."""
+
+    cache_ttl: float = Field(default=15 * 60, ge=0)
+    """Seconds a cached result page is served without contacting the court. Past it, the page is
+    revalidated by probing the court for a fingerprint of its results, and only researched again
+    if they changed."""
+
+    cache_stale_ttl: float = Field(default=24 * 60 * 60, ge=0)
+    """Seconds a cached result page is kept, to be revalidated or served, flagged as stale, while
+    its court is unhealthy."""
+
+    cache_max_entries: int = Field(default=512, ge=1)
+    """Maximum number of result pages kept in the cache."""
+
+    memory_budget_mb: int | None = Field(default=None, gt=0)
+    """Memory budget of the server and its browser, in mebibytes.
+
+    Browser contexts are recycled when the memory usage approaches it, and new researches are
+    refused when it's nearly exhausted. Memory is only measured when unset."""
+
+    context_max_uses: int = Field(default=50, ge=1)
+    """How many researches a browser context serves before being recycled."""
+
+    page_pool_size: int = Field(default=2, ge=0)
+    """How many idle pages already on its search form are kept ready for each court."""
+
+    storage_state_max_age: float = Field(default=12 * 60 * 60, ge=0)
+    """Seconds a court's persisted browser storage state is reused for. If 0, every browser
+    context starts clean."""
+
+    storage_state_refresh_interval: float = Field(default=30 * 60, gt=0)
+    """Seconds between two saves of a browser context's storage state."""
+
+    near_duplicate_threshold: float = Field(default=0.7, gt=0, le=1)
+    """Minimum similarity, from 0 to 1, of the summaries of legal precedents collapsed into a
+    single result as near duplicates. If 1, only summaries with the same words are collapsed."""
+
+    saved_query_poll_interval: float = Field(default=6 * 60 * 60, gt=0)
+    """Seconds between two polls of a saved query for new legal precedents."""
+
+    saved_query_max_pages: int = Field(default=3, ge=1)
+    """Maximum number of result pages fetched when polling a saved query."""
+
+    full_text_part_length: int = Field(default=20_000, ge=1_000)
+    """Maximum number of characters of full texts returned at once."""
+
+    resource_list_limit: int = Field(default=100, ge=1)
+    """Maximum number of legal precedents listed as resources, the most recently seen first."""
+
+    profile: bool = False
+    """Whether each tool call is profiled, writing its spans and stack samples to the profile
+    directory."""
+
+    profile_dir: Path | None = None
+    """Directory the profiles of tool calls are written to. If unset, a directory in the cache
+    directory."""
+
+    profile_sampling_interval: float = Field(default=0.005, ge=0)
+    """Seconds between two stack samples of a profiled tool call. If 0, only its spans are
+    recorded."""
+
+    court_origin: str | None = None
+    """Origin, such as ``http://127.0.0.1:8080``, the courts' websites are served from in place of
+    their own, for load tests against a mock court. Requests to a court's host are sent to it, with
+    the host as the first segment of the path."""
+
+    @classmethod
+    def from_env(cls) -> Self:
+        """Build the settings from the environment variables."""
+        return cls.model_validate(
+            {
+                name: value
+                for name in cls.model_fields
+                if (value := os.environ.get(_ENV_PREFIX + name.upper())) is not None
+            }
+        )
+
+
+@functools.cache
+def get_settings() -> Settings:
+    """Get the settings of the current process."""
+    return Settings.from_env()
@@ -1,24 +1,63 @@
+import io
+import re
+import unicodedata
 from contextlib import asynccontextmanager
-from typing import TYPE_CHECKING
-
-from patchright.async_api import async_playwright
+from typing import TYPE_CHECKING, Final
 
 if TYPE_CHECKING:
     from collections.abc import AsyncGenerator
 
     from patchright.async_api import BrowserContext
 
+USER_AGENT: Final = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/137.0.0.0 Safari/537.36"
+
+_WORD_PATTERN: Final = re.compile(r"\w+")
+
 
 @asynccontextmanager
 async def browser_factory(
     headless: bool = True,
 ) -> "AsyncGenerator[BrowserContext, None]":
+    # Deferred, as the driver is heavy and most callers don't need it at import time.
+    from patchright.async_api import async_playwright  # noqa: PLC0415
+
     async with (
         async_playwright() as playwright,
         await playwright.chromium.launch(headless=headless) as browser,
     ):
-        yield await browser.new_context(
-            extra_http_headers={
-                "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/137.0.0.0 Safari/537.36"
-            }
-        )
+        yield await browser.new_context(extra_http_headers={"User-Agent": USER_AGENT})
+
+
+def pdf_to_text(data: bytes) -> str:
+    """Extract the text of a PDF document, page by page.
+
+    :param data: The PDF document.
+    :raises RuntimeError: If the optional ``pdf`` dependencies aren't installed."""
+    try:
+        # Deferred, as it's an optional dependency.
+        from pypdf import PdfReader  # noqa: PLC0415
+    except ImportError as e:
+        raise RuntimeError(
+            "Extracting the text of PDF documents requires the `pdf` extra to be installed"
+        ) from e
+
+    return "\n\n".join(
+        page.extract_text() for page in PdfReader(io.BytesIO(data)).pages
+    )
+
+
+def normalize_text(text: str) -> str:
+    """Lower-case a text and strip it of accents, so that differently written versions of the
+    same Portuguese text compare equal.
+
+    :param text: The text."""
+    return (
+        unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode().lower()
+    )
+
+
+def split_words(text: str) -> list[str]:
+    """Split a text into its normalized words.
+
+    :param text: The text."""
+    return _WORD_PATTERN.findall(normalize_text(text))
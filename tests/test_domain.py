@@ -1,13 +1,27 @@
 import asyncio
+from datetime import date
+from typing import TYPE_CHECKING
 
 import pytest
+from pydantic import ValidationError
 
-from brlaw_mcp_server.domain.base import BaseLegalPrecedent
+from brlaw_mcp_server.domain.base import (
+    BaseLegalPrecedent,
+    DocumentType,
+    SearchFilters,
+    parse_number_of_results,
+    parse_precedent_id,
+)
+from brlaw_mcp_server.domain.near_duplicates import group_near_duplicates
+from brlaw_mcp_server.domain.ranking import rank_by_relevance
 from brlaw_mcp_server.domain.stf import StfLegalPrecedent
 from brlaw_mcp_server.domain.stj import StjLegalPrecedent
 from brlaw_mcp_server.domain.tst import TstLegalPrecedent
 from brlaw_mcp_server.utils import browser_factory
 
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable
+
 
 @pytest.mark.parametrize(
     ("summary", "should_return_results"),
@@ -55,3 +69,207 @@ async def test_research_legal_precedents(
                 return
 
             assert all(isinstance(precedent, class_) for precedent in precedents)
+
+
+def test_search_filters_reject_empty_date_range() -> None:
+    """Test that a judgment date range ending before it starts is rejected."""
+    with pytest.raises(ValidationError):
+        SearchFilters(
+            judgment_date_start=date(2024, 1, 1), judgment_date_end=date(2020, 1, 1)
+        )
+
+
+def test_stf_filters_are_pushed_down() -> None:
+    """Test that filters are translated into the STF search engine's query parameters."""
+    params = StfLegalPrecedent._get_filter_params(  # pyright: ignore[reportPrivateUsage]
+        SearchFilters(
+            judgment_date_start=date(2020, 1, 1),
+            judgment_date_end=date(2024, 12, 31),
+            judging_body="Primeira Turma",
+            document_type=DocumentType.MONOCRATIC_DECISION,
+        )
+    )
+
+    assert params == {
+        "base": "decisoes",
+        "julgamento_data": "01012020-31122024",
+        "orgao_julgador": "Primeira Turma",
+    }
+
+
+@pytest.mark.parametrize(
+    ("text", "expected"),
+    [
+        pytest.param("1.234 documentos encontrados", 1234, id="thousands_separator"),
+        pytest.param("Acórdãos: 87 documento(s)", 87, id="plural_suffix"),
+        pytest.param("Exibindo 1 - 20 de 300 resultados", 300, id="range"),
+        pytest.param("Nenhum documento encontrado!", None, id="no_number"),
+    ],
+)
+def test_number_of_results_is_parsed(text: str, expected: int | None) -> None:
+    """Test that the number of results is parsed out of the search engines' texts."""
+    assert parse_number_of_results(text) == expected
+
+
+@pytest.mark.parametrize(
+    ("url", "expected"),
+    [
+        pytest.param(
+            "https://processo.stj.jus.br/SCON/GetInteiroTeorDoAcordao?num_registro=1",
+            True,
+            id="subdomain",
+        ),
+        pytest.param("https://stj.jus.br/", True, id="domain"),
+        pytest.param("https://stj.jus.br.example.com/", False, id="lookalike_domain"),
+        pytest.param("https://tst.jus.br/", False, id="other_court"),
+        pytest.param("file:///etc/passwd", False, id="other_scheme"),
+    ],
+)
+def test_full_texts_are_only_fetched_from_the_court(url: str, expected: bool) -> None:
+    """Test that only URLs of the court's websites are considered full text URLs."""
+    assert StjLegalPrecedent.is_court_url(url) is expected
+
+
+class _FullTextResponse:
+    ok: bool = True
+    status: int = 200
+
+    def __init__(self, content_type: str) -> None:
+        self.headers: dict[str, str] = {"content-type": content_type}
+
+    async def body(self) -> bytes:
+        return b"%PDF-1.7"
+
+
+class _FullTextRoute:
+    def __init__(self) -> None:
+        self.fulfilled_with: list[object] = []
+
+    async def fulfill(self, *, response: object) -> None:
+        self.fulfilled_with.append(response)
+
+
+class _FullTextPage:
+    """Browser page serving full texts, which records how they're downloaded."""
+
+    def __init__(self, content_type: str = "text/html; charset=utf-8") -> None:
+        self.content_type: str = content_type
+        self.request: _FullTextPage = self
+        self.downloads: list[str] = []
+        self.served_route: _FullTextRoute = _FullTextRoute()
+        self._routes: list[
+            tuple[Callable[[str], bool], Callable[[object], Awaitable[None]]]
+        ] = []
+
+    async def get(self, url: str) -> _FullTextResponse:
+        self.downloads.append(url)
+        return _FullTextResponse(self.content_type)
+
+    async def route(
+        self,
+        matcher: "Callable[[str], bool]",
+        handler: "Callable[[object], Awaitable[None]]",
+    ) -> None:
+        self._routes.append((matcher, handler))
+
+    async def unroute(
+        self,
+        matcher: "Callable[[str], bool]",
+        handler: "Callable[[object], Awaitable[None]]",
+    ) -> None:
+        self._routes.remove((matcher, handler))
+
+    async def goto(self, url: str) -> None:
+        for matcher, handler in self._routes:
+            if matcher(url):
+                await handler(self.served_route)
+                return
+
+        self.downloads.append(url)
+
+    def locator(self, _: str) -> "_FullTextPage":
+        return self
+
+    async def inner_text(self) -> str:
+        return "Inteiro teor"
+
+
+async def test_html_full_texts_are_downloaded_once() -> None:
+    """Test that a full text's page is rendered from the response already downloaded."""
+    url = "https://processo.stj.jus.br/SCON/GetInteiroTeorDoAcordao?num_registro=1"
+    page = _FullTextPage()
+
+    full_text = await StjLegalPrecedent.fetch_full_text(page, url)  # pyright: ignore[reportArgumentType]
+
+    assert full_text == "Inteiro teor"
+    assert page.downloads == [url]
+    assert len(page.served_route.fulfilled_with) == 1
+    assert page._routes == [], "the route should be removed once the page is loaded"  # pyright: ignore[reportPrivateUsage]
+
+
+async def test_pdf_full_texts_are_returned_as_downloaded() -> None:
+    """Test that PDF full texts are left for the caller to extract, without loading them."""
+    url = "https://processo.stj.jus.br/SCON/GetInteiroTeorDoAcordao?num_registro=1"
+    page = _FullTextPage("application/pdf")
+
+    full_text = await StjLegalPrecedent.fetch_full_text(page, url)  # pyright: ignore[reportArgumentType]
+
+    assert full_text == b"%PDF-1.7"
+    assert page.downloads == [url]
+    assert page.served_route.fulfilled_with == []
+
+
+def test_precedent_ids_are_stable() -> None:
+    """Test that a legal precedent's identifier depends only on its court and summary's words."""
+    precedent = StjLegalPrecedent(summary="RECURSO ESPECIAL.  Provido.")
+
+    assert precedent.id == StjLegalPrecedent(summary="RECURSO ESPECIAL.\nProvido.").id
+    assert precedent.id != TstLegalPrecedent(summary="RECURSO ESPECIAL. Provido.").id
+    assert precedent.model_dump()["id"] == precedent.id
+    assert parse_precedent_id(precedent.id) == (
+        StjLegalPrecedent.court,
+        precedent.content_hash[:16],
+    )
+    assert parse_precedent_id("stj-not-an-id") is None
+
+
+def test_near_duplicates_are_grouped() -> None:
+    """Test that nearly identical summaries are grouped, regardless of accents and case."""
+    summary = (
+        "PROCESSUAL CIVIL. EXECUÇÃO FISCAL. FRAUDE À EXECUÇÃO. ALIENAÇÃO DO BEM APÓS A "
+        "CITAÇÃO DO DEVEDOR. PRESUNÇÃO ABSOLUTA DE FRAUDE. SÚMULA 375/STJ. INAPLICABILIDADE "
+        "AOS EXECUTIVOS FISCAIS. RECURSO ESPECIAL PROVIDO."
+    )
+    original = StjLegalPrecedent(summary=summary)
+    appeal = StjLegalPrecedent(
+        summary="Embargos de declaração. "
+        + summary.lower().replace("ç", "c").replace("ã", "a")
+    )
+    unrelated = StjLegalPrecedent(
+        summary="TRIBUTÁRIO. IMPOSTO DE RENDA. ISENÇÃO. MOLÉSTIA GRAVE. RECURSO DESPROVIDO."
+    )
+
+    assert group_near_duplicates(
+        [original, unrelated, appeal, original], threshold=0.7
+    ) == [[original, appeal, original], [unrelated]]
+
+
+def test_precedents_are_ranked_by_relevance() -> None:
+    """Test that summaries are ranked by the search criteria, understanding the courts'
+    operators."""
+    unrelated = StjLegalPrecedent(summary="TRIBUTÁRIO. IMPOSTO DE RENDA. ISENÇÃO.")
+    negated = StjLegalPrecedent(summary="PENAL. PRISÃO PREVENTIVA. REVOGAÇÃO.")
+    scattered = StjLegalPrecedent(
+        summary="PENAL. FURTO QUALIFICADO. VEÍCULO ESTACIONADO. RESPONSABILIDADE CIVIL."
+    )
+    relevant = StjLegalPrecedent(
+        summary="CIVIL. FURTO DE VEÍCULO EM ESTACIONAMENTO DE SUPERMERCADO. RESPONSABILIDADE."
+    )
+
+    assert rank_by_relevance(
+        [unrelated, negated, scattered, relevant],
+        '"furto de veículo" e supermerc$ NÃO (prisão OU preventiva)',
+    ) == [relevant, unrelated, negated, scattered]
+    assert rank_by_relevance(
+        [unrelated, negated, scattered, relevant], "furto prox5 veículo"
+    ) == [scattered, relevant, unrelated, negated]
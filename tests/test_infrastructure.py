@@ -0,0 +1,687 @@
+"""Tests for the infrastructure supporting the research of legal precedents."""
+
+import asyncio
+import contextlib
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+from pydantic import BaseModel
+
+from brlaw_mcp_server.deadlines import DeadlineExceededError, Stage, deadline, stage
+from brlaw_mcp_server.domain.base import Court
+from brlaw_mcp_server.domain.stj import StjLegalPrecedent
+from brlaw_mcp_server.domain.tst import TstLegalPrecedent
+from brlaw_mcp_server.infrastructure.browser import BrowserManager
+from brlaw_mcp_server.infrastructure.cache import ResultCache, SingleFlight
+from brlaw_mcp_server.infrastructure.memory import (
+    MemoryBudgetExceededError,
+    MemoryGovernor,
+    MemorySnapshot,
+    take_snapshot,
+)
+from brlaw_mcp_server.infrastructure.polling import SavedQueryPoller
+from brlaw_mcp_server.infrastructure.resilience import (
+    CircuitBreaker,
+    CircuitState,
+    CourtHealth,
+    CourtHealthTracker,
+    CourtUnavailableError,
+    hedged,
+    retry_with_jitter,
+)
+from brlaw_mcp_server.infrastructure.schema_cache import load_json_schemas
+from brlaw_mcp_server.infrastructure.similarity import SimilarityIndex
+from brlaw_mcp_server.infrastructure.startup import StartupTimer
+from brlaw_mcp_server.infrastructure.storage_state import StorageStateStore
+from brlaw_mcp_server.infrastructure.store import PrecedentStore, SavedQuery
+from brlaw_mcp_server.profiling import CallProfiler, span
+
+
+class _FakeClock:
+    """Manually advanced clock."""
+
+    def __init__(self) -> None:
+        self.now: float = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_circuit_breaker_opens_and_recovers() -> None:
+    """Test the whole lifecycle of a circuit breaker."""
+    clock = _FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=clock)
+
+    breaker.record_failure()
+    assert breaker.allow_request()
+
+    breaker.record_failure()
+    assert breaker.state is CircuitState.OPEN
+    assert not breaker.allow_request()
+
+    clock.now = 10
+    assert breaker.allow_request()
+    assert not breaker.allow_request(), "only one probe is allowed while half-open"
+
+    breaker.record_failure()
+    assert breaker.state is CircuitState.OPEN
+
+    clock.now = 20
+    assert breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state is CircuitState.CLOSED
+
+
+async def test_court_health_fails_fast_while_unhealthy() -> None:
+    """Test that an unhealthy court isn't contacted."""
+    health = CourtHealthTracker(failure_threshold=1, reset_timeout=60)[Court.STJ]
+    calls = 0
+
+    async def failing() -> None:
+        nonlocal calls
+        calls += 1
+        raise RuntimeError("court is down")
+
+    with pytest.raises(RuntimeError):
+        await health.call(failing)
+
+    with pytest.raises(CourtUnavailableError):
+        await health.call(failing)
+
+    assert calls == 1
+
+
+async def test_court_health_releases_cancelled_probe() -> None:
+    """Test that a half-open breaker's probe cancelled before the court answered doesn't keep
+    other probes from being let through."""
+    clock = _FakeClock()
+    health = CourtHealth(
+        court=Court.STJ,
+        breaker=CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=clock),
+    )
+    health.breaker.record_failure()
+    clock.now = 10
+
+    with pytest.raises(TimeoutError):
+        async with asyncio.timeout(0.01):
+            await health.call(lambda: asyncio.sleep(1))
+
+    assert health.failures == 0
+    assert health.breaker.state is CircuitState.HALF_OPEN
+    await health.call(lambda: asyncio.sleep(0))
+    assert health.breaker.state is CircuitState.CLOSED
+
+
+async def test_retry_with_jitter() -> None:
+    """Test that failures are retried until the attempts are exhausted."""
+    calls = 0
+
+    async def flaky() -> str:
+        nonlocal calls
+        calls += 1
+        if calls < 3:
+            raise RuntimeError("transient failure")
+        return "ok"
+
+    assert await retry_with_jitter(flaky, attempts=3, base_delay=0, max_delay=0) == "ok"
+
+    calls = 0
+    with pytest.raises(RuntimeError):
+        await retry_with_jitter(flaky, attempts=2, base_delay=0, max_delay=0)
+
+
+async def test_hedged_returns_fastest_call() -> None:
+    """Test that a slow call is hedged by a faster one."""
+    delays = [10.0, 0.0]
+
+    async def call() -> float:
+        delay = delays.pop(0)
+        await asyncio.sleep(delay)
+        return delay
+
+    async with asyncio.timeout(1):
+        assert await hedged(call, delay=0.01) == 0.0
+
+
+def test_result_cache_freshness() -> None:
+    """Test that entries go from fresh to stale to expired."""
+    clock = _FakeClock()
+    cache: ResultCache[str] = ResultCache(
+        ttl=10, stale_ttl=100, max_entries=1, clock=clock
+    )
+    cache.put("key", "value")
+
+    entry = cache.get("key")
+    assert entry is not None
+    assert entry.is_fresh
+
+    clock.now = 50
+    entry = cache.get("key")
+    assert entry is not None
+    assert not entry.is_fresh
+
+    clock.now = 101
+    assert cache.get("key") is None
+
+    cache.put("key", "value")
+    cache.put("other key", "value")
+    assert cache.get("key") is None, "least recently used entry should be evicted"
+
+
+async def test_single_flight_deduplicates_concurrent_calls() -> None:
+    """Test that concurrent calls sharing a key are made only once."""
+    single_flight: SingleFlight[str, int] = SingleFlight()
+    calls = 0
+
+    async def call() -> int:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return calls
+
+    assert await asyncio.gather(
+        single_flight.run("key", call), single_flight.run("key", call)
+    ) == [1, 1]
+    assert await single_flight.run("key", call) == 2, "finished calls aren't reused"
+
+
+async def test_single_flight_cancels_abandoned_calls() -> None:
+    """Test that a shared call outlives a cancelled caller, but not all of them."""
+    single_flight: SingleFlight[str, int] = SingleFlight()
+    started = asyncio.Event()
+    cancelled = asyncio.Event()
+
+    async def call() -> int:
+        started.set()
+        try:
+            await asyncio.sleep(0.05)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+        return 1
+
+    first = asyncio.create_task(single_flight.run("key", call))
+    second = asyncio.create_task(single_flight.run("key", call))
+    await started.wait()
+    first.cancel()
+    assert await second == 1
+    assert not cancelled.is_set()
+
+    started.clear()
+    third = asyncio.create_task(single_flight.run("key", call))
+    await started.wait()
+    third.cancel()
+    await asyncio.sleep(0.01)
+    assert cancelled.is_set()
+
+
+def test_json_schemas_are_cached(tmp_path: Path) -> None:
+    """Test that JSON schemas are generated once and then read from the cache."""
+
+    class Model(BaseModel):
+        field: int
+
+    schemas = load_json_schemas([Model], tmp_path)
+    assert schemas == {"Model": Model.model_json_schema()}
+
+    (cache_file,) = tmp_path.iterdir()
+    cache_file.write_text('{"Model": {"cached": true}}')
+    assert load_json_schemas([Model], tmp_path) == {"Model": {"cached": True}}
+
+
+def test_startup_timer() -> None:
+    """Test that only the first time a milestone is reached is recorded."""
+    clock = _FakeClock()
+    timer = StartupTimer(clock)
+
+    clock.now = 0.5
+    timer.mark("first")
+    clock.now = 1.0
+    timer.mark("second")
+    timer.mark("first")
+
+    assert timer.report() == {"first": 500.0, "second": 1000.0}
+
+
+def test_memory_governor_thresholds() -> None:
+    """Test when the memory governor recycles and refuses work."""
+    mebibyte = 1024 * 1024
+    governor = MemoryGovernor(budget_mb=100, snapshot_taker=lambda: None)
+
+    low = MemorySnapshot(server_rss=10 * mebibyte, browser_rss=10 * mebibyte)
+    high = MemorySnapshot(server_rss=10 * mebibyte, browser_rss=75 * mebibyte)
+    exhausted = MemorySnapshot(server_rss=10 * mebibyte, browser_rss=90 * mebibyte)
+
+    assert not governor.is_over_recycle_threshold(low)
+    assert governor.is_over_recycle_threshold(high)
+    governor.check_lease(high)
+    with pytest.raises(MemoryBudgetExceededError):
+        governor.check_lease(exhausted)
+
+    governor.record_lease(Court.STF, low, high)
+    assert governor.report() == {
+        "STF": {"leases": 1, "peak_total_rss_mb": 85.0, "mean_rss_growth_mb": 65.0}
+    }
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="Requires procfs")
+def test_memory_snapshot_includes_child_processes() -> None:
+    """Test that the memory of spawned processes, such as the browser's, is measured."""
+    without_child = take_snapshot()
+    with subprocess.Popen(
+        [sys.executable, "-c", "input()"], stdin=subprocess.PIPE
+    ) as child:
+        try:
+            with_child = take_snapshot()
+        finally:
+            child.communicate(b"\n")
+
+    assert without_child is not None
+    assert with_child is not None
+    assert with_child.server_rss > 0
+    assert with_child.browser_rss > without_child.browser_rss
+
+
+async def test_saved_query_polling_reports_only_new_precedents(tmp_path: Path) -> None:
+    """Test that saved queries are polled incrementally, stopping at known precedents."""
+    results = [
+        [StjLegalPrecedent(summary=f"Ementa {i}") for i in range(page, page + 2)]
+        for page in range(0, 10, 2)
+    ]
+    requested_pages: list[int] = []
+
+    async def research(_: SavedQuery, page: int) -> list[StjLegalPrecedent]:
+        requested_pages.append(page)
+        return results[page - 1]
+
+    store = PrecedentStore(tmp_path / "store.sqlite3")
+    poller = SavedQueryPoller(store=store, research=research, interval=60, max_pages=3)
+    store.save_query(name="query", court=Court.STJ, summary="ementa", filters=None)
+
+    query = store.get_query("query")
+    assert query is not None
+    assert await poller.poll(query) == 0, "the first poll should only set a baseline"
+    assert requested_pages == [1, 2, 3]
+
+    # A new precedent is published, pushing the others to later pages.
+    results[0].insert(0, StjLegalPrecedent(summary="Ementa nova"))
+    requested_pages.clear()
+
+    query = store.get_query("query")
+    assert query is not None
+    assert await poller.poll(query) == 1
+    assert requested_pages == [1], "paging should stop at the first known precedent"
+    assert [precedent.summary for precedent in store.take_new_precedents("query")] == [
+        "Ementa nova"
+    ]
+    assert store.take_new_precedents("query") == []
+
+    assert store.delete_query("query")
+    assert store.get_query("query") is None
+
+
+def test_store_tracks_when_precedents_were_last_seen(tmp_path: Path) -> None:
+    """Test that precedents seen again are listed first and get their missing full text URLs."""
+    store = PrecedentStore(tmp_path / "store.sqlite3")
+    first, second = (
+        StjLegalPrecedent(summary="Ementa 1"),
+        StjLegalPrecedent(summary="Ementa 2"),
+    )
+    store.record_precedents([first])
+    store.record_precedents([second])
+
+    store.record_precedents(
+        [first.model_copy(update={"full_text_url": "https://stj.jus.br/1"})]
+    )
+
+    listed = store.list_precedents(limit=2)
+    assert [precedent.summary for precedent in listed] == ["Ementa 1", "Ementa 2"]
+    assert listed[0].full_text_url == "https://stj.jus.br/1"
+    assert listed[0].last_seen_at >= listed[0].first_seen_at
+
+
+def test_store_migrates_older_databases(tmp_path: Path) -> None:
+    """Test that a database created before precedents' last sighting was tracked still works."""
+    path = tmp_path / "store.sqlite3"
+    with contextlib.closing(sqlite3.connect(path)) as connection, connection:
+        connection.execute(
+            """
+            CREATE TABLE precedents (
+                content_hash TEXT PRIMARY KEY,
+                court TEXT NOT NULL,
+                summary TEXT NOT NULL,
+                full_text_url TEXT,
+                first_seen_at TEXT NOT NULL
+            )
+            """
+        )
+        connection.execute(
+            "INSERT INTO precedents VALUES ('abc', 'STJ', 'Ementa', NULL, ?)",
+            ("2025-01-01T00:00:00+00:00",),
+        )
+
+    store = PrecedentStore(path)
+    store.record_precedents([StjLegalPrecedent(summary="Ementa nova")])
+
+    listed = store.list_precedents(limit=2)
+    assert [precedent.summary for precedent in listed] == ["Ementa nova", "Ementa"]
+    assert listed[1].last_seen_at == listed[1].first_seen_at
+
+
+class _FakePage:
+    """Page that only tracks whether it's closed."""
+
+    def __init__(self) -> None:
+        self.closed: bool = False
+
+    def is_closed(self) -> bool:
+        return self.closed
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+class _FakeContext:
+    """Browser context opening fake pages."""
+
+    def __init__(self) -> None:
+        self.pages: list[_FakePage] = []
+
+    async def new_page(self) -> _FakePage:
+        self.pages.append(_FakePage())
+        return self.pages[-1]
+
+    async def close(self) -> None:
+        for page in self.pages:
+            page.closed = True
+
+    async def storage_state(self) -> dict[str, list[object]]:
+        return {"cookies": [], "origins": []}
+
+
+class _FakeBrowser:
+    """Browser opening fake contexts."""
+
+    def __init__(self) -> None:
+        self.storage_states: list[object] = []
+
+    async def new_context(self, **kwargs: object) -> _FakeContext:
+        self.storage_states.append(kwargs.get("storage_state"))
+        return _FakeContext()
+
+
+async def test_browser_pools_prepared_pages(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that leased pages are taken back to the search form and reused."""
+    prepared_pages: list[_FakePage] = []
+
+    async def prepare(page: _FakePage) -> None:
+        await asyncio.sleep(0)
+        prepared_pages.append(page)
+
+    async def start() -> _FakeBrowser:
+        return _FakeBrowser()
+
+    manager = BrowserManager(
+        context_max_uses=10,
+        memory_governor=MemoryGovernor(budget_mb=None, snapshot_taker=lambda: None),
+        page_pool_size=1,
+        page_preparers={Court.STJ: prepare},  # pyright: ignore[reportArgumentType]
+    )
+    monkeypatch.setattr(manager, "start", start)
+
+    async with manager.lease(Court.STJ) as first_page:
+        pass
+    await asyncio.sleep(0.01)
+    assert prepared_pages == [first_page]
+    assert not first_page.is_closed(), "the page should be kept in the pool"
+
+    leased_pages: list[object] = []
+
+    async def fail_research() -> None:
+        async with manager.lease(Court.STJ) as page:
+            leased_pages.append(page)
+            raise RuntimeError
+
+    with pytest.raises(RuntimeError):
+        await fail_research()
+
+    assert leased_pages == [first_page]
+    assert first_page.is_closed(), "pages of failed researches should be discarded"
+
+    async def cancelled_research() -> None:
+        async with manager.lease(Court.STJ) as page:
+            leased_pages.append(page)
+            await asyncio.sleep(1)
+
+    research = asyncio.create_task(cancelled_research())
+    await asyncio.sleep(0.01)
+    research.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await research
+    await asyncio.sleep(0.01)
+    assert prepared_pages[-1] is leased_pages[-1], (
+        "pages of cancelled researches should be reset and pooled"
+    )
+    assert not prepared_pages[-1].is_closed()
+
+    async with manager.lease(Court.TST) as tst_page:
+        pass
+    assert tst_page.is_closed(), (
+        "pages of courts without a preparer shouldn't be pooled"
+    )
+
+    await manager.close()
+
+
+async def test_browser_storage_state_is_reused_unless_rejected(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test that contexts start from the persisted storage state, which is discarded if the
+    court rejects it."""
+    storage_states = StorageStateStore(tmp_path, max_age=60, refresh_interval=60)
+    browser = _FakeBrowser()
+
+    async def start() -> _FakeBrowser:
+        return browser
+
+    def create_manager() -> BrowserManager:
+        manager = BrowserManager(
+            context_max_uses=10,
+            memory_governor=MemoryGovernor(budget_mb=None, snapshot_taker=lambda: None),
+            storage_states=storage_states,
+        )
+        monkeypatch.setattr(manager, "start", start)
+        return manager
+
+    manager = create_manager()
+    async with manager.lease(Court.STJ):
+        pass
+    await manager.close()
+    assert storage_states.load(Court.STJ) == {"cookies": [], "origins": []}
+
+    manager = create_manager()
+
+    async def fail_research() -> None:
+        async with manager.lease(Court.STJ):
+            raise RuntimeError
+
+    with pytest.raises(RuntimeError):
+        await fail_research()
+
+    assert browser.storage_states == [None, {"cookies": [], "origins": []}]
+    assert storage_states.load(Court.STJ) is None
+
+    async with manager.lease(Court.STJ):
+        pass
+    assert browser.storage_states[-1] is None, "the next context should start clean"
+
+
+def test_similarity_index_finds_similar_precedents(tmp_path: Path) -> None:
+    """Test that the stored legal precedents are ranked by similarity, as they're stored."""
+    store = PrecedentStore(tmp_path / "store.sqlite3")
+    index = SimilarityIndex(store)
+    query = StjLegalPrecedent(
+        summary="Fraude à execução fiscal. Alienação após a citação."
+    )
+    close = StjLegalPrecedent(summary="Execução fiscal. Fraude. Alienação do imóvel.")
+    distant = StjLegalPrecedent(summary="Execução de alimentos. Prisão civil.")
+    store.record_precedents(
+        [
+            query,
+            distant,
+            close,
+            StjLegalPrecedent(summary="Imposto de renda. Isenção."),
+        ]
+    )
+
+    assert [
+        similar.content_hash
+        for similar in index.search(
+            query.summary, courts=[Court.STJ], limit=5, exclude=query.content_hash
+        )
+    ] == [close.content_hash, distant.content_hash]
+
+    other_court = TstLegalPrecedent(
+        summary="Fraude a execucao fiscal; alienacao apos a citacao"
+    )
+    store.record_precedents([other_court])
+
+    [similar] = index.search(query.summary, courts=[Court.TST], limit=5)
+    assert similar.content_hash == other_court.content_hash
+    assert similar.similarity == pytest.approx(1.0), "accents should be ignored"
+
+
+async def test_tool_calls_are_profiled_as_folded_stacks(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    """Test that profiled tool calls are written as spans and samples in the folded stacks
+    format, off the event loop, and that spans cost nothing outside of them."""
+
+    def busy_wait(seconds: float) -> None:
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            pass
+
+    async def research() -> None:
+        with span("research:STJ"):
+            with span("wait_for_results"):
+                await asyncio.sleep(0.05)
+            with span("extract_results"):
+                busy_wait(0.05)
+
+    profiler = CallProfiler(tmp_path, enabled=False, sampling_interval=0.001)
+    async with profiler.profile("call_tool:StjLegalPrecedentsRequest"):
+        await research()
+    assert not list(tmp_path.iterdir())
+
+    writing_threads: list[int] = []
+    write = profiler._write  # pyright: ignore[reportPrivateUsage]
+
+    def record_writing_thread(recording: object) -> None:
+        writing_threads.append(threading.get_ident())
+        write(recording)  # pyright: ignore[reportArgumentType]
+
+    monkeypatch.setattr(profiler, "_write", record_writing_thread)
+    profiler.enabled = True
+    async with profiler.profile("call_tool:StjLegalPrecedentsRequest"):
+        await research()
+    assert writing_threads
+    assert threading.get_ident() not in writing_threads
+
+    (spans_path,) = tmp_path.glob("*.spans.folded")
+    spans = dict(line.rsplit(" ", 1) for line in spans_path.read_text().splitlines())
+    assert set(spans) == {
+        "call_tool:StjLegalPrecedentsRequest",
+        "call_tool:StjLegalPrecedentsRequest;research:STJ",
+        "call_tool:StjLegalPrecedentsRequest;research:STJ;wait_for_results",
+        "call_tool:StjLegalPrecedentsRequest;research:STJ;extract_results",
+    }
+    assert (
+        int(spans["call_tool:StjLegalPrecedentsRequest;research:STJ;wait_for_results"])
+        >= 50_000
+    )
+
+    (samples_path,) = tmp_path.glob("*.samples.folded")
+    assert "busy_wait" in samples_path.read_text()
+
+
+class _TimedPage:
+    """Page that only tracks its default timeout."""
+
+    def __init__(self) -> None:
+        self.default_timeouts: list[float] = []
+
+    def is_closed(self) -> bool:
+        return False
+
+    def set_default_timeout(self, timeout: float) -> None:
+        self.default_timeouts.append(timeout)
+
+
+async def test_stages_split_the_deadline() -> None:
+    """Test that each stage is bound by its share of the time left, which the page's timeouts
+    are capped to meanwhile."""
+    page = _TimedPage()
+
+    async with stage(Stage.LEASE, page):  # pyright: ignore[reportArgumentType]
+        pass
+    assert page.default_timeouts == [], "stages are unbound without a deadline"
+
+    with deadline(10):
+        async with stage(Stage.LEASE, page):  # pyright: ignore[reportArgumentType]
+            pass
+    assert page.default_timeouts[0] == pytest.approx(2_000, rel=0.01)
+    assert page.default_timeouts[1] == 30_000, "the default timeout should be restored"
+
+    async def outlast_budget() -> None:
+        with deadline(0.05):
+            async with stage(Stage.EXTRACT):
+                await asyncio.sleep(1)
+
+    started_at = time.perf_counter()
+    with pytest.raises(DeadlineExceededError):
+        await outlast_budget()
+    assert time.perf_counter() - started_at < 0.5
+
+
+async def test_court_health_ignores_slow_leases() -> None:
+    """Test that leasing a page outlasting its share of the deadline isn't counted as a court
+    failure."""
+    health = CourtHealthTracker(failure_threshold=1, reset_timeout=60)[Court.STJ]
+
+    async def lease_slowly() -> None:
+        async with stage(Stage.LEASE):
+            await asyncio.sleep(1)
+
+    with deadline(0.05), pytest.raises(DeadlineExceededError):
+        await health.call(lease_slowly)
+
+    assert health.failures == 0
+    assert health.breaker.state is CircuitState.CLOSED
+
+
+async def test_court_health_counts_hanging_courts() -> None:
+    """Test that a court hanging while the tool call still has time left opens its breaker, and
+    that the call isn't retried."""
+    health = CourtHealthTracker(failure_threshold=1, reset_timeout=60)[Court.STJ]
+    calls = 0
+
+    async def hang() -> None:
+        nonlocal calls
+        calls += 1
+        async with stage(Stage.NAVIGATE):
+            await asyncio.sleep(1)
+
+    with deadline(0.2), pytest.raises(DeadlineExceededError):
+        await retry_with_jitter(
+            lambda: health.call(hang), attempts=3, base_delay=0, max_delay=0
+        )
+
+    assert calls == 1
+    assert health.failures == 1
+    assert health.breaker.state is CircuitState.OPEN
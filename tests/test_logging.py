@@ -0,0 +1,67 @@
+"""Tests for the logging setup."""
+
+import logging
+
+from brlaw_mcp_server import (
+    _MAX_FIELD_LENGTH,  # pyright: ignore[reportPrivateUsage]
+    _MAX_TRACEBACK_ENTRIES,  # pyright: ignore[reportPrivateUsage]
+    _SAMPLING_BURST,  # pyright: ignore[reportPrivateUsage]
+    _bound_traceback,  # pyright: ignore[reportPrivateUsage]
+    _PayloadLimiter,  # pyright: ignore[reportPrivateUsage]
+    _RepetitionSampler,  # pyright: ignore[reportPrivateUsage]
+)
+
+
+def test_payload_fields_are_bounded() -> None:
+    """Test that huge fields, such as pages' contents, are truncated."""
+    record = logging.makeLogRecord(
+        {
+            "msg": "Unexpected response",
+            "response_content": "<html>" * _MAX_FIELD_LENGTH,
+            "arguments": {"summary": "a" * (_MAX_FIELD_LENGTH + 1)},
+        }
+    )
+
+    assert _PayloadLimiter().filter(record)
+    assert len(record.response_content) < 2 * _MAX_FIELD_LENGTH  # pyright: ignore[reportAttributeAccessIssue, reportUnknownArgumentType, reportUnknownMemberType]
+    assert record.arguments["summary"].endswith("[1 characters truncated]")  # pyright: ignore[reportAttributeAccessIssue, reportUnknownMemberType]
+
+
+def test_malformed_messages_are_kept() -> None:
+    """Test that a message whose arguments don't match it is logged as is, instead of raising in
+    the caller's thread."""
+    record = logging.makeLogRecord({"msg": "%d items", "args": ("abc",)})
+
+    assert _PayloadLimiter().filter(record)
+    assert record.msg == "%d items"
+
+
+def test_tracebacks_are_bounded() -> None:
+    """Test that only the innermost entries of long tracebacks are kept."""
+    entries = [f"frame {index}\n" for index in range(2 * _MAX_TRACEBACK_ENTRIES)]
+
+    bounded = _bound_traceback(entries)
+
+    assert len(bounded) == _MAX_TRACEBACK_ENTRIES + 1
+    assert bounded[-1] == entries[-1]
+
+
+def test_repeated_errors_are_sampled() -> None:
+    """Test that only the first repetitions of an error are logged, then a sample of them."""
+    sampler = _RepetitionSampler()
+
+    let_through = [
+        record
+        for _ in range(200)
+        if sampler.filter(
+            record := logging.makeLogRecord(
+                {"msg": "Court is down", "levelno": logging.ERROR}
+            )
+        )
+    ]
+
+    assert _SAMPLING_BURST < len(let_through) < 10
+    assert let_through[-1].dropped_repetitions > 0  # pyright: ignore[reportAttributeAccessIssue, reportUnknownMemberType]
+    assert sampler.filter(
+        logging.makeLogRecord({"msg": "Court is down", "levelno": logging.INFO})
+    ), "records below WARNING level should never be sampled"
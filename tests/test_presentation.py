@@ -1,17 +1,85 @@
 """Tests for the core server functionality."""
 
+import asyncio
+import functools
+import json
+import subprocess
+import sys
+from pathlib import Path
+from typing import TYPE_CHECKING
+
 import pytest
-from pydantic import ValidationError
+from mcp import ClientSession
+from mcp.types import InitializedNotification
+from pydantic import AnyUrl, ValidationError
+
+from brlaw_mcp_server.domain.base import Court, ResultsFingerprint
+from brlaw_mcp_server.domain.stf import StfLegalPrecedent
+from brlaw_mcp_server.domain.stj import StjLegalPrecedent
+from brlaw_mcp_server.infrastructure.cache import ResultCache
+from brlaw_mcp_server.infrastructure.storage_state import StorageStateStore
+from brlaw_mcp_server.infrastructure.store import PrecedentStore
+from brlaw_mcp_server.presentation import mcp
+from brlaw_mcp_server.presentation.mcp import (
+    LegalPrecedentsCountRequest,
+    StjLegalPrecedentsRequest,
+)
+from brlaw_mcp_server.presentation.tcp import MESSAGE_SIZE_LIMIT, tcp_streams
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+
+@pytest.fixture(autouse=True)
+def isolate_cache_dir(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> "Iterator[None]":
+    """Keep the tools' schemas, the legal precedents, the storage states and the profiles from
+    being written to the user's cache directory."""
+    settings = mcp._SETTINGS.model_copy(update={"cache_dir": tmp_path})  # pyright: ignore[reportPrivateUsage]
+    monkeypatch.setattr(mcp, "_SETTINGS", settings)
+    store = PrecedentStore(tmp_path / "precedents.sqlite3")
+    monkeypatch.setattr(mcp, "_STORE", store)
+    monkeypatch.setattr(mcp._POLLER, "_store", store)  # pyright: ignore[reportPrivateUsage]
+    monkeypatch.setattr(
+        mcp._BROWSER,  # pyright: ignore[reportPrivateUsage]
+        "_storage_states",
+        StorageStateStore(
+            tmp_path / "storage_states",
+            max_age=settings.storage_state_max_age,
+            refresh_interval=settings.storage_state_refresh_interval,
+        )
+        if settings.storage_state_max_age
+        else None,
+    )
+    monkeypatch.setattr(mcp._PROFILER, "_directory", tmp_path / "profiles")  # pyright: ignore[reportPrivateUsage]
+    mcp._get_tools.cache_clear()  # pyright: ignore[reportPrivateUsage]
+    mcp._create_similarity_index.cache_clear()  # pyright: ignore[reportPrivateUsage]
+    yield
+    mcp._get_tools.cache_clear()  # pyright: ignore[reportPrivateUsage]
+    mcp._create_similarity_index.cache_clear()  # pyright: ignore[reportPrivateUsage]
+    store.close()
+
 
-from brlaw_mcp_server.presentation.mcp import StjLegalPrecedentsRequest
+def test_server_import_defers_heavy_modules() -> None:
+    """Test that the browser driver and numpy aren't imported along with the server.
+
+    They're only needed after the MCP handshake, so importing them earlier slows down the
+    startup."""
+    subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys, brlaw_mcp_server.presentation.mcp; assert {'patchright', 'numpy'}.isdisjoint(sys.modules)",
+        ],
+        check=True,
+    )
 
 
 @pytest.mark.asyncio
 async def test_listed_tools() -> None:
     """Test all listed tools."""
-    from brlaw_mcp_server.presentation.mcp import call_tool, list_tools
-
-    tools = await list_tools()
+    tools = await mcp.list_tools()
     assert len(tools) > 0
     for tool in tools:
         assert tool.name is not None
@@ -21,7 +89,176 @@ async def test_listed_tools() -> None:
         # Currently all tools expect one argument at least, thus it is expected that every tool
         # will raise a ValidationError if none are provided.
         with pytest.raises(ValidationError):
-            await call_tool(tool.name, {})
+            await mcp.call_tool(tool.name, {})
+
+
+@pytest.mark.asyncio
+async def test_count_reports_unavailable_courts(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Test that a court failing to count doesn't fail the other courts' counts."""
+
+    async def call_court(court: Court, _: object) -> int:
+        if court is Court.TST:
+            raise RuntimeError("Court is down")
+
+        return 42
+
+    monkeypatch.setattr(mcp, "_call_court", call_court)
+
+    contents = await mcp.call_tool(
+        LegalPrecedentsCountRequest.__name__, {"summary": "fraude execução"}
+    )
+
+    assert json.loads(contents[0].text) == {"STJ": 42, "TST": None, "STF": 42}
+    assert "TST" in contents[1].text
+
+
+@pytest.mark.asyncio
+async def test_cached_results_are_revalidated_by_probing(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Test that cached results no longer fresh are only researched again once their page of
+    results changed."""
+    now = 0.0
+    cache: ResultCache[object] = ResultCache(
+        ttl=10, stale_ttl=1000, max_entries=8, clock=lambda: now
+    )
+    monkeypatch.setattr(mcp, "_RESULT_CACHE", cache)
+    fingerprint = ResultsFingerprint(number_of_results=42, first_results=("a", "b"))
+    researches: list[str] = []
+    probes: list[str] = []
+
+    async def research_page(
+        court: Court, *, summary: str, **_: object
+    ) -> tuple[list[StjLegalPrecedent], ResultsFingerprint]:
+        assert court is Court.STJ
+        researches.append(summary)
+        return [StjLegalPrecedent(summary=f"Ementa {len(researches)}")], fingerprint
+
+    async def probe(court: Court, *, summary: str, **_: object) -> ResultsFingerprint:
+        assert court is Court.STJ
+        probes.append(summary)
+        return fingerprint
+
+    monkeypatch.setattr(mcp, "_research_page", research_page)
+    monkeypatch.setattr(mcp, "_probe", probe)
+
+    async def assert_served(summary: str) -> None:
+        (content,) = await mcp.call_tool(
+            StjLegalPrecedentsRequest.__name__, {"summary": "fraude execução"}
+        )
+        assert json.loads(content.text)["summary"] == summary
+
+    await assert_served("Ementa 1")
+
+    now = 50
+    await assert_served("Ementa 1")
+    assert (len(researches), len(probes)) == (1, 1)
+
+    # Revalidated results are fresh again.
+    now = 55
+    await assert_served("Ementa 1")
+    assert (len(researches), len(probes)) == (1, 1)
+
+    fingerprint = ResultsFingerprint(number_of_results=43, first_results=("c", "a"))
+    now = 100
+    await assert_served("Ementa 2")
+    assert (len(researches), len(probes)) == (2, 2)
+
+
+@pytest.mark.asyncio
+async def test_stale_results_are_served_once_probing_fails(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Test that a court failing the probe of cached results isn't researched as well."""
+    now = 0.0
+    cache: ResultCache[object] = ResultCache(
+        ttl=10, stale_ttl=1000, max_entries=8, clock=lambda: now
+    )
+    monkeypatch.setattr(mcp, "_RESULT_CACHE", cache)
+    researches = 0
+
+    async def research_page(
+        court: Court, **_: object
+    ) -> tuple[list[StjLegalPrecedent], ResultsFingerprint]:
+        nonlocal researches
+        assert court is Court.STJ
+        researches += 1
+        return [StjLegalPrecedent(summary="Ementa")], ResultsFingerprint(
+            number_of_results=1, first_results=("a",)
+        )
+
+    async def probe(court: Court, **_: object) -> ResultsFingerprint:
+        raise RuntimeError(f"{court} is down")
+
+    monkeypatch.setattr(mcp, "_research_page", research_page)
+    monkeypatch.setattr(mcp, "_probe", probe)
+
+    await mcp.call_tool(StjLegalPrecedentsRequest.__name__, {"summary": "fraude"})
+
+    now = 50
+    warning, content = await mcp.call_tool(
+        StjLegalPrecedentsRequest.__name__, {"summary": "fraude"}
+    )
+
+    assert "indisponível" in warning.text
+    assert json.loads(content.text)["summary"] == "Ementa"
+    assert researches == 1
+
+
+@pytest.mark.asyncio
+async def test_precedents_are_exposed_as_resources() -> None:
+    """Test that stored legal precedents can be listed and read back by their identifiers."""
+    precedent = StfLegalPrecedent(
+        summary="Ementa", full_text_url="https://stf.jus.br/1"
+    )
+    mcp._STORE.record_precedents([precedent])  # pyright: ignore[reportPrivateUsage]
+
+    (resource,) = await mcp.list_resources()
+    assert resource.name == precedent.id
+
+    (contents,) = await mcp.read_resource(resource.uri)
+    assert StfLegalPrecedent.model_validate_json(contents.content) == precedent
+
+    with pytest.raises(ValueError, match="não encontrado"):
+        await mcp.read_resource(AnyUrl("brlaw://precedents/stf-0000000000000000"))
+
+
+@pytest.mark.asyncio
+async def test_tcp_transport() -> None:
+    """Test that a client can talk to the server over a TCP connection."""
+    server = mcp._create_server()  # pyright: ignore[reportPrivateUsage]
+    # Warming the browser up isn't needed to list the tools.
+    del server.notification_handlers[InitializedNotification]
+
+    tcp_server = await asyncio.start_server(
+        functools.partial(
+            mcp._handle_client,  # pyright: ignore[reportPrivateUsage]
+            server,
+            server.create_initialization_options(),
+        ),
+        "127.0.0.1",
+        0,
+        limit=MESSAGE_SIZE_LIMIT,
+    )
+    port: int = tcp_server.sockets[0].getsockname()[1]  # pyright: ignore[reportAny]
+    async with tcp_server:
+        reader, writer = await asyncio.open_connection(
+            "127.0.0.1", port, limit=MESSAGE_SIZE_LIMIT
+        )
+        async with (
+            tcp_streams(reader, writer) as streams,
+            ClientSession(*streams) as client,
+        ):
+            await client.initialize()
+            tools = (await client.list_tools()).tools
+
+        writer.close()
+
+    assert {tool.name for tool in tools} == {
+        tool.name for tool in await mcp.list_tools()
+    }
 
 
 @pytest.mark.asyncio